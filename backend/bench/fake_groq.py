@@ -0,0 +1,164 @@
+"""
+Local OpenAI-compatible stand-in for the Groq chat-completions API.
+
+Plays back recorded completions from fixtures/completions.json with a
+configurable latency, so benchmarks run without network access:
+
+    python -m bench.fake_groq --port 8900 --latency 0.8 --jitter 0.2
+    python -m bench.fake_groq --model-latency llama-3.1-8b-instant=0.2
+    GROQ_API_BASE=http://127.0.0.1:8900 uvicorn main:app
+
+With --record the server instead forwards every request to the real API
+(GROQ_API_KEY required) and stores the response under the request hash.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "completions.json")
+REAL_GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+
+def request_key(messages) -> str:
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Playback:
+    """Picks the recorded completion for a request"""
+
+    def __init__(self, path=FIXTURES_PATH):
+        self.path = path
+        with open(path) as f:
+            self.fixtures = json.load(f)
+
+    def lookup(self, messages) -> str:
+        exact = self.fixtures.get("exact", {}).get(request_key(messages))
+        if exact is not None:
+            return exact
+        last = messages[-1]["content"] if messages else ""
+        for rule in self.fixtures.get("rules", []):
+            if rule["match"] in last:
+                return rule["content"]
+        return self.fixtures.get("default", "")
+
+    def record(self, messages, content):
+        self.fixtures.setdefault("exact", {})[request_key(messages)] = content
+        with open(self.path, "w") as f:
+            json.dump(self.fixtures, f, indent=2)
+
+
+def parse_model_latency(items) -> dict:
+    """["model=seconds", ...] -> {model: seconds}"""
+    return {model: float(seconds) for model, _, seconds in (item.partition("=") for item in items or [])}
+
+
+def create_app(latency=0.5, jitter=0.1, token_delay=0.01, record=False, fixtures_path=FIXTURES_PATH,
+               model_latency=None):
+    """model_latency: {model: mean seconds} for models that should not use `latency`"""
+    app = FastAPI()
+    playback = Playback(fixtures_path)
+    model_latency = model_latency or {}
+    app.state.requests = 0
+    app.state.requests_by_model = {}
+
+    def completion_body(model, content):
+        prompt_tokens = 200
+        completion_tokens = max(len(content) // 4, 1)
+        return {
+            "id": f"chatcmpl-{random.getrandbits(64):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    async def stream_chunks(model, content):
+        base = {"id": f"chatcmpl-{random.getrandbits(64):x}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model}
+        # ~4 characters per token, like the real tokenizer on English text
+        for start in range(0, len(content), 4):
+            await asyncio.sleep(token_delay)
+            chunk = {**base, "choices": [{"index": 0, "delta": {"content": content[start:start + 4]},
+                                          "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+        done = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        model = body.get("model", "fake")
+        messages = body.get("messages", [])
+        app.state.requests_by_model[model] = app.state.requests_by_model.get(model, 0) + 1
+
+        if record:
+            async with httpx.AsyncClient(timeout=120) as client:
+                upstream = await client.post(
+                    REAL_GROQ_URL,
+                    json={**body, "stream": False},
+                    headers={"Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}"}
+                )
+            content = upstream.json()["choices"][0]["message"]["content"]
+            playback.record(messages, content)
+        else:
+            await asyncio.sleep(max(model_latency.get(model, latency) + random.uniform(-jitter, jitter), 0))
+            content = playback.lookup(messages)
+
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(model, content), media_type="text/event-stream")
+        return JSONResponse(completion_body(model, content))
+
+    return app
+
+
+def start_in_thread(port=0, **kwargs):
+    """Run the fake server in a daemon thread; returns (base_url, server)"""
+    config = uvicorn.Config(create_app(**kwargs), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{bound_port}", server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Groq stand-in for benchmarks")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per completion")
+    parser.add_argument("--jitter", type=float, default=0.1, help="+/- seconds added uniformly")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between streamed chunks")
+    parser.add_argument("--record", action="store_true", help="proxy to the real API and save responses")
+    parser.add_argument("--model-latency", action="append", metavar="MODEL=SECONDS",
+                        help="mean latency for one model (repeatable)")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.token_delay, args.record,
+                     model_latency=parse_model_latency(args.model_latency))
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
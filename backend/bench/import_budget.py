@@ -0,0 +1,90 @@
+"""
+Cold-start budget check.
+
+Imports `main` in a fresh interpreter under `python -X importtime` and fails
+(exit 1) when the import takes longer than the budget, or when a dependency
+that is meant to load lazily (pdfplumber, LangGraph, LangChain) is imported
+at startup. Run from backend/:
+
+    python -m bench.import_budget
+    python -m bench.import_budget --budget-ms 600 --runs 5 --top 15
+
+The best of --runs is compared, since the first run also pays for cold disk
+caches.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+
+# Loaded on first use; importing them at startup is a regression
+LAZY_MODULES = ["pdfplumber", "langgraph", "langchain_groq", "langchain_core", "langsmith"]
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module="main"):
+    """One cold import; returns [(name, depth, self_us, cumulative_us)] in importtime order"""
+    # Separate working dir: nothing the import creates lands in the repo
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "run"))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=os.path.join(workdir, "run"),
+            env={**os.environ, "PYTHONPATH": BACKEND_DIR},
+            capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(args.runs, 1))]
+    best = min(runs, key=lambda entries: entries[-1][3])
+    total_ms = best[-1][3] / 1000
+
+    print(f"import {args.module}: best {total_ms:.1f} ms of {len(runs)} run(s) "
+          f"(budget {args.budget_ms:.0f} ms)")
+    # Depth 1 = imported directly by the module under test
+    direct = sorted((e for e in best if e[1] == 1), key=lambda e: e[3], reverse=True)
+    for name, _, _, cumulative_us in direct[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    loaded = {name.split(".")[0] for name, *_ in best}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
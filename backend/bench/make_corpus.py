@@ -0,0 +1,129 @@
+"""
+Builds the sample resume PDFs in bench/corpus/.
+
+The PDFs are written by hand (uncompressed Helvetica text, one object per
+page) so the corpus can be regenerated without extra dependencies:
+
+    python -m bench.make_corpus
+"""
+import os
+import random
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+LINES_PER_PAGE = 48
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages, path=None) -> bytes:
+    """pages: list of pages, each a list of text lines. Returns the PDF bytes."""
+    count = len(pages)
+    font_id = 3 + 2 * count
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(count))}] /Count {count} >>",
+    ]
+    for i, lines in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        stream = "\n".join(
+            ["BT /F1 10 Tf 50 760 Td 15 TL"] + [f"({_escape(line)}) Tj T*" for line in lines] + ["ET"]
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+
+    if path:
+        with open(path, "wb") as f:
+            f.write(out)
+    return out
+
+
+def paginate(lines, header=None, footer=None):
+    """Split lines into pages, repeating a header/footer like exported CVs do"""
+    body = LINES_PER_PAGE - (2 if header else 0) - (2 if footer else 0)
+    chunks = [lines[i:i + body] for i in range(0, len(lines), body)] or [[]]
+    pages = []
+    for number, chunk in enumerate(chunks, start=1):
+        page = []
+        if header:
+            page += [header, ""]
+        page += chunk
+        if footer:
+            page += ["", footer.format(page=number, pages=len(chunks))]
+        pages.append(page)
+    return pages
+
+
+SKILLS = ["Python", "FastAPI", "Django", "SQL", "PostgreSQL", "Redis", "Docker", "Kubernetes",
+          "AWS", "React", "TypeScript", "Go", "Kafka", "Airflow", "PyTorch", "scikit-learn"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Shipped", "Automated", "Scaled"]
+THINGS = ["a payments API", "the search indexing pipeline", "an internal feature-flag service",
+          "batch ETL jobs", "the recommendation model serving layer", "CI pipelines",
+          "a real-time analytics dashboard", "the authentication gateway"]
+
+
+def resume_lines(name, years, roles, projects, seed, nonce=None):
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, 7)
+    lines = [name, f"{name.split()[0].lower()}@example.com | +1 555 0100 | github.com/{name.split()[0].lower()}", ""]
+    if nonce:
+        lines.append(f"Reference: {nonce}")
+    lines += ["SUMMARY", f"Software engineer with {years} years of experience building backend systems.", ""]
+    lines += ["SKILLS", ", ".join(skills), ""]
+    lines += ["EXPERIENCE"]
+    for r in range(roles):
+        lines.append(f"Senior Engineer, Company {chr(65 + r)} ({2022 - 2 * r} - {2024 - 2 * r})")
+        for _ in range(5):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(THINGS)} using {rng.choice(skills)}, "
+                         f"cutting latency by {rng.randint(10, 70)}%")
+        lines.append("")
+    lines += ["PROJECTS"]
+    for p in range(projects):
+        lines.append(f"Project {p + 1}: {rng.choice(THINGS).capitalize()} ({', '.join(rng.sample(skills, 2))})")
+        lines.append(f"  {rng.choice(VERBS)} end to end; serves {rng.randint(1, 50)}k users daily.")
+    lines += ["", "EDUCATION", "B.Tech Computer Science, State University"]
+    return lines
+
+
+# name, years, roles, projects, repeated header/footer
+SAMPLES = [
+    ("junior_1page.pdf", "Aarav Mehta", 1, 1, 2, False),
+    ("mid_2page.pdf", "Priya Sharma", 3, 4, 10, True),
+    ("senior_4page.pdf", "Daniel Okafor", 8, 8, 46, True),
+    ("staff_12page.pdf", "Mei Lin", 14, 12, 210, True),
+]
+
+
+def build_sample(filename, name, years, roles, projects, decorated, nonce=None) -> bytes:
+    lines = resume_lines(name, years, roles, projects, seed=filename, nonce=nonce)
+    header = f"{name} - Curriculum Vitae" if decorated else None
+    footer = "Page {page} of {pages}" if decorated else None
+    return make_pdf(paginate(lines, header, footer))
+
+
+def main():
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    for filename, *spec in SAMPLES:
+        data = build_sample(filename, *spec)
+        with open(os.path.join(CORPUS_DIR, filename), "wb") as f:
+            f.write(data)
+        print(f"wrote {filename} ({len(data)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Offline benchmark suite.
+
+Starts the local Groq stand-in (fake_groq.py), points the backend at it and
+reports p50/p95/p99 latency and throughput. Nothing touches the network.
+Run from backend/:
+
+    python -m bench.run_bench                       # every benchmark
+    python -m bench.run_bench e2e --concurrency 32 --latency 0.8
+    python -m bench.run_bench all --json out.json --baseline last.json
+
+With --baseline, exits non-zero when any benchmark's p95 regressed by more
+than --max-regression (fraction, default 0.25).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench import fake_groq  # noqa: E402
+from bench.make_corpus import CORPUS_DIR, SAMPLES, build_sample  # noqa: E402
+
+BENCHMARKS = ["extract", "clean", "parse", "db", "e2e"]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(name, latencies, wall, errors=0):
+    latencies = sorted(latencies)
+    return {
+        "name": name,
+        "n": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+    }
+
+
+def run_sync(name, op, iterations):
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        op(i)
+        latencies.append(time.perf_counter() - t)
+    return summarize(name, latencies, time.perf_counter() - started)
+
+
+async def run_concurrent(name, op, iterations, concurrency):
+    """Run op(i) `iterations` times with at most `concurrency` in flight"""
+    latencies = []
+    errors = 0
+    counter = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            t = time.perf_counter()
+            try:
+                await op(i)
+            except Exception as e:
+                errors += 1
+                print(f"  [{name}] error: {e!r}")
+                continue
+            latencies.append(time.perf_counter() - t)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(name, latencies, time.perf_counter() - started, errors)
+
+
+def corpus_paths():
+    return [os.path.join(CORPUS_DIR, filename) for filename, *_ in SAMPLES]
+
+
+# -------- Benchmarks -------- #
+
+async def bench_extract(args):
+    from pdf_extractor import extract_text_from_pdf, extract_text_async, shutdown_pool
+
+    paths = corpus_paths()
+    results = [run_sync(
+        f"extract_text_from_pdf[{os.path.basename(p)}]", lambda i, p=p: extract_text_from_pdf(p),
+        max(args.iterations // len(paths), 1)
+    ) for p in paths]
+    results.append(await run_concurrent(
+        "extract_text_async[mixed]", lambda i: extract_text_async(paths[i % len(paths)]),
+        args.iterations, args.concurrency
+    ))
+    shutdown_pool()
+    return results
+
+
+async def bench_clean(args):
+    from pdf_extractor import clean_text, _join_pages, _extract_page_range
+    from text_compactor import compact_pages, estimate_tokens
+
+    pages = _extract_page_range(corpus_paths()[-1], 0, None)
+    raw = _join_pages(pages)
+    results = [
+        run_sync("clean_text[12 pages]", lambda i: clean_text(raw), args.iterations * 20),
+        run_sync("compact_pages[12 pages]", lambda i: compact_pages(pages), args.iterations * 20),
+    ]
+    print(f"  prompt tokens for 12 pages: {estimate_tokens(clean_text(raw))} raw, "
+          f"{estimate_tokens(compact_pages(pages))} compacted")
+    return results
+
+
+async def bench_parse(args):
+    from pdf_extractor import extract_text_from_pdf, extract_pages_from_pdf
+    from resume_parser import parse_resume
+    from text_compactor import compact_pages
+
+    texts = [extract_text_from_pdf(p) for p in corpus_paths()]
+    compacted = [compact_pages(extract_pages_from_pdf(p)) for p in corpus_paths()]
+    return [
+        await run_concurrent(
+            "parse_resume[raw]", lambda i: parse_resume(texts[i % len(texts)]), args.iterations, args.concurrency
+        ),
+        await run_concurrent(
+            "parse_resume[compacted]", lambda i: parse_resume(compacted[i % len(compacted)]),
+            args.iterations, args.concurrency
+        ),
+    ]
+
+
+async def bench_db(args):
+    import db
+    db.init_db()
+
+    profile = {"name": "Bench", "skills": ["Python", "SQL"], "experience": 3}
+    questions = [{"question": f"Question {i}", "type": "conceptual", "skill": "Python"} for i in range(5)]
+    score = {"correctness": 80, "depth": 70, "clarity": 90, "feedback": "ok"}
+
+    def interview_writes(i):
+        resume_id = db.save_resume(profile)
+        interview_id = db.create_interview(resume_id)
+        for question_id in db.save_questions(interview_id, questions):
+            db.save_answer(question_id, "answer", score)
+
+    results = [run_sync("db.interview_writes[enqueue]", interview_writes, args.iterations * 10)]
+
+    started = time.perf_counter()
+    for i in range(args.iterations * 10):
+        interview_writes(i)
+    db.flush()
+    results.append(summarize("db.interview_writes[durable]", [time.perf_counter() - started], time.perf_counter() - started))
+    results[-1]["throughput_per_s"] = round(args.iterations * 10 / (time.perf_counter() - started), 2)
+    return results
+
+
+async def bench_e2e(args):
+    import httpx
+    import main
+
+    endpoint_latencies = {"upload": [], "start": [], "submit": []}
+
+    async def timed(bucket, coro):
+        t = time.perf_counter()
+        response = await coro
+        endpoint_latencies[bucket].append(time.perf_counter() - t)
+        response.raise_for_status()
+        return response.json()
+
+    async def flow(client, i):
+        filename, *spec = SAMPLES[i % len(SAMPLES)]
+        nonce = None if args.reuse_uploads else uuid.uuid4().hex
+        pdf = build_sample(filename, *spec, nonce=nonce)
+
+        upload = await timed("upload", client.post(
+            "/upload-resume", files={"file": (filename, pdf, "application/pdf")}
+        ))
+        started = await timed("start", client.post(
+            f"/start-interview?grading_mode={args.grading_mode}", json=upload["profile"]
+        ))
+        interview_id = started["interview_id"]
+        for question_id in range(10):
+            body = await timed("submit", client.post("/submit-answer", json={
+                "interview_id": interview_id,
+                "question_id": question_id,
+                "answer": "A generator yields values lazily, keeping memory flat for large inputs."
+            }))
+            if body["status"] == "completed":
+                break
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            flows = await run_concurrent(
+                f"e2e.flow[c={args.concurrency}]", lambda i: flow(client, i), args.iterations, args.concurrency
+            )
+
+    wall = flows["n"] / flows["throughput_per_s"] if flows["throughput_per_s"] else 0
+    results = [flows]
+    for bucket, latencies in endpoint_latencies.items():
+        results.append(summarize(f"e2e.{bucket}", latencies, wall))
+    return results
+
+
+# -------- Runner -------- #
+
+def print_table(results):
+    header = f"{'benchmark':<44}{'n':>7}{'err':>5}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'ops/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['name']:<44}{r['n']:>7}{r['errors']:>5}{r['p50_ms']:>11}{r['p95_ms']:>11}"
+              f"{r['p99_ms']:>11}{r['throughput_per_s']:>10}")
+
+
+def compare(results, baseline_path, max_regression):
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get(r["name"])
+        if old and old["p95_ms"] and r["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{r['name']}: p95 {old['p95_ms']} -> {r['p95_ms']} ms")
+    return regressions
+
+
+async def run(args):
+    results = []
+    for name in BENCHMARKS if not args.benchmarks or "all" in args.benchmarks else args.benchmarks:
+        print(f"[bench] {name}")
+        results += await globals()[f"bench_{name}"](args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline backend benchmarks")
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help=f"one or more of {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--iterations", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="fake LLM latency jitter (s)")
+    parser.add_argument("--model-latency", action="append", metavar="MODEL=SECONDS",
+                        help="fake latency for one model, e.g. llama-3.1-8b-instant=0.1 (repeatable)")
+    parser.add_argument("--grading-mode", default="live", choices=["live", "deferred"])
+    parser.add_argument("--reuse-uploads", action="store_true",
+                        help="upload identical PDFs (exercises the resume cache)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results JSON from a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS + ["all"])
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    base_url, server = fake_groq.start_in_thread(
+        latency=args.latency, jitter=args.jitter, model_latency=fake_groq.parse_model_latency(args.model_latency)
+    )
+
+    # Isolated working dir: SQLite files, caches and uploads never touch the real ones
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    os.makedirs(os.path.join(workdir, "run"))
+    os.chdir(os.path.join(workdir, "run"))
+    os.environ.update({
+        "GROQ_API_BASE": base_url,
+        "GROQ_API_KEY": "bench",
+        "RESUME_CACHE_PATH": os.path.join(workdir, "resume_cache.db"),
+        "QUESTION_BANK_PATH": os.path.join(workdir, "question_bank.db"),
+        "LLM_CACHE_PATH": os.path.join(workdir, "llm_cache.db"),
+        # Benchmarks repeat the same prompts on purpose; cached replies would hide the LLM path
+        "LLM_CACHE_ENABLED": os.getenv("LLM_CACHE_ENABLED", "0"),
+        # Fixture reference answers are generic, so the pre-scorer would grade
+        # the e2e answers as off-topic and skip the LLM call being measured
+        "PRESCORE_ENABLED": os.getenv("PRESCORE_ENABLED", "0"),
+    })
+
+    results = asyncio.run(run(args))
+    server.should_exit = True
+
+    print()
+    print_table(results)
+    print(f"\nfake Groq requests served: {server.config.app.state.requests} "
+          f"{server.config.app.state.requests_by_model}  (workdir {workdir})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
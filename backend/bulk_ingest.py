@@ -0,0 +1,354 @@
+"""
+Bulk resume ingestion.
+
+A job is a batch of PDFs saved under BULK_DIR/<job_id>/ and run through a
+two-stage pipeline with independent limits:
+
+1. CPU stage: text extraction in the PDF process pool plus compaction,
+   at most BULK_EXTRACT_CONCURRENCY files at a time.
+2. LLM stage: parse_resume at background priority (interactive traffic
+   keeps precedence in the scheduler), at most BULK_PARSE_CONCURRENCY calls.
+
+A file enters the LLM stage as soon as its own extraction is done, so the
+stages overlap. Both resume cache layers are checked before the LLM stage.
+
+Every outcome is stored in bulk_items with a completion sequence number:
+a client that disconnects re-reads results from where it left off, and a
+job interrupted by a restart can be resumed from its pending files.
+
+Files of failed items stay on disk for a retry; sweep() deletes the
+directory of any job not running here that was untouched for
+BULK_FILE_TTL (finished with errors, or abandoned).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import zipfile
+
+from db import create_bulk_job, save_bulk_item, set_bulk_job_status, get_bulk_job, get_bulk_items
+from llm import LLMOverloaded
+from metrics import span
+from pdf_extractor import extract_pages_async, EXTRACT_WORKERS
+from resume_cache import resume_cache, hash_text
+from resume_parser import parse_resume
+from text_compactor import compact_pages
+
+BULK_DIR = os.getenv("BULK_DIR", "../uploads/bulk")
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "1000"))
+BULK_MAX_ZIP_BYTES = int(os.getenv("BULK_MAX_ZIP_BYTES", str(200 * 1024 * 1024)))
+BULK_EXTRACT_CONCURRENCY = int(os.getenv("BULK_EXTRACT_CONCURRENCY", str(EXTRACT_WORKERS)))
+BULK_PARSE_CONCURRENCY = int(os.getenv("BULK_PARSE_CONCURRENCY", "8"))
+# parse_resume attempts when the LLM scheduler sheds load
+BULK_PARSE_ATTEMPTS = 3
+BULK_FILE_TTL = float(os.getenv("BULK_FILE_TTL", str(7 * 24 * 3600)))
+# Same threshold as /upload-resume
+MIN_TEXT_CHARS = 100
+
+stats = {"jobs": 0, "files": 0, "done": 0, "errors": 0, "cache_hits": 0, "swept_jobs": 0}
+
+# Jobs with a pipeline running in this process
+_jobs = {}
+
+
+class BulkItemError(Exception):
+    """One file could not be ingested; the rest of the batch continues"""
+
+
+def item_path(job_id, index):
+    return os.path.join(BULK_DIR, job_id, f"{index:05d}.pdf")
+
+
+def unpack_zip(zip_path, job_id, start, max_file_bytes):
+    """
+    Copy the PDFs of a zip to item paths starting at index `start`.
+    Returns their names. Member names are never used as paths.
+    """
+    names = []
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except zipfile.BadZipFile:
+        raise BulkItemError(f"Not a valid zip archive: {os.path.basename(zip_path)}")
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(".pdf"):
+                continue
+            if len(names) + start >= BULK_MAX_FILES:
+                raise BulkItemError(f"More than {BULK_MAX_FILES} files")
+            if info.file_size > max_file_bytes:
+                raise BulkItemError(f"Resume file too large: {name}")
+
+            size = 0
+            path = item_path(job_id, start + len(names))
+            with archive.open(info) as src, open(path, "wb") as dst:
+                # file_size comes from the archive header; count what is really inflated
+                while chunk := src.read(256 * 1024):
+                    size += len(chunk)
+                    if size > max_file_bytes:
+                        raise BulkItemError(f"Resume file too large: {name}")
+                    dst.write(chunk)
+            names.append(os.path.basename(name))
+    return names
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(256 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BulkJob:
+    """A job running in this process: results in completion order, with live readers"""
+
+    def __init__(self, job_id, last_seq=0):
+        self.id = job_id
+        # results[k] has seq start_seq + k + 1; earlier results are only in SQLite
+        self.start_seq = last_seq
+        self.results = []
+        self.done = False
+        self.task = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, index, filename, profile=None, error=None):
+        seq = self.start_seq + len(self.results) + 1
+        status = "error" if error else "done"
+        save_bulk_item(self.id, index, status, seq, profile=profile, error=error)
+        stats["errors" if error else "done"] += 1
+        async with self._changed:
+            self.results.append({
+                "seq": seq, "item_index": index, "filename": filename,
+                "status": status, "profile": profile, "error": error
+            })
+            self._changed.notify_all()
+
+    async def finish(self):
+        async with self._changed:
+            self.done = True
+            self._changed.notify_all()
+
+    async def follow(self, after=0):
+        """Yield results with seq > after as they complete, until the job is done"""
+        if after < self.start_seq:
+            # Results of an earlier run of this job (before a resume)
+            for item in await asyncio.to_thread(get_bulk_items, self.id, after):
+                if item["seq"] <= self.start_seq:
+                    yield item
+            after = self.start_seq
+
+        position = after - self.start_seq
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.results) > position or self.done)
+                batch = self.results[position:]
+                done = self.done
+            for item in batch:
+                yield item
+            position += len(batch)
+            if done and position >= len(self.results):
+                return
+
+
+async def _parse(text):
+    for attempt in range(BULK_PARSE_ATTEMPTS):
+        try:
+            return await parse_resume(text, priority="background")
+        except LLMOverloaded as e:
+            if attempt == BULK_PARSE_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def _ingest(path, extract_limit, parse_limit):
+    """extract -> compact -> parse for one file, with both cache layers; returns the profile"""
+    stage = "extract"
+    try:
+        async with extract_limit:
+            file_digest = await asyncio.to_thread(_hash_file, path)
+            cached = await asyncio.to_thread(resume_cache.get, "file", file_digest)
+            if cached is not None:
+                stats["cache_hits"] += 1
+                return cached
+
+            pages = await extract_pages_async(path)
+            with span("text.compact"):
+                resume_text = compact_pages(pages)
+
+        if len(resume_text) < MIN_TEXT_CHARS:
+            raise BulkItemError("Could not extract meaningful text from PDF")
+
+        text_digest = hash_text(resume_text)
+        cached = await asyncio.to_thread(resume_cache.get, "text", text_digest)
+        if cached is not None:
+            stats["cache_hits"] += 1
+            await asyncio.to_thread(resume_cache.put, cached, file_digest=file_digest)
+            return cached
+
+        stage = "parse"
+        async with parse_limit:
+            profile = await _parse(resume_text)
+        await asyncio.to_thread(resume_cache.put, profile, file_digest=file_digest, text_digest=text_digest)
+        return profile
+    except BulkItemError:
+        raise
+    except Exception as e:
+        # Corrupt PDFs, timeouts, unusable LLM output: reported per file
+        raise BulkItemError(f"{stage}: {str(e) or type(e).__name__}") from e
+
+
+async def _process(job, index, filename, extract_limit, parse_limit):
+    path = item_path(job.id, index)
+    if not os.path.exists(path):
+        await job.publish(index, filename, error="Uploaded file is no longer available")
+        return
+    try:
+        profile = await _ingest(path, extract_limit, parse_limit)
+    except BulkItemError as e:
+        # The file stays on disk so the item can be retried with a resume
+        await job.publish(index, filename, error=str(e))
+        return
+    os.remove(path)
+    await job.publish(index, filename, profile=profile)
+
+
+async def _run(job, items):
+    extract_limit = asyncio.Semaphore(BULK_EXTRACT_CONCURRENCY)
+    parse_limit = asyncio.Semaphore(BULK_PARSE_CONCURRENCY)
+    try:
+        await asyncio.gather(*[
+            _process(job, index, filename, extract_limit, parse_limit)
+            for index, filename in items
+        ])
+        set_bulk_job_status(job.id, "completed")
+        job_dir = os.path.join(BULK_DIR, job.id)
+        if os.path.isdir(job_dir) and not os.listdir(job_dir):
+            os.rmdir(job_dir)
+        print(f"[Bulk] Job {job.id} finished: {len(job.results)} files")
+    finally:
+        await job.finish()
+        _jobs.pop(job.id, None)
+
+
+def _start(job_id, items, last_seq=0):
+    """items: [(index, filename)] whose files are at item_path(job_id, index)"""
+    job = BulkJob(job_id, last_seq)
+    _jobs[job_id] = job
+    job.task = asyncio.create_task(_run(job, items))
+    return job
+
+
+def start_job(job_id, filenames):
+    """Record and start a job over files already saved at item_path(job_id, 0..n-1)"""
+    create_bulk_job(job_id, filenames)
+    stats["jobs"] += 1
+    stats["files"] += len(filenames)
+    return _start(job_id, list(enumerate(filenames)))
+
+
+def discard_upload(job_id):
+    """Remove the files of a job whose upload was rejected"""
+    shutil.rmtree(os.path.join(BULK_DIR, job_id), ignore_errors=True)
+
+
+async def job_status(job_id):
+    """Stored job summary; a "running" job with no pipeline here was interrupted. None if unknown."""
+    job = await asyncio.to_thread(get_bulk_job, job_id)
+    if job is None:
+        return None
+    if job["status"] == "running" and job_id not in _jobs:
+        job["status"] = "interrupted"
+    return job
+
+
+async def resume_job(job_id, retry_errors=False):
+    """
+    Restart the pipeline for a job's pending (and optionally failed) files.
+    No-op if it is already running. Returns False for an unknown job.
+    """
+    if job_id in _jobs:
+        return True
+    job = await asyncio.to_thread(get_bulk_job, job_id)
+    if job is None:
+        return False
+
+    statuses = ["pending", "error"] if retry_errors else ["pending"]
+    items = await asyncio.to_thread(get_bulk_items, job_id, None, statuses)
+    if items:
+        job_dir = os.path.join(BULK_DIR, job_id)
+        if os.path.isdir(job_dir):
+            # A resume counts as activity for sweep()
+            os.utime(job_dir)
+        set_bulk_job_status(job_id, "running")
+        _start(job_id, [(item["item_index"], item["filename"]) for item in items], job["last_seq"])
+        print(f"[Bulk] Resumed job {job_id}: {len(items)} files")
+    return True
+
+
+def sweep(now=None):
+    """
+    Delete the files of jobs idle for BULK_FILE_TTL (blocking: run it in a
+    thread). A later resume reports those items as no longer available.
+    Returns the number of job directories removed.
+    """
+    now = time.time() if now is None else now
+    if not os.path.isdir(BULK_DIR):
+        return 0
+    removed = 0
+    for job_id in os.listdir(BULK_DIR):
+        job_dir = os.path.join(BULK_DIR, job_id)
+        if job_id in _jobs or not os.path.isdir(job_dir):
+            continue
+        try:
+            with os.scandir(job_dir) as entries:
+                touched = max([os.path.getmtime(job_dir)] + [entry.stat().st_mtime for entry in entries])
+        except FileNotFoundError:
+            continue
+        if now - touched > BULK_FILE_TTL:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+    stats["swept_jobs"] += removed
+    if removed:
+        print(f"[Bulk] Removed files of {removed} idle job(s)")
+    return removed
+
+
+async def _stored(job_id, after):
+    for item in await asyncio.to_thread(get_bulk_items, job_id, after):
+        yield item
+
+
+def _line(data):
+    return json.dumps(data) + "\n"
+
+
+async def stream_results(job_id, after=0):
+    """
+    NDJSON: a `job` line, one `item` line per finished file (seq > after),
+    then a `done` line with the final counts. Follows a running job live.
+    """
+    job = _jobs.get(job_id)
+    summary = await job_status(job_id)
+    yield _line({"event": "job", **summary})
+
+    items = job.follow(after) if job is not None else _stored(job_id, after)
+    async for item in items:
+        yield _line({
+            "event": "item",
+            "seq": item["seq"],
+            "index": item["item_index"],
+            "filename": item["filename"],
+            "status": item["status"],
+            "profile": item["profile"],
+            "error": item["error"],
+        })
+
+    yield _line({"event": "done", **await job_status(job_id)})
+
+
+def bulk_stats():
+    """Counters plus jobs currently running (exported on /metrics)"""
+    return {**stats, "active_jobs": len(_jobs)}
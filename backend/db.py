@@ -1,22 +1,34 @@
+import ast
+import atexit
+import json
+import os
+import queue
 import sqlite3
+import threading
 import uuid
 from datetime import datetime
 
+from metrics import span, timed
+import score_aggregates
+
 # Simple SQLite DB for backend tracking
 # Note: Frontend uses Supabase for user data
+#
+# Writes are write-behind: save_* return the new id immediately and a
+# background thread owning one long-lived connection applies queued inserts
+# in batched transactions. Call flush() before reading rows you just wrote.
 
 DB_PATH = "interviews.db"
+WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "500"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.05"))
 
 def get_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=10)
     conn.row_factory = sqlite3.Row
     return conn
 
-def init_db():
-    """Initialize SQLite database"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
+def _migration_1(cursor):
+    """Base tables"""
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS resumes (
             id TEXT PRIMARY KEY,
@@ -57,65 +69,331 @@ def init_db():
             FOREIGN KEY (question_id) REFERENCES questions(id)
         )
     """)
-    
-    conn.commit()
-    conn.close()
 
-# Initialize DB on import
-init_db()
+def _migration_2(cursor):
+    """Foreign-key indexes, question type/skill columns, profiles as real JSON"""
+    cursor.execute("ALTER TABLE questions ADD COLUMN question_type TEXT")
+    cursor.execute("ALTER TABLE questions ADD COLUMN skill TEXT")
 
-def save_resume(profile_json):
-    """Save resume profile"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    resume_id = str(uuid.uuid4())
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interviews_resume ON interviews(resume_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interviews_created ON interviews(created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questions_interview ON questions(interview_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_questions_skill ON questions(skill, id)")
+    # Covering index: score aggregates never touch the answers table itself
     cursor.execute(
-        "INSERT INTO resumes (id, profile, created_at) VALUES (?, ?, ?)",
-        (resume_id, str(profile_json), datetime.now().isoformat())
+        "CREATE INDEX IF NOT EXISTS idx_answers_question ON answers(question_id, correctness, depth, clarity)"
     )
-    
-    conn.commit()
+
+    # Older rows hold str(dict) (a Python repr); rewrite them as JSON
+    rows = cursor.execute("SELECT id, profile FROM resumes").fetchall()
+    for row_id, profile in rows:
+        try:
+            json.loads(profile)
+        except (TypeError, ValueError):
+            try:
+                converted = json.dumps(ast.literal_eval(profile))
+            except (ValueError, SyntaxError):
+                continue
+            cursor.execute("UPDATE resumes SET profile = ? WHERE id = ?", (converted, row_id))
+
+def _migration_3(cursor):
+    """Bulk resume ingestion jobs and their per-file results"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bulk_jobs (
+            id TEXT PRIMARY KEY,
+            total INTEGER,
+            status TEXT,
+            created_at TEXT,
+            finished_at TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bulk_items (
+            job_id TEXT,
+            item_index INTEGER,
+            filename TEXT,
+            status TEXT,
+            seq INTEGER,
+            profile TEXT,
+            error TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (job_id, item_index),
+            FOREIGN KEY (job_id) REFERENCES bulk_jobs(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bulk_items_seq ON bulk_items(job_id, seq)")
+
+def _migration_4(cursor):
+    """Link resumes to their stored upload (content hash) for upload reference counts"""
+    cursor.execute("ALTER TABLE resumes ADD COLUMN upload_sha256 TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resumes_upload ON resumes(upload_sha256)")
+
+# Label an answer is aggregated under: the question's skill, else its type
+# (same rule as score_aggregates.topic)
+_TOPIC = "COALESCE(q.skill, COALESCE(q.question_type, 'general') || ' questions')"
+_TYPE = "COALESCE(q.question_type, '')"
+
+# (scope, owner, key) expressions over questions q JOIN interviews i
+AGGREGATE_SCOPES = [
+    ("interview", "q.interview_id", "''"),
+    ("interview_skill", "q.interview_id", _TOPIC),
+    ("user", "i.user_id", "''"),
+    ("user_skill", "i.user_id", _TOPIC),
+    ("user_type", "i.user_id", _TYPE),
+    ("skill", "'*'", _TOPIC),
+    ("type", "'*'", _TYPE),
+]
+# (scope, owner) of the score histograms
+HISTOGRAM_SCOPES = [
+    ("user", "i.user_id"),
+    ("all", "'*'"),
+]
+HISTOGRAM_METRICS = (*score_aggregates.METRICS, "overall")
+
+def _migration_5(cursor):
+    """Per-user interviews and incrementally maintained score aggregates, backfilled"""
+    cursor.execute("ALTER TABLE interviews ADD COLUMN user_id TEXT NOT NULL DEFAULT 'anonymous'")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interviews_user ON interviews(user_id, created_at)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS score_aggregates (
+            scope TEXT,
+            owner TEXT,
+            key TEXT,
+            answers INTEGER,
+            sum_correctness REAL,
+            sum_depth REAL,
+            sum_clarity REAL,
+            updated_at TEXT,
+            PRIMARY KEY (scope, owner, key)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS score_histograms (
+            scope TEXT,
+            owner TEXT,
+            metric TEXT,
+            bucket INTEGER,
+            count INTEGER,
+            PRIMARY KEY (scope, owner, metric, bucket)
+        )
+    """)
+
+    answers = """
+        FROM answers a
+        JOIN questions q ON q.id = a.question_id
+        JOIN interviews i ON i.id = q.interview_id
+    """
+    for scope, owner, key in AGGREGATE_SCOPES:
+        cursor.execute(f"""
+            INSERT INTO score_aggregates
+                (scope, owner, key, answers, sum_correctness, sum_depth, sum_clarity, updated_at)
+            SELECT '{scope}', {owner}, {key}, COUNT(*), SUM(COALESCE(a.correctness, 0)),
+                   SUM(COALESCE(a.depth, 0)), SUM(COALESCE(a.clarity, 0)), MAX(a.created_at)
+            {answers}
+            GROUP BY 2, 3
+        """)
+    values = {metric: f"COALESCE(a.{metric}, 0)" for metric in score_aggregates.METRICS}
+    values["overall"] = f"({' + '.join(values.values())}) / 3.0"
+    for scope, owner in HISTOGRAM_SCOPES:
+        for metric, value in values.items():
+            bucket = f"MIN(MAX(CAST({value} AS INTEGER) / 10, 0), {score_aggregates.HISTOGRAM_BUCKETS - 1})"
+            cursor.execute(f"""
+                INSERT INTO score_histograms (scope, owner, metric, bucket, count)
+                SELECT '{scope}', {owner}, '{metric}', {bucket}, COUNT(*)
+                {answers}
+                GROUP BY 2, 4
+            """)
+
+MIGRATIONS = [
+    (1, _migration_1),
+    (2, _migration_2),
+    (3, _migration_3),
+    (4, _migration_4),
+    (5, _migration_5),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def init_db():
+    """Initialize SQLite database and apply pending schema migrations"""
+    conn = get_db()
+    # WAL: readers don't block the writer thread and commits append instead of rewriting pages
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    # Explicit transactions so each migration (DDL included) applies atomically;
+    # BEGIN IMMEDIATE serializes workers that start at the same time
+    conn.isolation_level = None
+    for target, migrate in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < target:
+                migrate(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
     conn.close()
+    assert version == SCHEMA_VERSION, f"schema version {version}, expected {SCHEMA_VERSION}"
+
+class _WriteBehind:
+    """Background writer: queue of (sql, params), applied with executemany per batch"""
+
+    _STOP = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, sql, params):
+        if self._thread is None:
+            self.start()
+        self._queue.put((sql, params))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """
+        Block until every write queued before this call is committed. Waits on
+        a marker rather than queue.join(), so writes that keep arriving after
+        the call cannot hold the reader up.
+        """
+        if self._thread is None:
+            return
+        marker = threading.Event()
+        self._queue.put(marker)
+        marker.wait()
+
+    def stop(self):
+        """Flush and stop the writer thread (app shutdown)"""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+        # Release readers that queued a marker behind the stop
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _run(self):
+        conn = get_db()
+        # Commit durability is relaxed; rows may be lost only on an OS crash
+        conn.execute("PRAGMA synchronous=NORMAL")
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            try:
+                # A flush marker ends the batch: its reader is waiting on it
+                while (len(batch) < WRITE_BATCH_SIZE and batch[-1] is not self._STOP
+                       and not isinstance(batch[-1], threading.Event)):
+                    batch.append(self._queue.get(timeout=WRITE_FLUSH_INTERVAL))
+            except queue.Empty:
+                pass
+
+            stopping = batch[-1] is self._STOP
+            markers = [item for item in batch if isinstance(item, threading.Event)]
+            writes = [item for item in batch if isinstance(item, tuple)]
+            if writes:
+                with span("db.write_batch"):
+                    self._apply(conn, writes)
+            for marker in markers:
+                marker.set()
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    def _apply(self, conn, writes):
+        # Group consecutive writes of the same statement so insert order is kept
+        groups = []
+        for sql, params in writes:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+
+        try:
+            with conn:
+                for sql, rows in groups:
+                    conn.executemany(sql, rows)
+        except sqlite3.Error as e:
+            # Isolate the bad row(s) instead of dropping the whole batch
+            print(f"[DB] Batch write failed ({e}), retrying row by row")
+            for sql, params in writes:
+                try:
+                    with conn:
+                        conn.execute(sql, params)
+                except sqlite3.Error as row_error:
+                    print(f"[DB] Dropped write: {row_error}")
+
+
+_writer = _WriteBehind()
+
+
+def flush():
+    """Wait until all pending writes are on disk"""
+    _writer.flush()
+
+
+def stop_writer():
+    _writer.stop()
+
+
+def writer_stats():
+    """Queued writes not yet committed (exported on /metrics)"""
+    return {"pending_writes": _writer._queue.unfinished_tasks}
+
+
+atexit.register(stop_writer)
+
+def save_resume(profile_json, upload_sha256=None):
+    """Save resume profile, optionally linked to its stored upload"""
+    resume_id = str(uuid.uuid4())
+    _writer.submit(
+        "INSERT INTO resumes (id, profile, upload_sha256, created_at) VALUES (?, ?, ?, ?)",
+        (resume_id, json.dumps(profile_json), upload_sha256, datetime.now().isoformat())
+    )
     return resume_id
 
-def create_interview(resume_id):
+def create_interview(resume_id, user_id="anonymous"):
     """Create new interview session"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
     interview_id = str(uuid.uuid4())
-    cursor.execute(
-        "INSERT INTO interviews (id, resume_id, created_at) VALUES (?, ?, ?)",
-        (interview_id, resume_id, datetime.now().isoformat())
+    _writer.submit(
+        "INSERT INTO interviews (id, resume_id, user_id, created_at) VALUES (?, ?, ?, ?)",
+        (interview_id, resume_id, user_id, datetime.now().isoformat())
     )
-    
-    conn.commit()
-    conn.close()
     return interview_id
 
-def save_question(interview_id, question_text):
+def save_question(interview_id, question_text, question_type=None, skill=None):
     """Save interview question"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
     question_id = str(uuid.uuid4())
-    cursor.execute(
-        "INSERT INTO questions (id, interview_id, question, created_at) VALUES (?, ?, ?, ?)",
-        (question_id, interview_id, question_text, datetime.now().isoformat())
+    _writer.submit(
+        "INSERT INTO questions (id, interview_id, question, question_type, skill, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (question_id, interview_id, question_text, question_type, skill, datetime.now().isoformat())
     )
-    
-    conn.commit()
-    conn.close()
     return question_id
 
+def save_questions(interview_id, questions):
+    """Save all question dicts of an interview; they land in one batch"""
+    return [
+        save_question(interview_id, q["question"], q.get("type"), q.get("skill"))
+        for q in questions
+    ]
+
 def save_answer(question_id, student_answer, score):
     """Save student answer with scores"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
     answer_id = str(uuid.uuid4())
-    cursor.execute(
+    _writer.submit(
         """INSERT INTO answers 
            (id, question_id, student_answer, correctness, depth, clarity, feedback, created_at) 
            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
@@ -130,8 +408,311 @@ def save_answer(question_id, student_answer, score):
             datetime.now().isoformat()
         )
     )
-    
-    conn.commit()
-    conn.close()
+    _update_aggregates(question_id, score)
     return answer_id
 
+_QUESTION_CONTEXT = "FROM questions q JOIN interviews i ON i.id = q.interview_id WHERE q.id = ?"
+
+_AGGREGATE_UPSERTS = [
+    f"""INSERT INTO score_aggregates
+           (scope, owner, key, answers, sum_correctness, sum_depth, sum_clarity, updated_at)
+        SELECT '{scope}', {owner}, {key}, 1, ?, ?, ?, ? {_QUESTION_CONTEXT}
+        ON CONFLICT(scope, owner, key) DO UPDATE SET
+            answers = answers + 1,
+            sum_correctness = sum_correctness + excluded.sum_correctness,
+            sum_depth = sum_depth + excluded.sum_depth,
+            sum_clarity = sum_clarity + excluded.sum_clarity,
+            updated_at = excluded.updated_at"""
+    for scope, owner, key in AGGREGATE_SCOPES
+]
+
+_HISTOGRAM_UPSERTS = [
+    f"""INSERT INTO score_histograms (scope, owner, metric, bucket, count)
+        SELECT '{scope}', {owner}, ?, ?, 1 {_QUESTION_CONTEXT}
+        ON CONFLICT(scope, owner, metric, bucket) DO UPDATE SET count = count + 1"""
+    for scope, owner in HISTOGRAM_SCOPES
+]
+
+def _update_aggregates(question_id, score):
+    """
+    Fold one answer into every aggregate and histogram it belongs to.
+    Queued behind the question/interview rows, so the lookups always resolve.
+    """
+    sums = tuple(score.get(metric, 0) or 0 for metric in score_aggregates.METRICS)
+    now = datetime.now().isoformat()
+    for sql in _AGGREGATE_UPSERTS:
+        _writer.submit(sql, (*sums, now, question_id))
+
+    values = dict(zip(score_aggregates.METRICS, sums), overall=score_aggregates.overall(score))
+    for sql in _HISTOGRAM_UPSERTS:
+        for metric in HISTOGRAM_METRICS:
+            _writer.submit(sql, (metric, score_aggregates.bucket(values[metric]), question_id))
+
+# -------- Read APIs (flush first so pending writes are visible) -------- #
+
+@timed("db.read")
+def get_interview_history(limit=20, before=None, resume_id=None):
+    """
+    Most recent interviews with answer counts and mean scores.
+    Keyset-paginated: pass the last created_at as `before` for the next page.
+    """
+    flush()
+    conn = get_db()
+    clauses, params = [], []
+    if before:
+        clauses.append("i.created_at < ?")
+        params.append(before)
+    if resume_id:
+        clauses.append("i.resume_id = ?")
+        params.append(resume_id)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    rows = conn.execute(f"""
+        SELECT i.id, i.resume_id, i.created_at,
+               COUNT(a.question_id) AS answered,
+               AVG(a.correctness) AS correctness,
+               AVG(a.depth) AS depth,
+               AVG(a.clarity) AS clarity
+        FROM (SELECT * FROM interviews i {where} ORDER BY i.created_at DESC LIMIT ?) i
+        LEFT JOIN questions q ON q.interview_id = i.id
+        LEFT JOIN answers a ON a.question_id = q.id
+        GROUP BY i.id
+        ORDER BY i.created_at DESC
+    """, (*params, limit)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+@timed("db.read")
+def get_interview_detail(interview_id):
+    """Questions of one interview with their answers (if any)"""
+    flush()
+    conn = get_db()
+    rows = conn.execute("""
+        SELECT q.id AS question_id, q.question, q.question_type, q.skill,
+               a.student_answer, a.correctness, a.depth, a.clarity, a.feedback
+        FROM questions q
+        LEFT JOIN answers a ON a.question_id = q.id
+        WHERE q.interview_id = ?
+        ORDER BY q.created_at
+    """, (interview_id,)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+@timed("db.read")
+def get_upload_refcounts():
+    """upload sha256 -> number of resumes referencing it"""
+    flush()
+    conn = get_db()
+    rows = conn.execute("""
+        SELECT upload_sha256, COUNT(*) FROM resumes
+        WHERE upload_sha256 IS NOT NULL
+        GROUP BY upload_sha256
+    """).fetchall()
+    conn.close()
+    return {digest: count for digest, count in rows}
+
+def _row_totals(row):
+    return {
+        "answers": row["answers"], "correctness": row["sum_correctness"],
+        "depth": row["sum_depth"], "clarity": row["sum_clarity"]
+    }
+
+def _aggregate_totals(conn, scope, owner):
+    """{key: running totals} for one aggregate scope/owner (a primary-key range lookup)"""
+    rows = conn.execute("""
+        SELECT key, answers, sum_correctness, sum_depth, sum_clarity
+        FROM score_aggregates WHERE scope = ? AND owner = ?
+    """, (scope, owner)).fetchall()
+    return {row["key"]: _row_totals(row) for row in rows}
+
+def _means_by_key(totals):
+    return {key: score_aggregates.means(t) for key, t in totals.items()}
+
+def _histogram(conn, scope, owner):
+    """{metric: [count per 10-point bucket]}"""
+    histogram = {metric: [0] * score_aggregates.HISTOGRAM_BUCKETS for metric in HISTOGRAM_METRICS}
+    for metric, bucket, count in conn.execute(
+        "SELECT metric, bucket, count FROM score_histograms WHERE scope = ? AND owner = ?", (scope, owner)
+    ):
+        histogram[metric][bucket] = count
+    return histogram
+
+@timed("db.read")
+def get_interview_report(interview_id):
+    """Mean scores of one interview overall and per topic, or None before any answer"""
+    flush()
+    conn = get_db()
+    overall = _aggregate_totals(conn, "interview", interview_id).get("")
+    topics = _aggregate_totals(conn, "interview_skill", interview_id)
+    conn.close()
+    if overall is None:
+        return None
+    strengths, weak_areas = score_aggregates.strengths_and_weaknesses(topics)
+    return {
+        **score_aggregates.means(overall),
+        "topics": _means_by_key(topics),
+        "strengths": strengths,
+        "weak_areas": weak_areas,
+    }
+
+@timed("db.read")
+def get_user_dashboard(user_id, trend_limit=20):
+    """
+    Per-user totals, per-topic and per-question-type means, score histograms
+    and the most recent interviews' means (oldest first), or None for an
+    unknown user. Every part is a keyed lookup on the aggregate tables.
+    """
+    flush()
+    conn = get_db()
+    overall = _aggregate_totals(conn, "user", user_id).get("")
+    if overall is None:
+        conn.close()
+        return None
+    topics = _aggregate_totals(conn, "user_skill", user_id)
+    types = _aggregate_totals(conn, "user_type", user_id)
+    histogram = _histogram(conn, "user", user_id)
+    trend = conn.execute("""
+        SELECT i.id AS interview_id, i.created_at, s.answers, s.sum_correctness, s.sum_depth, s.sum_clarity
+        FROM interviews i
+        JOIN score_aggregates s ON s.scope = 'interview' AND s.owner = i.id AND s.key = ''
+        WHERE i.user_id = ?
+        ORDER BY i.created_at DESC
+        LIMIT ?
+    """, (user_id, trend_limit)).fetchall()
+    conn.close()
+
+    strengths, weak_areas = score_aggregates.strengths_and_weaknesses(topics)
+    return {
+        "user_id": user_id,
+        **score_aggregates.means(overall),
+        "topics": _means_by_key(topics),
+        "question_types": _means_by_key(types),
+        "strengths": strengths,
+        "weak_areas": weak_areas,
+        "histogram": histogram,
+        "trend": [
+            {
+                "interview_id": row["interview_id"],
+                "created_at": row["created_at"],
+                **score_aggregates.means(_row_totals(row))
+            }
+            for row in reversed(trend)
+        ],
+    }
+
+@timed("db.read")
+def get_score_histogram():
+    """
+    Score histograms over every answer. Dashboards and scrapers poll this, so
+    it reads without flush(): writes still in the queue show up a batch later.
+    """
+    conn = get_db()
+    histogram = _histogram(conn, "all", "*")
+    conn.close()
+    return histogram
+
+@timed("db.read")
+def get_skill_score_aggregates(resume_id=None):
+    """Answer count and mean scores per question skill, optionally for one resume"""
+    if not resume_id:
+        # All resumes: read the maintained per-topic aggregates instead of scanning
+        # answers; like the histogram, no flush() for a polled fleet-wide view
+        conn = get_db()
+        topics = _means_by_key(_aggregate_totals(conn, "skill", "*"))
+        conn.close()
+        return [
+            {"skill": name, **{k: v for k, v in means.items() if k != "overall"}}
+            for name, means in topics.items()
+        ]
+
+    flush()
+    conn = get_db()
+    rows = conn.execute("""
+        SELECT q.skill, COUNT(*) AS answers,
+               AVG(a.correctness) AS correctness, AVG(a.depth) AS depth, AVG(a.clarity) AS clarity
+        FROM interviews i
+        JOIN questions q ON q.interview_id = i.id
+        JOIN answers a ON a.question_id = q.id
+        WHERE i.resume_id = ?
+        GROUP BY q.skill
+    """, (resume_id,)).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+# -------- Bulk ingestion jobs -------- #
+
+def create_bulk_job(job_id, filenames):
+    """Record a bulk job and one pending item per file"""
+    now = datetime.now().isoformat()
+    _writer.submit(
+        "INSERT INTO bulk_jobs (id, total, status, created_at) VALUES (?, ?, ?, ?)",
+        (job_id, len(filenames), "running", now)
+    )
+    for index, filename in enumerate(filenames):
+        _writer.submit(
+            "INSERT INTO bulk_items (job_id, item_index, filename, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, index, filename, "pending", now)
+        )
+
+def save_bulk_item(job_id, index, status, seq, profile=None, error=None):
+    """Store the outcome ("done" / "error") of one file; seq is its completion order"""
+    _writer.submit(
+        "UPDATE bulk_items SET status = ?, seq = ?, profile = ?, error = ?, updated_at = ? WHERE job_id = ? AND item_index = ?",
+        (
+            status, seq, json.dumps(profile) if profile is not None else None, error,
+            datetime.now().isoformat(), job_id, index
+        )
+    )
+
+def set_bulk_job_status(job_id, status):
+    finished_at = datetime.now().isoformat() if status != "running" else None
+    _writer.submit(
+        "UPDATE bulk_jobs SET status = ?, finished_at = ? WHERE id = ?",
+        (status, finished_at, job_id)
+    )
+
+@timed("db.read")
+def get_bulk_job(job_id):
+    """Job row plus per-status item counts and the last completion seq, or None"""
+    flush()
+    conn = get_db()
+    job = conn.execute("SELECT * FROM bulk_jobs WHERE id = ?", (job_id,)).fetchone()
+    if job is None:
+        conn.close()
+        return None
+    counts = conn.execute(
+        "SELECT status, COUNT(*) FROM bulk_items WHERE job_id = ? GROUP BY status", (job_id,)
+    ).fetchall()
+    last_seq = conn.execute(
+        "SELECT COALESCE(MAX(seq), 0) FROM bulk_items WHERE job_id = ?", (job_id,)
+    ).fetchone()[0]
+    conn.close()
+    return {**dict(job), "counts": {status: count for status, count in counts}, "last_seq": last_seq}
+
+@timed("db.read")
+def get_bulk_items(job_id, after=None, statuses=None):
+    """
+    Items of a bulk job. after=N returns finished items with seq > N in
+    completion order; statuses filters by status (e.g. ["pending"]).
+    """
+    flush()
+    conn = get_db()
+    clauses, params = ["job_id = ?"], [job_id]
+    if after is not None:
+        clauses.append("seq > ?")
+        params.append(after)
+    if statuses:
+        clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    order = "seq" if after is not None else "item_index"
+    rows = conn.execute(
+        f"SELECT * FROM bulk_items WHERE {' AND '.join(clauses)} ORDER BY {order}", params
+    ).fetchall()
+    conn.close()
+    items = []
+    for row in rows:
+        item = dict(row)
+        item["profile"] = json.loads(item["profile"]) if item["profile"] else None
+        items.append(item)
+    return items
@@ -1,25 +1,56 @@
-import json
-import re
 from llm import generate_json, generate_text
+from structured import parse_structured, Evaluation, GradingContext
+from prescorer import prescore
 
 SYSTEM_PROMPT = """
 You are a strict but fair technical interviewer.
 Return only valid JSON. No markdown.
 """
 
-def generate_expected_answer(question):
-    return generate_text(
+async def generate_expected_answer(question, priority="background"):
+    # Low temperature: the answer for a question text is reused from the LLM response cache
+    return await generate_text(
         "You are an expert software engineer.",
-        f"Provide a high-quality ideal answer for this interview question:\n{question}"
+        f"Provide a high-quality ideal answer for this interview question:\n{question}",
+        call="expected_answer",
+        priority=priority,
+        temperature=0.2
     )
 
-def evaluate_answer(question, expected_answer, student_answer):
+async def generate_grading_context(question, priority="default"):
+    """Ideal answer + rubric + hints for a question (prefetched while the candidate answers)"""
+    raw = await generate_json(
+        SYSTEM_PROMPT,
+        f"""
+For this interview question, return JSON with:
+ideal_answer (string), rubric (list of key points a strong answer covers), hints (list of strings)
+
+Question:
+{question}
+""",
+        call="grading_context",
+        priority=priority,
+        schema=GradingContext
+    )
+    context = await parse_structured(
+        raw, GradingContext,
+        reask=lambda prompt: generate_json(SYSTEM_PROMPT, prompt, call="grading_context_reask", priority=priority)
+    )
+    return context.model_dump()
+
+async def evaluate_answer(question, expected_answer, student_answer):
+    """expected_answer may be None when it could not be generated"""
+    # Trivial answers (empty, "I don't know", copied, off-topic) skip the LLM
+    evaluation = prescore(question, student_answer, expected_answer)
+    if evaluation is not None:
+        return evaluation
+
     USER_PROMPT = f"""
 Question:
 {question}
 
 Ideal Answer:
-{expected_answer}
+{expected_answer or "Not available"}
 
 Student Answer:
 {student_answer}
@@ -28,9 +59,12 @@ Evaluate the student. Return JSON with:
 correctness, depth, clarity, feedback
 """
 
-    raw = generate_json(SYSTEM_PROMPT, USER_PROMPT)
-
-    # 🔥 Remove ```json fences if any
-    clean = re.sub(r"```json|```", "", raw).strip()
+    raw = await generate_json(
+        SYSTEM_PROMPT, USER_PROMPT, call="evaluate_answer", priority="interactive", schema=Evaluation
+    )
 
-    return json.loads(clean)
+    evaluation = await parse_structured(
+        raw, Evaluation,
+        reask=lambda prompt: generate_json(SYSTEM_PROMPT, prompt, call="evaluate_answer_reask", priority="interactive")
+    )
+    return evaluation.model_dump()
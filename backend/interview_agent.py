@@ -1,16 +1,38 @@
 """
 LangGraph-based Interview Agent with State Management
 Shows explicit agent state handling and conditional workflows
+
+The compiled graph and the ChatGroq clients (one per model, see
+model_router) are built once per process and shared by every interview. All per-interview data lives in InterviewState,
+so a single InterviewAgent can serve any number of candidates.
+
+langgraph / langchain_* take most of the server's import time, so they are
+imported on first use rather than at module import.
 """
 from typing import TypedDict, Annotated, List, Literal
-from langgraph.graph import StateGraph, END
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
+from pydantic import ValidationError
+from evaluator import generate_grading_context
+from prescorer import prescore
+import score_aggregates
+from prefetch import prefetcher
+from question_bank import question_bank, profile_signature
+from metrics import span, timed, record_usage, LLM_CALLS
+from llm import get_scheduler, estimate_tokens, call_routed, failed_generation, record_failure, LLMOverloaded
+from model_router import router
+from structured import (
+    parse_structured, loads_lenient, StructuredOutputError, JSON_MODE,
+    Evaluation, EvaluationList, QuestionList
+)
 
 load_dotenv()
 
+# Answers per batched grading call in deferred mode
+BATCH_GRADE_SIZE = int(os.getenv("BATCH_GRADE_SIZE", "10"))
+
 # Define Agent State
 class InterviewState(TypedDict):
     """Explicit state management for interview flow"""
@@ -23,22 +45,131 @@ class InterviewState(TypedDict):
     stage: Literal["parse_resume", "generate_questions", "evaluate_answer", "complete"]
     next_question: dict | None
     evaluation_result: dict | None
+    question_ids: List[str]  # DB ids, parallel to questions
+    grading_mode: Literal["live", "deferred"]
+    totals: dict  # running score sums, overall and per topic (score_aggregates)
+
+
+SCORE_MARKER = "SCORES:"
+
+GRADER_SYSTEM_PROMPT = "You are an expert technical interviewer evaluating answers."
+
+FALLBACK_EVALUATION = {
+    "correctness": 70,
+    "depth": 65,
+    "clarity": 75,
+    "feedback": "Your answer shows understanding but could be more detailed."
+}
+
+
+def _parse_streamed_evaluation(text: str, marker_pos: int) -> dict:
+    """Split streamed output into feedback prose and the trailing score JSON"""
+    evaluation = {k: FALLBACK_EVALUATION[k] for k in ("correctness", "depth", "clarity")}
+    feedback = text
+    if marker_pos != -1:
+        feedback = text[:marker_pos]
+        try:
+            scores, _ = loads_lenient(text[marker_pos + len(SCORE_MARKER):])
+            scores = Evaluation.model_validate({**evaluation, **scores}).model_dump()
+            evaluation.update({k: scores[k] for k in evaluation})
+        except (StructuredOutputError, ValidationError, TypeError):
+            pass
+    evaluation["feedback"] = feedback.strip()
+    return evaluation
+
+
+def _messages(system: str, human: str):
+    """[SystemMessage, HumanMessage] for a chat call"""
+    from langchain_core.messages import HumanMessage, SystemMessage
+    return [SystemMessage(content=system), HumanMessage(content=human)]
+
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+_background_tasks = set()
+
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def _tag_skill(question: dict, profile: dict) -> dict:
+    """Make sure every question carries a skill (first profile skill it mentions)"""
+    if not question.get("skill"):
+        text = question.get("question", "").lower()
+        question["skill"] = next(
+            (skill for skill in profile.get("skills", []) if str(skill).lower() in text),
+            None
+        )
+    return question
+
+
+class AnswerStream:
+    """
+    Events of a streamed answer evaluation: ("token", text)... then
+    ("result", dict). Holds the LLM scheduler slot until iteration ends or
+    close() is called (close() covers a client that never starts reading).
+    """
+
+    def __init__(self, events, release=None):
+        self._events = events
+        self._release = release
+
+    async def __aiter__(self):
+        try:
+            if isinstance(self._events, list):
+                for event in self._events:
+                    yield event
+            else:
+                async for event in self._events:
+                    yield event
+        finally:
+            self.close()
+
+    def close(self):
+        if self._release is not None:
+            self._release()
 
 
 class InterviewAgent:
     """LangGraph-controlled interview reasoning pipeline"""
-    
-    def __init__(self, profile: dict):
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
-        self.profile = profile
-        self.graph = self._build_graph()
-        
-    def _build_graph(self) -> StateGraph:
+
+    # Process-wide singletons: the graph topology and LLM clients never change
+    _shared_llms = {}  # (model, json_mode) -> ChatGroq
+    _compiled_graph = None
+
+    def _llm(self, model: str, json_mode: bool = False):
+        """ChatGroq client for a model; json_mode binds Groq JSON mode (calls parsed with structured.py)"""
+        key = (model, json_mode)
+        if key not in InterviewAgent._shared_llms:
+            if json_mode:
+                client = self._llm(model).bind(response_format=JSON_MODE)
+            else:
+                from langchain_groq import ChatGroq
+                client = ChatGroq(
+                    model=model,
+                    temperature=0.7,
+                    api_key=os.getenv("GROQ_API_KEY"),
+                    # Retries, backoff and rate limits are handled by the LLM scheduler
+                    max_retries=0
+                )
+            InterviewAgent._shared_llms[key] = client
+        return InterviewAgent._shared_llms[key]
+
+    @property
+    def graph(self):
+        # Nodes only touch the state passed in, so the graph compiled from the
+        # first instance is valid for every instance
+        if InterviewAgent._compiled_graph is None:
+            InterviewAgent._compiled_graph = self._build_graph()
+        return InterviewAgent._compiled_graph
+
+    def _build_graph(self):
         """Build the state graph with conditional routing"""
+        from langgraph.graph import StateGraph, END
+
         workflow = StateGraph(InterviewState)
         
         # Add nodes (agent steps)
@@ -67,66 +198,136 @@ class InterviewAgent:
         )
         
         return workflow.compile()
-    
-    def _generate_questions_node(self, state: InterviewState) -> InterviewState:
+
+    async def _ainvoke(self, call: str, messages, priority: str = "default", json_mode: bool = False):
+        """ChatGroq call on the routed model, with a span, call counter and token usage"""
+        with span(f"llm.{call}"):
+            try:
+                response = await call_routed(
+                    call, lambda model: self._llm(model, json_mode).ainvoke(messages),
+                    priority, estimate_tokens(messages),
+                    usage=lambda r: (r.usage_metadata or {}).get("total_tokens")
+                )
+            except Exception as e:
+                rejected = failed_generation(e) if json_mode else None
+                if rejected is None:
+                    LLM_CALLS.inc(call=call, status="overloaded" if isinstance(e, LLMOverloaded) else "error")
+                    raise
+                # Groq rejected invalid JSON: callers repair or re-ask it via parse_structured
+                from langchain_core.messages import AIMessage
+                LLM_CALLS.inc(call=call, status="json_invalid")
+                return AIMessage(content=rejected)
+        LLM_CALLS.inc(call=call, status="ok")
+        record_usage(call, response.usage_metadata)
+        return response
+
+    def _reasker(self, call: str, priority: str = "default"):
+        """reask() callback for parse_structured: a short JSON-mode correction call"""
+        async def reask(prompt):
+            response = await self._ainvoke(
+                call, _messages("You correct JSON output. Return only JSON.", prompt),
+                priority=priority, json_mode=True
+            )
+            return response.content
+        return reask
+
+    @timed("node.generate_questions")
+    async def _generate_questions_node(self, state: InterviewState) -> InterviewState:
         """Node: Generate interview questions based on resume"""
         print(f"[Agent] Generating questions for profile: {state['profile'].get('name', 'Unknown')}")
-        
-        prompt = f"""You are a technical interviewer. Based on this resume profile, generate 5 technical interview questions.
-Mix conceptual (theory) and coding questions appropriate to the candidate's experience level.
 
-Resume Profile:
-- Name: {state['profile'].get('name', 'N/A')}
-- Skills: {', '.join(state['profile'].get('skills', []))}
-- Experience: {state['profile'].get('experience', 'N/A')} years
-
-Generate exactly 5 questions in this JSON format:
-[
-    {{"question": "...", "type": "conceptual", "hint": "..."}},
-    {{"question": "...", "type": "coding", "hint": "..."}}
-]"""
-        
-        response = self.llm.invoke([
-            SystemMessage(content="You are an expert technical interviewer."),
-            HumanMessage(content=prompt)
-        ])
-        
-        # Parse questions from LLM response
-        import json
-        try:
-            questions = json.loads(response.content)
-        except:
-            # Fallback questions
-            questions = [
-                {"question": "Explain the difference between REST and GraphQL", "type": "conceptual", "hint": "Think about data fetching"},
-                {"question": "Write a function to reverse a linked list", "type": "coding", "hint": "Consider iterative or recursive approaches"},
-                {"question": "What is the purpose of dependency injection?", "type": "conceptual", "hint": "Focus on loose coupling"},
-                {"question": "Implement a binary search algorithm", "type": "coding", "hint": "Time complexity should be O(log n)"},
-                {"question": "Explain the CAP theorem in distributed systems", "type": "conceptual", "hint": "Think about trade-offs"}
-            ]
+        # Common skill sets are served from the question bank without an LLM call
+        signature = profile_signature(state['profile'])
+        questions = await asyncio.to_thread(question_bank.sample, signature)
+        if questions is not None:
+            print(f"[Agent] Question bank hit for {signature}")
+            if question_bank.should_refresh():
+                _spawn(self._refresh_question_bank(state['profile'], signature))
+        else:
+            questions = await self._llm_generate_questions(state['profile'])
+            if questions is not None:
+                await asyncio.to_thread(question_bank.add, signature, questions)
+            else:
+                # Fallback questions
+                questions = [
+                    {"question": "Explain the difference between REST and GraphQL", "type": "conceptual", "hint": "Think about data fetching"},
+                    {"question": "Write a function to reverse a linked list", "type": "coding", "hint": "Consider iterative or recursive approaches"},
+                    {"question": "What is the purpose of dependency injection?", "type": "conceptual", "hint": "Focus on loose coupling"},
+                    {"question": "Implement a binary search algorithm", "type": "coding", "hint": "Time complexity should be O(log n)"},
+                    {"question": "Explain the CAP theorem in distributed systems", "type": "conceptual", "hint": "Think about trade-offs"}
+                ]
         
-        state['questions'] = questions
+        state['questions'] = [_tag_skill(q, state['profile']) for q in questions]
         state['current_question_idx'] = 0
         state['answers'] = []
         state['scores'] = []
         state['stage'] = "generate_questions"
         
         return state
+
+    async def _llm_generate_questions(self, profile: dict, priority: str = "default"):
+        """One LLM generation; None if the response isn't a JSON question list"""
+        prompt = f"""You are a technical interviewer. Based on this resume profile, generate 5 technical interview questions.
+Mix conceptual (theory) and coding questions appropriate to the candidate's experience level.
+
+Resume Profile:
+- Name: {profile.get('name', 'N/A')}
+- Skills: {', '.join(profile.get('skills', []))}
+- Experience: {profile.get('experience', 'N/A')} years
+
+Generate exactly 5 questions in this JSON format, where "skill" is the resume skill the question tests:
+{{
+    "questions": [
+        {{"question": "...", "type": "conceptual", "hint": "...", "skill": "..."}},
+        {{"question": "...", "type": "coding", "hint": "...", "skill": "..."}}
+    ]
+}}"""
+        
+        response = await self._ainvoke(
+            "generate_questions", _messages("You are an expert technical interviewer.", prompt),
+            priority=priority, json_mode=True
+        )
+        
+        # Validate (repairing or re-asking only for invalid questions)
+        try:
+            parsed = await parse_structured(
+                response.content, QuestionList, reask=self._reasker("generate_questions_reask", priority)
+            )
+        except StructuredOutputError as e:
+            print(f"[Agent] Unusable question list: {e}")
+            return None
+        return [q.model_dump(exclude_none=True) for q in parsed.questions]
+
+    async def _refresh_question_bank(self, profile: dict, signature: str):
+        """Background rotation: add a fresh generation to the bank"""
+        try:
+            questions = await self._llm_generate_questions(profile, priority="background")
+        except Exception as e:
+            print(f"[Agent] Question bank refresh failed: {e}")
+            return
+        await asyncio.to_thread(question_bank.add, signature, questions)
     
-    def _evaluate_answer_node(self, state: InterviewState) -> InterviewState:
+    @timed("node.evaluate_answer")
+    async def _evaluate_answer_node(self, state: InterviewState) -> InterviewState:
         """Node: Evaluate the submitted answer"""
         question_idx = state['current_question_idx']
         question = state['questions'][question_idx]
         answer = state['answers'][-1]  # Last submitted answer
         
         print(f"[Agent] Evaluating answer for question {question_idx + 1}/{len(state['questions'])}")
+
+        # Empty / "I don't know" / copied / off-topic answers are scored locally
+        context = await self._peek_grading_context(state)
+        evaluation = prescore(question['question'], answer, context.get("ideal_answer"))
+        if evaluation is not None:
+            return self._record_evaluation(state, evaluation)
         
         prompt = f"""Evaluate this technical interview answer:
 
 Question: {question['question']}
 Type: {question['type']}
 Answer: {answer}
-
+{self._grading_context_block(context)}
 Provide scores (0-100) for:
 1. Correctness: How accurate is the answer?
 2. Depth: How thorough and detailed?
@@ -142,31 +343,66 @@ Return JSON format:
     "feedback": "Your detailed feedback here..."
 }}"""
         
-        response = self.llm.invoke([
-            SystemMessage(content="You are an expert technical interviewer evaluating answers."),
-            HumanMessage(content=prompt)
-        ])
+        response = await self._ainvoke(
+            "evaluate_answer", _messages(GRADER_SYSTEM_PROMPT, prompt), priority="interactive", json_mode=True
+        )
         
-        import json
         try:
-            evaluation = json.loads(response.content)
-        except:
-            evaluation = {
-                "correctness": 70,
-                "depth": 65,
-                "clarity": 75,
-                "feedback": "Your answer shows understanding but could be more detailed."
-            }
+            evaluation = (await parse_structured(
+                response.content, Evaluation, reask=self._reasker("evaluate_answer_reask", "interactive")
+            )).model_dump()
+        except StructuredOutputError as e:
+            print(f"[Agent] Unusable evaluation, using fallback scores: {e}")
+            evaluation = dict(FALLBACK_EVALUATION)
         
+        return self._record_evaluation(state, evaluation)
+
+    def _prefetch_grading_context(self, state: InterviewState):
+        """Start building grading context for the question the candidate is now answering"""
+        # Deferred interviews are graded in one batch at the end; nothing to prefetch
+        if state['next_question'] is None or state.get('grading_mode') == "deferred":
+            return
+        question = state['next_question']['question']
+        prefetcher.schedule(
+            (state['interview_id'], state['current_question_idx']),
+            lambda: generate_grading_context(question, priority="background")
+        )
+
+    async def _peek_grading_context(self, state: InterviewState) -> dict:
+        """
+        Prefetched grading context for the current question, empty on a prefetch
+        miss. It stays claimable until _record_evaluation, so a grading call
+        that fails (429, timeout) and is retried reuses it.
+        """
+        context = await prefetcher.peek((state['interview_id'], state['current_question_idx']))
+        return context if isinstance(context, dict) else {}
+
+    @staticmethod
+    def _grading_context_block(context: dict) -> str:
+        """Prompt block (reference answer + rubric) from a grading context"""
+        block = ""
+        if context.get("ideal_answer"):
+            block += f"Reference Answer: {context['ideal_answer']}\n"
+        if isinstance(context.get("rubric"), list) and context["rubric"]:
+            block += "Rubric:\n" + "".join(f"- {point}\n" for point in context["rubric"])
+        return block
+
+    def _record_evaluation(self, state: InterviewState, evaluation: dict) -> InterviewState:
+        totals = self._totals(state)
         state['scores'].append(evaluation)
+        score_aggregates.add_answer(totals, state['questions'][state['current_question_idx']], evaluation)
         state['evaluation_result'] = evaluation
         state['stage'] = "evaluate_answer"
+        prefetcher.discard((state['interview_id'], state['current_question_idx']))
         
         return state
     
+    @timed("node.get_next_question")
     def _get_next_question_node(self, state: InterviewState) -> InterviewState:
         """Node: Get the next question to ask"""
-        state['current_question_idx'] += 1
+        # Right after generation the first question is served as-is
+        if state['stage'] != "generate_questions":
+            state['current_question_idx'] += 1
         
         if state['current_question_idx'] < len(state['questions']):
             next_q = state['questions'][state['current_question_idx']]
@@ -185,41 +421,230 @@ Return JSON format:
             return "end"
         return "continue"
     
-    def start_interview(self) -> dict:
-        """Initialize interview session and return first question"""
+    async def start_interview(self, profile: dict, interview_id: str = "",
+                              grading_mode: str = "live") -> InterviewState:
+        """
+        Initialize interview session; returns the state holding the first question.
+        grading_mode="deferred" only records answers and grades them all on completion.
+        """
         initial_state: InterviewState = {
-            "interview_id": "",
-            "profile": self.profile,
+            "interview_id": interview_id,
+            "profile": profile,
             "questions": [],
             "current_question_idx": 0,
             "answers": [],
             "scores": [],
             "stage": "parse_resume",
             "next_question": None,
-            "evaluation_result": None
+            "evaluation_result": None,
+            "question_ids": [],
+            "grading_mode": grading_mode,
+            "totals": score_aggregates.new_interview_totals()
         }
         
         # Run the graph to generate questions
-        result = self.graph.invoke(initial_state)
-        
-        return {
-            "questions": result['questions'],
-            "first_question": result['next_question']
-        }
+        state = await self.graph.ainvoke(initial_state)
+        self._prefetch_grading_context(state)
+        return state
     
-    def submit_answer(self, state: InterviewState, answer: str) -> dict:
+    async def submit_answer(self, state: InterviewState, answer: str) -> dict:
         """Submit answer and get evaluation + next question"""
         # Add answer to state
         state['answers'].append(answer)
         
         # Update stage to trigger evaluation
         state['stage'] = "evaluate_answer"
+
+        # Deferred mode: record only, grade everything once the last answer is in
+        if state.get('grading_mode') == "deferred":
+            state['evaluation_result'] = None
+            if state['current_question_idx'] + 1 < len(state['questions']):
+                return self._advance(state)
+
+            # Grade before advancing: if the batch fails (e.g. LLMOverloaded) the
+            # last question stays open and the client can resubmit it
+            try:
+                await self.grade_batch(state)
+            except Exception:
+                state['answers'].pop()
+                raise
+            result = self._advance(state)
+            result["evaluation"] = state['evaluation_result']
+            result["final_scores"] = state['scores']
+            return result
         
         # Run evaluation node
-        state = self._evaluate_answer_node(state)
+        state = await self._evaluate_answer_node(state)
         
+        return self._advance(state)
+
+    async def grade_batch(self, state: InterviewState) -> InterviewState:
+        """
+        Deferred mode: score every question/answer pair with one LLM call per
+        BATCH_GRADE_SIZE answers instead of one call per answer.
+        """
+        pairs = list(zip(state['questions'], state['answers']))
+        # Trivial answers are scored locally; only the rest go to the LLM
+        scores = [prescore(question['question'], answer) for question, answer in pairs]
+        pending = [(idx, pair) for idx, pair in enumerate(pairs) if scores[idx] is None]
+        chunks = [
+            pending[start:start + BATCH_GRADE_SIZE]
+            for start in range(0, len(pending), BATCH_GRADE_SIZE)
+        ]
+        print(f"[Agent] Batch grading {len(pending)}/{len(pairs)} answers in {len(chunks)} call(s)")
+
+        graded = await asyncio.gather(*[self._grade_chunk(chunk) for chunk in chunks])
+        for chunk, evaluations in zip(chunks, graded):
+            for (idx, _), evaluation in zip(chunk, evaluations):
+                scores[idx] = evaluation
+        state['scores'] = scores
+        state['totals'] = score_aggregates.new_interview_totals()
+        for question, score in zip(state['questions'], scores):
+            score_aggregates.add_answer(state['totals'], question, score)
+        state['evaluation_result'] = state['scores'][-1] if state['scores'] else None
+        return state
+
+    async def _grade_chunk(self, chunk) -> List[dict]:
+        items = "\n".join(
+            f"""[{idx}]
+Question: {question['question']}
+Type: {question['type']}
+Answer: {answer}
+"""
+            for idx, (question, answer) in chunk
+        )
+        prompt = f"""Evaluate each of these technical interview answers:
+
+{items}
+For every answer provide scores (0-100) for correctness, depth and clarity, plus constructive feedback.
+
+Return a JSON object with one evaluation per answer, in the same order:
+{{
+    "evaluations": [
+        {{"index": 0, "correctness": 85, "depth": 75, "clarity": 90, "feedback": "..."}}
+    ]
+}}"""
+
+        response = await self._ainvoke(
+            "grade_batch", _messages(GRADER_SYSTEM_PROMPT, prompt), json_mode=True
+        )
+
+        # Invalid items are re-asked on their own; anything still missing gets fallback scores
+        try:
+            parsed = await parse_structured(
+                response.content, EvaluationList, reask=self._reasker("grade_batch_reask")
+            )
+            # Chunk indices can have gaps (prescored answers), so "in order" maps by
+            # position; once an item was dropped, positions no longer line up
+            by_index = {
+                (e.index if e.index is not None else chunk[pos][0]): e.model_dump(exclude={"index"})
+                for pos, e in enumerate(parsed.evaluations)
+                if e.index is not None or (not parsed.dropped and pos < len(chunk))
+            }
+        except StructuredOutputError as e:
+            print(f"[Agent] Unusable batch grading output: {e}")
+            parsed = None
+            by_index = {}
+
+        # Answers the batch reply can't be trusted for are graded one at a time
+        missing = [item for item in chunk if item[0] not in by_index]
+        if parsed is not None and parsed.dropped and len(chunk) > 1 and missing:
+            print(f"[Agent] {parsed.dropped} batch evaluation(s) dropped, grading {len(missing)} answer(s) singly")
+            graded = await asyncio.gather(*[self._grade_chunk([item]) for item in missing])
+            for (idx, _), [evaluation] in zip(missing, graded):
+                by_index[idx] = evaluation
+
+        return [{**FALLBACK_EVALUATION, **by_index.get(idx, {})} for idx, _ in chunk]
+
+    async def stream_answer(self, state: InterviewState, answer: str) -> "AnswerStream":
+        """
+        Streaming variant of submit_answer, in two steps so that anything
+        likely to fail (a full LLM queue, a deferred batch grade) fails before
+        the HTTP response starts: this coroutine prescores the answer and
+        takes the scheduler slot, then returns an AnswerStream yielding
+        ("token", text) while the feedback is generated and one
+        ("result", dict) with the same shape submit_answer returns.
+        """
+        if state.get('grading_mode') == "deferred":
+            return AnswerStream([("result", await self.submit_answer(state, answer))])
+
+        question_idx = state['current_question_idx']
+        question = state['questions'][question_idx]
+        print(f"[Agent] Streaming evaluation for question {question_idx + 1}/{len(state['questions'])}")
+
+        context = await self._peek_grading_context(state)
+        evaluation = prescore(question['question'], answer, context.get("ideal_answer"))
+        if evaluation is not None:
+            state['answers'].append(answer)
+            state['stage'] = "evaluate_answer"
+            state = self._record_evaluation(state, evaluation)
+            return AnswerStream([("token", evaluation["feedback"]), ("result", self._advance(state))])
+
+        prompt = f"""Evaluate this technical interview answer:
+
+Question: {question['question']}
+Type: {question['type']}
+Answer: {answer}
+{self._grading_context_block(context)}
+First write constructive feedback for the candidate as plain prose.
+Then, on the last line, write {SCORE_MARKER} followed by JSON scores (0-100):
+{SCORE_MARKER} {{"correctness": 85, "depth": 75, "clarity": 90}}"""
+
+        messages = _messages(GRADER_SYSTEM_PROMPT, prompt)
+        try:
+            release = await get_scheduler().hold("interactive", estimate_tokens(messages))
+        except LLMOverloaded:
+            LLM_CALLS.inc(call="stream_evaluation", status="overloaded")
+            raise
+        return AnswerStream(self._stream_evaluation(state, answer, messages), release)
+
+    async def _stream_evaluation(self, state: InterviewState, answer: str, messages):
+        """Body of stream_answer once the slot is held; the state only changes after the last token"""
+        text = ""
+        emitted = 0
+        marker_pos = -1
+        usage = {}
+        # No failover once tokens have reached the client: pick the healthiest model up front
+        model = router.candidates("stream_evaluation")[0]
+        started = time.monotonic()
+        with span("llm.stream_evaluation"):
+            try:
+                async for chunk in self._llm(model).astream(messages):
+                    text += chunk.content
+                    for kind, count in (chunk.usage_metadata or {}).items():
+                        if isinstance(count, int):
+                            usage[kind] = usage.get(kind, 0) + count
+                    if marker_pos != -1:
+                        continue
+
+                    marker_pos = text.find(SCORE_MARKER, max(emitted - len(SCORE_MARKER), 0))
+                    # Hold back a tail that could be the start of the marker
+                    safe = marker_pos if marker_pos != -1 else len(text) - len(SCORE_MARKER) + 1
+                    if safe > emitted:
+                        yield "token", text[emitted:safe]
+                        emitted = safe
+            except Exception as e:
+                record_failure(model, e)
+                LLM_CALLS.inc(call="stream_evaluation", status="overloaded" if isinstance(e, LLMOverloaded) else "error")
+                raise
+        router.record(model, time.monotonic() - started)
+        LLM_CALLS.inc(call="stream_evaluation", status="ok")
+        record_usage("stream_evaluation", usage)
+
+        if marker_pos == -1 and emitted < len(text):
+            yield "token", text[emitted:]
+
+        state['answers'].append(answer)
+        state['stage'] = "evaluate_answer"
+        evaluation = _parse_streamed_evaluation(text, marker_pos)
+        state = self._record_evaluation(state, evaluation)
+        yield "result", self._advance(state)
+
+    def _advance(self, state: InterviewState) -> dict:
+        """Move to the next question and build the submit response"""
         # Get next question
         state = self._get_next_question_node(state)
+        self._prefetch_grading_context(state)
         
         # Check if complete
         if state['next_question'] is None:
@@ -235,22 +660,29 @@ Return JSON format:
                 "next_question": state['next_question']
             }
     
+    @staticmethod
+    def _totals(state: InterviewState) -> dict:
+        """Running totals; rebuilt once for sessions saved before they existed"""
+        if not state.get('totals'):
+            state['totals'] = score_aggregates.new_interview_totals()
+            for question, score in zip(state['questions'], state['scores']):
+                score_aggregates.add_answer(state['totals'], question, score)
+        return state['totals']
+
     def get_summary(self, state: InterviewState) -> dict:
-        """Generate interview summary"""
-        scores = state['scores']
-        if not scores:
+        """Interview summary from the running totals (no pass over the scores)"""
+        totals = self._totals(state)
+        overall = score_aggregates.means(totals['all'])
+        if not overall['answers']:
             return {"average_score": 0, "strengths": [], "weak_areas": []}
-        
-        avg_correctness = sum(s['correctness'] for s in scores) / len(scores)
-        avg_depth = sum(s['depth'] for s in scores) / len(scores)
-        avg_clarity = sum(s['clarity'] for s in scores) / len(scores)
-        overall = (avg_correctness + avg_depth + avg_clarity) / 3
-        
+
+        strengths, weak_areas = score_aggregates.strengths_and_weaknesses(totals['topics'])
         return {
-            "average_score": round(overall, 2),
-            "correctness": round(avg_correctness, 2),
-            "depth": round(avg_depth, 2),
-            "clarity": round(avg_clarity, 2),
-            "strengths": ["Strong foundational knowledge"],
-            "weak_areas": ["Could improve depth of explanations"]
+            "average_score": overall['overall'],
+            "correctness": overall['correctness'],
+            "depth": overall['depth'],
+            "clarity": overall['clarity'],
+            "strengths": strengths,
+            "weak_areas": weak_areas,
+            "topics": {name: score_aggregates.means(t) for name, t in totals['topics'].items()}
         }
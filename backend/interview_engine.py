@@ -1,19 +1,74 @@
+import asyncio
+import os
+
 from question_engine import generate_questions
 from evaluator import generate_expected_answer, evaluate_answer
 
 import json
+
+# Max expected-answer LLM calls in flight per interview
+EXPECTED_ANSWER_WORKERS = int(os.getenv("EXPECTED_ANSWER_WORKERS", "5"))
+
+
 class InterviewEngine:
-    def __init__(self, profile_json):
+    def __init__(self, profile_json, max_workers=EXPECTED_ANSWER_WORKERS):
         self.profile = profile_json
-        self.questions = generate_questions(profile_json)
+        self.questions = []
         self.current_index = 0
         self.results = []
 
         self.expected_answers = []
-        self.db_question_ids = []   
+        self.db_question_ids = []
+
+        self._limit = asyncio.Semaphore(max_workers)
+        self._expected_tasks = []
+
+    @classmethod
+    async def create(cls, profile_json, lazy=False, max_workers=EXPECTED_ANSWER_WORKERS):
+        """
+        Build an engine and generate its questions + expected answers.
+        With lazy=True this returns as soon as the questions exist; expected
+        answers keep generating in the background and are awaited on submit.
+        """
+        engine = cls(profile_json, max_workers=max_workers)
+        await engine.start(lazy=lazy)
+        return engine
 
-        for q in self.questions:
-            self.expected_answers.append(generate_expected_answer(q["question"]))
+    async def start(self, lazy=False):
+        self.questions = await generate_questions(self.profile)
+
+        # Fan out one task per question, bounded by the semaphore.
+        # Lazy answers are prefetch work and yield to live evaluations.
+        priority = "background" if lazy else "default"
+        self._expected_tasks = [
+            asyncio.create_task(self._build_expected_answer(q["question"], priority))
+            for q in self.questions
+        ]
+        self.expected_answers = [None] * len(self.questions)
+
+        if not lazy:
+            await asyncio.gather(*self._expected_tasks)
+            self.expected_answers = [t.result() for t in self._expected_tasks]
+
+    async def _build_expected_answer(self, question, priority="background"):
+        """One expected answer; a failure only affects its own question"""
+        async with self._limit:
+            try:
+                return await generate_expected_answer(question, priority=priority)
+            except Exception as e:
+                print(f"[Engine] Expected answer generation failed: {e}")
+                return None
+
+    async def get_expected_answer(self, question_id):
+        """Expected answer for a question, waiting for it if still in flight"""
+        if self.expected_answers[question_id] is None and question_id < len(self._expected_tasks):
+            self.expected_answers[question_id] = await self._expected_tasks[question_id]
+        return self.expected_answers[question_id]
+
+    def close(self):
+        """Cancel any expected-answer work still pending"""
+        for t in self._expected_tasks:
+            t.cancel()
 
 
     def get_next_question(self):
@@ -29,11 +84,12 @@ class InterviewEngine:
             "hint": q.get("hint", None)
         }
 
-    def submit_answer(self, question_id, student_answer):
-        expected = self.expected_answers[question_id]
+    async def submit_answer(self, question_id, student_answer):
+        expected = await self.get_expected_answer(question_id)
         question = self.questions[question_id]["question"]
 
-        score = evaluate_answer(question, expected, student_answer)
+        # Grade against the question alone if its reference answer failed
+        score = await evaluate_answer(question, expected, student_answer)
 
         self.results.append({
             "question": question,
@@ -44,6 +100,9 @@ class InterviewEngine:
 
         self.current_index += 1
 
+        if self.is_complete():
+            self.close()
+
         return score
 
     def is_complete(self):
@@ -0,0 +1,302 @@
+"""
+Background jobs for slow request work (async /start-interview).
+
+A bounded asyncio queue feeds JOB_WORKERS worker tasks, so HTTP handlers
+return 202 straight away and the number of LLM-bound requests in progress
+never depends on how many connections are open. When JOB_MAX_QUEUE jobs
+are waiting, submit() raises JobQueueFull instead of queueing more.
+
+Clients poll GET /jobs/{id} (optionally long-polling with ?wait=) or
+subscribe to /jobs/{id}/events. Finished jobs are kept for JOB_RESULT_TTL.
+
+Jobs run in the worker process that accepted them. With JOB_STORE=sqlite
+(the default when SESSION_STORE=sqlite) every status change is also
+written to a shared table, so a poll that lands on another uvicorn worker
+still finds the job; that worker follows it every JOB_POLL_INTERVAL
+seconds. With JOB_STORE=memory, async mode needs a single worker.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from db import DB_PATH
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "100"))
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "600"))
+JOB_STORE = os.getenv("JOB_STORE", os.getenv("SESSION_STORE", "memory"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+
+TERMINAL = ("done", "failed")
+
+
+class JobQueueFull(Exception):
+    """No room for another job; retry_after is a rough wait in seconds"""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SQLiteJobStore:
+    """Latest snapshot per job in a shared SQLite table; visible to every worker"""
+
+    PURGE_EVERY = 200
+
+    def __init__(self, path=DB_PATH, ttl=JOB_RESULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._puts = 0
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    snapshot TEXT,
+                    expires_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs(expires_at)")
+            self._conn.commit()
+        return self._conn
+
+    def put(self, snapshot: dict):
+        # Every status change pushes the expiry out again, so a row whose owner
+        # died is purged too
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, snapshot, expires_at) VALUES (?, ?, ?)",
+                (snapshot["job_id"], json.dumps(snapshot, separators=(",", ":")), now + self.ttl)
+            )
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+            conn.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT snapshot, expires_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+
+def create_job_store(kind=JOB_STORE):
+    if kind == "sqlite":
+        return SQLiteJobStore()
+    if kind == "memory":
+        return None
+    raise ValueError(f"Unknown JOB_STORE backend: {kind}")
+
+
+class Job:
+    def __init__(self, kind, coro_factory, meta=None, store=None):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.meta = meta or {}
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._factory = coro_factory
+        self._store = store
+        self._changed = asyncio.Condition()
+
+    def snapshot(self) -> dict:
+        body = {"job_id": self.id, "kind": self.kind, "status": self.status, **self.meta}
+        if self.status == "done":
+            body["result"] = self.result
+        elif self.status == "failed":
+            body["error"] = self.error
+        return body
+
+    async def _set(self, status, result=None, error=None):
+        async with self._changed:
+            self.status = status
+            self.result = result
+            self.error = error
+            if status == "running":
+                self.started_at = time.time()
+            elif status in TERMINAL:
+                self.finished_at = time.time()
+            self._changed.notify_all()
+        await self._publish()
+
+    async def _publish(self):
+        if self._store is not None:
+            try:
+                await asyncio.to_thread(self._store.put, self.snapshot())
+            except sqlite3.Error as e:
+                print(f"[Jobs] Could not store {self.id}: {e}")
+
+    async def wait(self, timeout=None):
+        """Wait until the job finishes or `timeout` seconds pass"""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: self.status in TERMINAL), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def watch(self):
+        """Yield a snapshot now and after every status change, ending with the final one"""
+        seen = None
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.status != seen)
+                seen = self.status
+                snapshot = self.snapshot()
+            yield snapshot
+            if seen in TERMINAL:
+                return
+
+
+class StoredJob:
+    """A job owned by another worker, followed by polling the shared store"""
+
+    def __init__(self, store, snapshot):
+        self._store = store
+        self._snapshot = snapshot
+
+    @property
+    def status(self):
+        return self._snapshot["status"]
+
+    def snapshot(self) -> dict:
+        return self._snapshot
+
+    async def _poll(self):
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+        self._snapshot = await asyncio.to_thread(self._store.get, self._snapshot["job_id"]) or self._snapshot
+
+    async def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.status not in TERMINAL and (deadline is None or time.monotonic() < deadline):
+            await self._poll()
+
+    async def watch(self):
+        seen = self.status
+        yield self._snapshot
+        while seen not in TERMINAL:
+            await self._poll()
+            if self.status != seen:
+                seen = self.status
+                yield self._snapshot
+
+
+class JobRunner:
+    """Bounded queue + fixed worker pool"""
+
+    def __init__(self, workers=JOB_WORKERS, max_queue=JOB_MAX_QUEUE, ttl=JOB_RESULT_TTL, store=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.store = store
+        self._queue = None
+        self._tasks = []
+        self._jobs = {}
+        self._durations = []
+        self.counters = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "expired": 0}
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def check_capacity(self):
+        """Raise JobQueueFull now, before the caller does work a rejected job would orphan"""
+        self.start()
+        if self._queue.full():
+            self.counters["rejected"] += 1
+            raise JobQueueFull("Too many queued jobs, retry later", retry_after=self._retry_after())
+
+    async def submit(self, kind, coro_factory, meta=None) -> Job:
+        """Queue coro_factory() for a worker; raises JobQueueFull when the queue is full"""
+        self.check_capacity()
+        self._expire()
+        job = Job(kind, coro_factory, meta, store=self.store)
+        self._queue.put_nowait(job)
+        self._jobs[job.id] = job
+        self.counters["submitted"] += 1
+        # Stored before the 202 goes out, so the first poll finds it on any worker
+        await job._publish()
+        return job
+
+    async def get(self, job_id):
+        """This worker's job, else one another worker stored, else None"""
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            snapshot = await asyncio.to_thread(self.store.get, job_id)
+            if snapshot is not None:
+                job = StoredJob(self.store, snapshot)
+        return job
+
+    async def _worker(self, n):
+        while True:
+            job = await self._queue.get()
+            try:
+                await job._set("running")
+                result = await job._factory()
+            except asyncio.CancelledError:
+                await job._set("failed", error="Server shutting down")
+                raise
+            except Exception as e:
+                print(f"[Jobs] {job.kind} {job.id} failed: {e!r}")
+                self.counters["failed"] += 1
+                await job._set("failed", error=str(e) or type(e).__name__)
+            else:
+                self.counters["done"] += 1
+                await job._set("done", result=result)
+                self._durations = (self._durations + [job.finished_at - job.started_at])[-50:]
+            finally:
+                job._factory = None
+                self._queue.task_done()
+
+    def _retry_after(self):
+        # Time for the workers to drain the current backlog at the recent pace
+        if not self._durations:
+            return 1.0
+        mean = sum(self._durations) / len(self._durations)
+        return max(mean * self._queue.qsize() / max(self.workers, 1), 1.0)
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [k for k, j in self._jobs.items() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+            self.counters["expired"] += 1
+
+    def stats(self) -> dict:
+        running = sum(1 for job in self._jobs.values() if job.status == "running")
+        return {
+            **self.counters,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": running,
+            "retained": len(self._jobs),
+        }
+
+
+job_runner = JobRunner(store=create_job_store())
@@ -1,61 +1,540 @@
 import os
-import requests
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import httpx
 from dotenv import load_dotenv
+from metrics import span, record_usage, LLM_CALLS, LLM_RETRIES
+from response_cache import response_cache, cache_key
+from model_router import router
+from structured import is_valid
 
 load_dotenv(dotenv_path=".env")
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
-MODEL = "llama-3.3-70b-versatile"
+# Override GROQ_API_BASE to point at a local stand-in (see bench/fake_groq.py); ChatGroq reads it too
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com").rstrip("/")
+GROQ_URL = f"{GROQ_API_BASE}/openai/v1/chat/completions"
+# Models are picked per call by model_router (MODEL_LARGE / MODEL_SMALL)
 
+# Connection pool / timeout settings for the shared Groq client
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "50"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "20"))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "32"))
 
+# Account limits enforced client-side (requests / tokens per minute)
+GROQ_RPM = int(os.getenv("GROQ_RPM", "1000"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "300000"))
+# Completion tokens assumed per call until the API reports real usage
+LLM_COMPLETION_ESTIMATE = int(os.getenv("LLM_COMPLETION_ESTIMATE", "400"))
 
-def _call_groq(messages, temperature=0.2):
+# Scheduler queueing / retry policy
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "200"))
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))
+
+# Lower value is served first. Background work may queue longer than interactive work.
+PRIORITIES = {"interactive": 0, "default": 1, "background": 2}
+LANE_MAX_WAIT = {
+    "interactive": LLM_MAX_QUEUE_WAIT,
+    "default": LLM_MAX_QUEUE_WAIT,
+    "background": LLM_MAX_QUEUE_WAIT * 6
+}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_client = None
+_scheduler = None
+
+
+class GroqAPIError(Exception):
+    """Non-200 response from the Groq API"""
+
+    def __init__(self, status_code, message, retry_after=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.body = body
+
+
+class LLMOverloaded(Exception):
+    """The scheduler refused or gave up on a call; retry after `retry_after` seconds"""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def get_client():
+    """
+    Shared keep-alive client. Created lazily so it binds to the running event loop.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {GROQ_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            timeout=httpx.Timeout(GROQ_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=GROQ_MAX_KEEPALIVE
+            )
+        )
+    return _client
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
+
+
+async def close_client():
+    """Close the shared client (call on app shutdown)."""
+    global _client, _scheduler
+    if _client is not None:
+        await _client.aclose()
+    if _scheduler is not None:
+        _scheduler.close()
+    _client = None
+    _scheduler = None
+
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt + completion size (~4 characters per token)"""
+    chars = sum(len(m["content"] if isinstance(m, dict) else m.content) for m in messages)
+    return chars // 4 + LLM_COMPLETION_ESTIMATE
+
+
+def _json_body(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def failed_generation(error):
+    """
+    The model's rejected output when Groq refuses a JSON-mode reply with
+    400 json_validate_failed, else None. Both GroqAPIError and the Groq SDK's
+    errors (ChatGroq) carry the error body.
+    """
+    if getattr(error, "status_code", None) != 400:
+        return None
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        body = body.get("error", body)
+        if isinstance(body, dict) and body.get("code") == "json_validate_failed":
+            return body.get("failed_generation") or ""
+    return None
+
+
+def _retry_after(response) -> float | None:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _classify(error):
+    """(retryable, status label, server-suggested delay) for a failed call"""
+    status = getattr(error, "status_code", None)
+    if status in RETRYABLE_STATUS:
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is None and getattr(error, "response", None) is not None:
+            retry_after = _retry_after(error.response)
+        return True, str(status), retry_after
+    # Connection errors: raw httpx, or wrapped by the Groq SDK
+    if isinstance(error, httpx.TransportError) or isinstance(error.__cause__, httpx.TransportError):
+        return True, "transport", None
+    return False, None, None
+
+
+def record_failure(model, error) -> bool:
+    """
+    Count a failed call against `model` in the router when it says something
+    about the model's health (429, 5xx, connection errors); a 4xx or a reply
+    that fails validation is the prompt's fault, not the model's. Returns
+    whether the error is retryable.
+    """
+    retryable, status, retry_after = _classify(error)
+    if retryable:
+        router.record_error(model, status, retry_after)
+    return retryable
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holds at most one minute's worth"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(missing / self.rate, 0.0)
+
+    def consume(self, amount):
+        """Take units; negative amounts refund. The level may go below zero (debt)."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class LLMScheduler:
+    """
+    Single gate for every Groq call (httpx and ChatGroq).
+
+    Calls wait in a priority heap and are released by one dispatcher task
+    when the request and token buckets, the concurrency limit and any
+    server-imposed pause (Retry-After) allow it. Calls that cannot start
+    within their lane's LANE_MAX_WAIT are refused with LLMOverloaded instead
+    of hanging; rate-limited and transient failures are retried with
+    jittered exponential backoff.
+    """
+
+    def __init__(self, rpm=GROQ_RPM, tpm=GROQ_TPM, max_concurrency=GROQ_MAX_CONCURRENCY,
+                 max_queue=LLM_MAX_QUEUE):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.inflight = 0
+        self.paused_until = 0.0
+        self._heap = []  # (priority, seq, deadline, tokens, future)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher = None
+        self.counters = {
+            "dispatched": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "retries": 0,
+            "rate_limited": 0,
+        }
+
+    # -------- Public API -------- #
+
+    async def run(self, call_fn, priority="default", tokens=LLM_COMPLETION_ESTIMATE, usage=None,
+                  retries=LLM_MAX_RETRIES):
+        """
+        Await call_fn() once a slot is granted, retrying retryable failures.
+        `usage(result)` may return the real token count to settle the estimate.
+        With retries=0 a 429 does not pause other calls: the caller fails over
+        to another model instead of waiting (see call_routed).
+        """
+        seq = next(self._seq)
+        for attempt in range(retries + 1):
+            await self._acquire(priority, tokens, seq)
+            try:
+                result = await call_fn()
+            except Exception as e:
+                retryable, status, retry_after = _classify(e)
+                if not retryable:
+                    raise
+                delay = self._backoff(attempt, retry_after)
+                if status == "429":
+                    self.counters["rate_limited"] += 1
+                    if retries:
+                        # Limits are account-wide: hold every call, not just this one
+                        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                if attempt == retries:
+                    if status == "429":
+                        raise LLMOverloaded("Groq rate limit: retries exhausted", retry_after=delay) from e
+                    raise
+                self.counters["retries"] += 1
+                LLM_RETRIES.inc(status=status)
+                print(f"[LLM] {status} from Groq, retry {attempt + 1}/{retries} in {delay:.2f}s")
+                if status != "429":
+                    await asyncio.sleep(delay)
+                continue
+            finally:
+                self._release()
+
+            actual = usage(result) if usage else None
+            if actual:
+                self.tokens.consume(actual - tokens)
+            return result
+
+    async def hold(self, priority="default", tokens=LLM_COMPLETION_ESTIMATE):
+        """
+        Wait for one slot and keep it (streaming calls; no retry). Returns an
+        idempotent release(), so every path that may end a stream can call it.
+        """
+        await self._acquire(priority, tokens, next(self._seq))
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._release()
+
+        return release
+
+    def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        for *_, future in self._heap:
+            if not future.done():
+                future.set_exception(LLMOverloaded("LLM scheduler shut down"))
+        self._heap = []
+
+    def stats(self) -> dict:
+        queued = {lane: 0 for lane in PRIORITIES}
+        names = {value: lane for lane, value in PRIORITIES.items()}
+        for priority, *_ in self._heap:
+            queued[names[priority]] += 1
+        return {
+            **self.counters,
+            "inflight": self.inflight,
+            "queued": queued,
+            "paused_seconds": round(max(self.paused_until - time.monotonic(), 0.0), 3),
+        }
+
+    # -------- Internals -------- #
+
+    def _backoff(self, attempt, retry_after=None) -> float:
+        if retry_after is not None:
+            # Server said when; jitter so queued callers don't retry in lockstep
+            return retry_after + random.uniform(0, LLM_BACKOFF_BASE)
+        return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+    async def _acquire(self, priority, tokens, seq):
+        lane = priority if priority in PRIORITIES else "default"
+        max_wait = LANE_MAX_WAIT[lane]
+
+        # Admission control: refuse now rather than queue past the lane's budget
+        paused = self.paused_until - time.monotonic()
+        queued_tokens = sum(entry[3] for entry in self._heap)
+        expected_wait = max(paused, self.tokens.wait_time(queued_tokens + tokens))
+        if len(self._heap) >= self.max_queue or expected_wait > max_wait:
+            self.counters["rejected"] += 1
+            raise LLMOverloaded(
+                f"LLM queue full ({len(self._heap)} waiting)",
+                retry_after=max(expected_wait, 1.0)
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        deadline = time.monotonic() + max_wait
+        entry = (PRIORITIES[lane], seq, deadline, tokens, future)
+        heapq.heappush(self._heap, entry)
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as the caller went away: hand the slot back
+                self._release()
+            elif entry in self._heap:
+                # Give up the place now; it would otherwise count against max_queue until the deadline
+                self._heap.remove(entry)
+                heapq.heapify(self._heap)
+            raise
+
+    def _release(self):
+        self.inflight -= 1
+        self._wakeup.set()
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def _expire(self, now):
+        live = []
+        for entry in self._heap:
+            future = entry[4]
+            if future.done():
+                continue
+            if entry[2] < now:
+                self.counters["timed_out"] += 1
+                future.set_exception(LLMOverloaded("Timed out waiting for an LLM slot"))
+                continue
+            live.append(entry)
+        if len(live) != len(self._heap):
+            self._heap = live
+            heapq.heapify(self._heap)
+
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+
+            delay = None
+            if self._heap and self.inflight < self.max_concurrency:
+                tokens = self._heap[0][3]
+                delay = max(self.paused_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if delay <= 0:
+                    *_, tokens, future = heapq.heappop(self._heap)
+                    self.requests.consume(1)
+                    self.tokens.consume(tokens)
+                    self.inflight += 1
+                    self.counters["dispatched"] += 1
+                    future.set_result(None)
+                    continue
+
+            # Sleep until budget frees up, a slot is released or a new call arrives
+            self._wakeup.clear()
+            if self._heap:
+                earliest_deadline = min(entry[2] for entry in self._heap) - now
+                delay = earliest_deadline if delay is None else min(delay, earliest_deadline)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay if delay is None else max(delay, 0.001))
+            except asyncio.TimeoutError:
+                pass
+
+
+async def call_routed(call, invoke, priority="default", tokens=LLM_COMPLETION_ESTIMATE, usage=None):
+    """
+    Await invoke(model) through the scheduler on the model the router picks
+    for `call`, recording its latency or error. A retryable failure (429, 5xx,
+    connection error) on any but the last candidate fails over to the next
+    model at once; only the last one gets the scheduler's retries.
+    """
+    candidates = router.candidates(call)
+    for n, model in enumerate(candidates):
+        last = n == len(candidates) - 1
+        failover = False
+
+        async def attempt(model=model):
+            nonlocal failover
+            started = time.monotonic()
+            try:
+                result = await invoke(model)
+            except Exception as e:
+                failover = record_failure(model, e)
+                raise
+            router.record(model, time.monotonic() - started)
+            return result
+
+        try:
+            return await get_scheduler().run(
+                attempt, priority, tokens, usage=usage, retries=LLM_MAX_RETRIES if last else 0
+            )
+        except Exception as e:
+            if last or not failover:
+                raise
+            router.counters["failovers"] += 1
+            print(f"[LLM] {call}: {model} failed ({e.__class__.__name__}), failing over to {candidates[n + 1]}")
+
+
+async def _call_groq(messages, temperature=0.2, call="call_groq", priority="default", json_mode=False,
+                     cache=True, validate=None):
     """
     Low-level Groq call. Every AI action in this project goes through this.
+    `call` labels the metrics (span llm.<call>, llm_calls_total, llm_tokens_total);
+    `priority` picks the scheduler lane (interactive, default, background);
+    `json_mode` makes Groq return a single JSON object.
+    With `cache`, calls at a low enough temperature are answered from
+    response_cache when the same prompt was seen before; a reply is only
+    stored when `validate(reply)` (if given) is true, so an unusable reply
+    is never replayed.
     """
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    key = None
+    primary = router.primary(call)
+    if cache and response_cache.eligible(temperature):
+        key = cache_key(primary, messages, temperature, json_mode)
+        cached = await asyncio.to_thread(response_cache.get, key, call)
+        if cached is not None:
+            LLM_CALLS.inc(call=call, status="cached")
+            return cached
 
     payload = {
-        "model": MODEL,
         "messages": messages,
         "temperature": temperature
     }
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
+    served = None
 
-    response = requests.post(GROQ_URL, headers=headers, json=payload)
+    async def post(model):
+        nonlocal served
+        response = await get_client().post(GROQ_URL, json={**payload, "model": model})
+        if response.status_code != 200:
+            LLM_CALLS.inc(call=call, status=str(response.status_code))
+            raise GroqAPIError(
+                response.status_code, f"Groq API error: {response.text}", _retry_after(response),
+                body=_json_body(response)
+            )
+        served = model
+        return response.json()
 
-    if response.status_code != 200:
-        raise Exception(f"Groq API error: {response.text}")
+    with span(f"llm.{call}"):
+        try:
+            body = await call_routed(
+                call, post, priority, estimate_tokens(messages),
+                usage=lambda body: (body.get("usage") or {}).get("total_tokens")
+            )
+        except (httpx.HTTPError, LLMOverloaded) as e:
+            LLM_CALLS.inc(call=call, status="overloaded" if isinstance(e, LLMOverloaded) else "error")
+            raise
 
-    return response.json()["choices"][0]["message"]["content"]
+    LLM_CALLS.inc(call=call, status="ok")
+    record_usage(call, body.get("usage"))
+    content = body["choices"][0]["message"]["content"]
+    # Keyed by the task's primary model: a reply from the failover model is not cached
+    if key is not None and served == primary and content and (validate is None or validate(content)):
+        await asyncio.to_thread(response_cache.put, key, content, call)
+    return content
 
 
 # -------- High-level AI functions used by the system -------- #
 
-def generate_json(system_prompt, user_prompt):
+async def generate_json(system_prompt, user_prompt, call="generate_json", priority="default", schema=None):
     """
     Used when we expect structured JSON output.
     (resume parsing, questions, scoring, etc.)
+    Runs in JSON mode: the reply is one JSON object, so wrap lists in a key.
+    Validate it with structured.parse_structured.
+    Only calls given the `schema` they are parsed with use the response
+    cache, and only replies that already validate against it are stored.
     """
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
 
-    return _call_groq(messages, temperature=0.1)
+    try:
+        return await _call_groq(
+            messages, temperature=0.1, call=call, priority=priority, json_mode=True,
+            cache=schema is not None, validate=schema and (lambda reply: is_valid(reply, schema))
+        )
+    except GroqAPIError as e:
+        # Groq rejected invalid JSON: hand the text to parse_structured to repair or re-ask
+        rejected = failed_generation(e)
+        if rejected is None:
+            raise
+        LLM_CALLS.inc(call=call, status="json_invalid")
+        return rejected
 
 
-def generate_text(system_prompt, user_prompt):
+async def generate_text(system_prompt, user_prompt, call="generate_text", priority="default", temperature=0.5):
     """
     Used when we want natural language output
     (hints, summaries, feedback, etc.)
+    Pass a temperature within LLM_CACHE_MAX_TEMPERATURE for cacheable text.
     """
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt}
     ]
 
-    return _call_groq(messages, temperature=0.5)
+    return await _call_groq(messages, temperature=temperature, call=call, priority=priority)
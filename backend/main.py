@@ -1,9 +1,30 @@
 import os
 import uuid
-import pdfplumber
-from fastapi import FastAPI, UploadFile, File, HTTPException
+import json
+import time
+import asyncio
+from typing import List, Literal
+from fastapi import FastAPI, Request, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from starlette.background import BackgroundTask
+import metrics
+import structured
 from resume_parser import parse_resume
+from llm import close_client, get_scheduler, LLMOverloaded
+from resume_cache import resume_cache, hash_text
+from response_cache import response_cache
+from model_router import router as model_router
+from pdf_extractor import (
+    extract_pages_async, shutdown_pool, ExtractionTimeout
+)
+import text_compactor
+from text_compactor import compact_pages
+import bulk_ingest
+import upload_store
+from jobs import job_runner, JobQueueFull
+from upload_store import UploadTooLarge
+import prescorer
 
 
 
@@ -17,30 +38,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-UPLOAD_DIR = "../uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
 
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Request latency histogram plus a log line with the span breakdown for slow requests"""
+    breakdown = metrics.start_breakdown()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
 
-def clean_text(text: str):
-    """
-    Light cleaning for PDF noise.
-    Do NOT aggressively preprocess – LLM handles semantics.
-    """
-    text = text.replace("\x00", "")
-    text = text.replace("\n\n", "\n")
-    text = text.replace("  ", " ")
-    return text.strip()
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        elapsed, method=request.method, route=path, status=response.status_code
+    )
+    if metrics.SLOW_REQUEST_SECONDS and elapsed >= metrics.SLOW_REQUEST_SECONDS:
+        print(f"[Slow] {request.method} {path} {elapsed:.3f}s {metrics.format_breakdown(breakdown)}")
+    return response
+
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded(request: Request, exc: LLMOverloaded):
+    """LLM budget exhausted: tell the client when to come back instead of hanging"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(int(exc.retry_after + 0.999), 1))}
+    )
+
+
+@app.exception_handler(JobQueueFull)
+async def job_queue_full(request: Request, exc: JobQueueFull):
+    """Background workers saturated: shed load with a retry hint"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(int(exc.retry_after + 0.999), 1))}
+    )
+
+
+@app.on_event("startup")
+async def startup():
+    # Schema migrations run here rather than at import, so importing the app stays cheap
+    init_db()
+    global _upload_gc_task
+    _upload_gc_task = asyncio.create_task(_upload_gc())
+    job_runner.start()
+
+
+_upload_gc_task = None
 
-def extract_text_from_pdf(path):
-    text = ""
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return clean_text(text)
 
+async def _upload_gc():
+    """Periodic retention sweep of the upload store and of leftover bulk job files"""
+    while True:
+        try:
+            await asyncio.to_thread(upload_store.sweep)
+        except Exception as e:
+            print(f"[Uploads] GC sweep failed: {e}")
+        try:
+            await asyncio.to_thread(bulk_ingest.sweep)
+        except Exception as e:
+            print(f"[Bulk] Sweep failed: {e}")
+        await asyncio.sleep(upload_store.UPLOAD_GC_INTERVAL)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Release pooled Groq connections and PDF workers, flush pending DB writes
+    if _upload_gc_task is not None:
+        _upload_gc_task.cancel()
+    await job_runner.stop()
+    await close_client()
+    shutdown_pool()
+    stop_writer()
+
+
+async def save_upload(file: UploadFile, path: str, limit: int = MAX_UPLOAD_BYTES) -> str:
+    """
+    Copy an upload to disk in chunks (in a worker thread), enforcing `limit`
+    bytes (MAX_UPLOAD_BYTES). Returns the sha256 of the content.
+    """
+    await file.seek(0)
+    try:
+        return await asyncio.to_thread(upload_store.copy_hashed, file.file, path, limit)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"File too large: {file.filename}")
 
 
 @app.post("/upload-resume")
@@ -48,70 +133,237 @@ async def upload_resume(file: UploadFile = File(...)):
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF resumes allowed")
 
-    file_id = f"{uuid.uuid4()}.pdf"
-    file_path = os.path.join(UPLOAD_DIR, file_id)
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Resume file too large")
 
-    # Save uploaded file
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    # Stored by content hash; an identical file already on disk is not written again
+    try:
+        file_digest, file_path = await upload_store.put(file, MAX_UPLOAD_BYTES)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Resume file too large")
 
-    # Extract text
-    resume_text = extract_text_from_pdf(file_path)
+    # Exact re-upload: skip extraction and the LLM entirely
+    cached = await asyncio.to_thread(resume_cache.get, "file", file_digest)
+    if cached is not None:
+        return {
+            "status": "success",
+            "profile": cached,
+            "upload_id": file_digest
+        }
+
+    # Extract text in the process pool
+    try:
+        pages = await extract_pages_async(file_path)
+    except ExtractionTimeout:
+        raise HTTPException(status_code=422, detail="Timed out extracting text from PDF")
+
+    # Drop repeated headers/footers and fit the parse prompt's token budget
+    with metrics.span("text.compact"):
+        resume_text = compact_pages(pages)
 
     if len(resume_text) < 100:
         raise HTTPException(status_code=400, detail="Could not extract meaningful text from PDF")
 
+    # Same resume text from a different PDF (re-export, new metadata)
+    text_digest = hash_text(resume_text)
+    cached = await asyncio.to_thread(resume_cache.get, "text", text_digest)
+    if cached is not None:
+        await asyncio.to_thread(resume_cache.put, cached, file_digest=file_digest)
+        return {
+            "status": "success",
+            "profile": cached,
+            "upload_id": file_digest
+        }
+
     # Send to Groq via resume_parser
-    profile_json = parse_resume(resume_text)
+    profile_json = await parse_resume(resume_text)
+    await asyncio.to_thread(resume_cache.put, profile_json, file_digest=file_digest, text_digest=text_digest)
 
     return {
         "status": "success",
-        "profile": profile_json
+        "profile": profile_json,
+        "upload_id": file_digest
     }
 
-from interview_agent import InterviewAgent, InterviewState
-from db import save_resume, create_interview, save_question, save_answer
 
-# In-memory active interviews with LangGraph state
-active_interviews = {}
-active_states = {}  # Store LangGraph state for each interview
+NDJSON = "application/x-ndjson"
+
+
+@app.post("/bulk-upload-resumes")
+async def bulk_upload_resumes(files: List[UploadFile] = File(...)):
+    """
+    Many resumes at once: PDFs and/or zips of PDFs. Streams NDJSON results
+    as each file finishes; the job keeps running if the client disconnects
+    (re-read with GET /bulk-jobs/{job_id}/results?after=<last seq>).
+    """
+    job_id = str(uuid.uuid4())
+    os.makedirs(os.path.join(bulk_ingest.BULK_DIR, job_id))
+    filenames = []
+    try:
+        for file in files:
+            name = (file.filename or "").lower()
+            if name.endswith(".pdf"):
+                if len(filenames) >= bulk_ingest.BULK_MAX_FILES:
+                    raise HTTPException(status_code=413, detail=f"More than {bulk_ingest.BULK_MAX_FILES} files")
+                await save_upload(file, bulk_ingest.item_path(job_id, len(filenames)))
+                filenames.append(file.filename)
+            elif name.endswith(".zip"):
+                zip_path = os.path.join(bulk_ingest.BULK_DIR, job_id, "upload.zip")
+                await save_upload(file, zip_path, limit=bulk_ingest.BULK_MAX_ZIP_BYTES)
+                try:
+                    filenames += await asyncio.to_thread(
+                        bulk_ingest.unpack_zip, zip_path, job_id, len(filenames), MAX_UPLOAD_BYTES
+                    )
+                except bulk_ingest.BulkItemError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                finally:
+                    os.remove(zip_path)
+            else:
+                raise HTTPException(status_code=400, detail=f"Only PDF or zip files allowed: {file.filename}")
+    except BaseException:
+        bulk_ingest.discard_upload(job_id)
+        raise
+
+    if not filenames:
+        bulk_ingest.discard_upload(job_id)
+        raise HTTPException(status_code=400, detail="No PDF resumes in upload")
+
+    bulk_ingest.start_job(job_id, filenames)
+    return StreamingResponse(bulk_ingest.stream_results(job_id), media_type=NDJSON)
+
+
+@app.get("/bulk-jobs/{job_id}")
+async def bulk_job(job_id: str):
+    """Status and per-status item counts of a bulk job"""
+    job = await bulk_ingest.job_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Invalid job id")
+    return job
+
+
+@app.get("/bulk-jobs/{job_id}/results")
+async def bulk_job_results(job_id: str, after: int = 0):
+    """Finished items with seq > after as NDJSON; follows the job live while it runs"""
+    if await bulk_ingest.job_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Invalid job id")
+    return StreamingResponse(bulk_ingest.stream_results(job_id, after), media_type=NDJSON)
+
+
+@app.post("/bulk-jobs/{job_id}/resume")
+async def resume_bulk_job(job_id: str, retry_errors: bool = False, after: int = 0):
+    """Re-run the pending (and with retry_errors, failed) files of an interrupted job"""
+    if not await bulk_ingest.resume_job(job_id, retry_errors):
+        raise HTTPException(status_code=404, detail="Invalid job id")
+    return StreamingResponse(bulk_ingest.stream_results(job_id, after), media_type=NDJSON)
+
+
+@app.get("/uploads/stats")
+async def uploads_stats():
+    """Upload store writes, dedup hits and GC counters"""
+    return upload_store.stats
+
+
+@app.get("/resume-cache/stats")
+async def resume_cache_stats():
+    """Hit/miss counters for the resume parse cache"""
+    return await asyncio.to_thread(resume_cache.stats)
+
+
+@app.get("/llm-cache/stats")
+async def llm_cache_stats():
+    """Hit rates per LLM call site for the deterministic-response cache"""
+    return await asyncio.to_thread(response_cache.stats)
+
+
+@app.get("/model-router/stats")
+async def model_router_stats():
+    """Per-model rolling latency / error rate, cooldowns, reroutes and failovers"""
+    return model_router.stats()
+
+
+from interview_agent import InterviewAgent, InterviewState
+from db import (
+    init_db, save_resume, create_interview, save_questions, save_answer, stop_writer, writer_stats,
+    get_interview_history, get_interview_detail, get_skill_score_aggregates,
+    get_interview_report, get_user_dashboard, get_score_histogram
+)
+from session_store import create_session_store
+from prefetch import prefetcher
+from question_bank import question_bank
+
+# One shared agent (compiled graph + LLM client); per-interview data lives in the state
+agent = InterviewAgent()
+
+# LangGraph state for each active interview (memory LRU or shared SQLite, see SESSION_STORE)
+sessions = create_session_store()
+
+# Existing stats() counters, exported as gauges on /metrics
+metrics.register_collector("resume_cache", resume_cache.stats, blocking=True)
+metrics.register_collector("question_bank", question_bank.stats, blocking=True)
+metrics.register_collector("prefetch", prefetcher.stats)
+metrics.register_collector("db", writer_stats)
+metrics.register_collector("llm_scheduler", lambda: get_scheduler().stats())
+metrics.register_collector("structured_output", lambda: structured.stats)
+metrics.register_collector("compaction", lambda: text_compactor.stats)
+metrics.register_collector("bulk_ingest", bulk_ingest.bulk_stats)
+metrics.register_collector("prescore", prescorer.prescore_stats)
+metrics.register_collector("upload_store", lambda: upload_store.stats)
+metrics.register_collector("jobs", job_runner.stats)
+metrics.register_collector("llm_cache", response_cache.stats, blocking=True)
+metrics.register_collector("model_router", model_router.stats)
 
 
 @app.post("/start-interview")
-async def start_interview(profile: dict):
-    """Initialize LangGraph-based interview with state management"""
+async def start_interview(profile: dict, grading_mode: Literal["live", "deferred"] = "live",
+                          upload_id: str | None = None, mode: Literal["sync", "async"] = "sync",
+                          user_id: str = "anonymous"):
+    """
+    Initialize LangGraph-based interview with state management.
+    grading_mode=deferred records answers and grades them in one batch at the end.
+    upload_id (from /upload-resume) links the resume to its stored PDF.
+    user_id groups the interview into that user's dashboard.
+    mode=async returns 202 with a job id at once; question generation runs on
+    the background workers (poll GET /jobs/{id} or stream /jobs/{id}/events).
+    """
+    if upload_id is not None and not upload_store.is_upload_id(upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+    if mode == "async":
+        job_runner.check_capacity()
+
     # Save resume to DB
-    resume_id = save_resume(profile)
+    resume_id = save_resume(profile, upload_sha256=upload_id)
 
     # Create interview
-    interview_id = create_interview(resume_id)
-
-    # Initialize LangGraph agent
-    agent = InterviewAgent(profile)
-    result = agent.start_interview()
-    
-    # Store agent and initial state
-    active_interviews[interview_id] = agent
-    active_states[interview_id] = {
-        "interview_id": interview_id,
-        "profile": profile,
-        "questions": result['questions'],
-        "current_question_idx": 0,
-        "answers": [],
-        "scores": [],
-        "stage": "generate_questions",
-        "next_question": result['first_question'],
-        "evaluation_result": None
-    }
+    interview_id = create_interview(resume_id, user_id=user_id)
+
+    if mode == "async":
+        job = await job_runner.submit(
+            "start_interview",
+            lambda: _run_interview_start(profile, interview_id, grading_mode),
+            meta={"interview_id": interview_id}
+        )
+        return JSONResponse(
+            status_code=202,
+            content={**job.snapshot(), "status_url": f"/jobs/{job.id}", "events_url": f"/jobs/{job.id}/events"},
+            headers={"Location": f"/jobs/{job.id}"}
+        )
+
+    return await _run_interview_start(profile, interview_id, grading_mode)
+
+
+async def _run_interview_start(profile, interview_id, grading_mode):
+    """Question generation for a new interview; returns the /start-interview body"""
+    # Run the shared LangGraph agent for this candidate
+    state = await agent.start_interview(profile, interview_id, grading_mode)
 
     # Save all questions to DB
-    for q in result['questions']:
-        save_question(interview_id, q["question"])
+    state['question_ids'] = save_questions(interview_id, state['questions'])
+    await asyncio.to_thread(sessions.put, interview_id, state)
 
     # Return first question
     return {
         "interview_id": interview_id,
-        "question": result['first_question']
+        "question": state['next_question']
     }
 
 
@@ -123,27 +375,37 @@ class AnswerRequest(BaseModel):
     answer: str
 
 
-@app.post("/submit-answer")
-async def submit_answer(request: AnswerRequest):
-    """Process answer through LangGraph evaluation node"""
-    agent = active_interviews.get(request.interview_id)
-    state = active_states.get(request.interview_id)
+async def _load_submission(request: AnswerRequest):
+    """Session state and DB question id for an incoming answer"""
+    state = await asyncio.to_thread(sessions.get, request.interview_id)
 
-    if not agent or not state:
+    if not state:
         raise HTTPException(status_code=404, detail="Invalid interview id")
 
-    # Run answer through LangGraph agent
-    result = agent.submit_answer(state, request.answer)
-    
-    # Update stored state
-    active_states[request.interview_id] = state
-
-    # Save to database
-    save_answer(
-        question_id=request.interview_id,  # Simplified for MVP
-        student_answer=request.answer,
-        score=result['evaluation']
-    )
+    # DB id of the question being answered (submit_answer advances the index)
+    question_id = state['question_ids'][state['current_question_idx']]
+    return state, question_id
+
+
+async def _finish_submission(request: AnswerRequest, state, question_id, result):
+    """Persist the graded answer and build the response body"""
+    # Update stored state; finished interviews no longer need a session
+    if result['status'] == 'completed':
+        await asyncio.to_thread(sessions.delete, request.interview_id)
+        prefetcher.cancel_interview(request.interview_id)
+    else:
+        await asyncio.to_thread(sessions.put, request.interview_id, state)
+
+    # Save to database (deferred interviews only have scores once complete)
+    if state.get('grading_mode') != "deferred":
+        save_answer(
+            question_id=question_id,
+            student_answer=request.answer,
+            score=result['evaluation']
+        )
+    elif result['status'] == 'completed':
+        for qid, answer, score in zip(state['question_ids'], state['answers'], state['scores']):
+            save_answer(question_id=qid, student_answer=answer, score=score)
 
     # Check if interview complete
     if result['status'] == 'completed':
@@ -160,3 +422,152 @@ async def submit_answer(request: AnswerRequest):
             "last_score": result['evaluation']
         }
 
+
+@app.post("/submit-answer")
+async def submit_answer(request: AnswerRequest):
+    """Process answer through LangGraph evaluation node"""
+    state, question_id = await _load_submission(request)
+
+    # Run answer through LangGraph agent
+    result = await agent.submit_answer(state, request.answer)
+
+    return await _finish_submission(request, state, question_id, result)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/submit-answer/stream")
+async def submit_answer_stream(request: AnswerRequest):
+    """
+    Same as /submit-answer but streamed as server-sent events:
+    `token` events carry feedback text as the LLM writes it, then one
+    `score` event carries the body /submit-answer would have returned.
+    A failure before the first byte is a normal HTTP error (429 when the LLM
+    queue is full); one mid-stream ends the stream with an `error` event and
+    leaves the answer unrecorded, so the client can resubmit it.
+    """
+    state, question_id = await _load_submission(request)
+    stream = await agent.stream_answer(state, request.answer)
+
+    async def events():
+        try:
+            async for kind, payload in stream:
+                if kind == "token":
+                    yield _sse("token", payload)
+                else:
+                    yield _sse("score", await _finish_submission(request, state, question_id, payload))
+        except Exception as e:
+            print(f"[API] Answer stream failed: {type(e).__name__}: {e}")
+            error = {"status": 500, "detail": str(e) or type(e).__name__}
+            if isinstance(e, LLMOverloaded):
+                error.update(status=429, retry_after=e.retry_after)
+            yield _sse("error", error)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the LLM slot if the client goes away before the body is read
+        background=BackgroundTask(stream.close)
+    )
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str, wait: float = 0):
+    """Job status, plus the result once done. wait=N long-polls up to N (max 30) seconds."""
+    job = await job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Invalid job id")
+    if wait > 0:
+        await job.wait(min(wait, 30))
+    return job.snapshot()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent `status` events on every change; the last one carries the result or error"""
+    job = await job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Invalid job id")
+
+    async def events():
+        async for snapshot in job.watch():
+            yield _sse("status", snapshot)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/question-bank/stats")
+async def question_bank_stats():
+    """Hit rate and size of the skill-keyed question bank"""
+    return await asyncio.to_thread(question_bank.stats)
+
+
+@app.get("/prefetch/stats")
+async def prefetch_stats():
+    """Hit rate and time saved by speculative grading-context prefetch"""
+    return prefetcher.stats()
+
+
+@app.get("/prescore/stats")
+async def prescore_stats():
+    """Answers graded locally without the LLM, per reason"""
+    return prescorer.prescore_stats()
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition: spans, LLM calls/tokens/retries, cache stats"""
+    return PlainTextResponse(await metrics.render_async(), media_type="text/plain; version=0.0.4")
+
+
+# -------- Read APIs (sync handlers: SQLite reads run in the threadpool) -------- #
+
+@app.get("/interviews")
+def list_interviews(limit: int = 20, before: str | None = None, resume_id: str | None = None):
+    """Interview history, newest first; pass the last created_at as `before` to page"""
+    return get_interview_history(limit=min(limit, 100), before=before, resume_id=resume_id)
+
+
+@app.get("/interviews/{interview_id}")
+def interview_detail(interview_id: str):
+    rows = get_interview_detail(interview_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Invalid interview id")
+    return {"interview_id": interview_id, "questions": rows}
+
+
+@app.get("/interviews/{interview_id}/report")
+def interview_report(interview_id: str):
+    """Mean scores overall and per topic, from the maintained aggregates"""
+    report = get_interview_report(interview_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="No scored answers for this interview")
+    return {"interview_id": interview_id, **report}
+
+
+@app.get("/users/{user_id}/dashboard")
+def user_dashboard(user_id: str, trend: int = 20):
+    """Per-user totals, topic/type breakdowns, score histograms and recent-interview trend"""
+    dashboard = get_user_dashboard(user_id, trend_limit=min(trend, 100))
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail="No scored answers for this user")
+    return dashboard
+
+
+@app.get("/analytics/skills")
+def skill_scores(resume_id: str | None = None):
+    """Mean scores per question skill"""
+    return get_skill_score_aggregates(resume_id)
+
+
+@app.get("/analytics/histogram")
+def score_histogram():
+    """Answer counts per 10-point score bucket, per metric"""
+    return get_score_histogram()
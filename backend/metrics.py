@@ -0,0 +1,261 @@
+"""
+Process-wide metrics in Prometheus text format, plus per-request breakdowns.
+
+    with span("llm.call"):
+        ...
+
+records the duration in the `span_seconds` histogram and, inside an HTTP
+request, adds it to that request's breakdown (see the slow-request log in
+main.py). `timed(name)` does the same as a decorator for sync or async
+functions. Existing stats() dicts (resume cache, prefetch, question bank)
+are exported as gauges through register_collector(); collectors that
+query SQLite are registered with blocking=True and run in a worker thread
+by render_async(), so a scrape never stalls the event loop.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Log requests slower than this (seconds) with their span breakdown; 0 disables
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "2"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines += self._samples(key, value)
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self, key, value):
+        counts, total = value
+        lines = [
+            f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', _format_value(bound))])} {count}"
+            for bound, count in zip(self.buckets, counts)
+        ]
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+def _flatten(stats, prefix=""):
+    """Numeric leaves of a (nested) stats dict as (field_path, value)"""
+    for field, value in stats.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{field}_")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{field}", value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix, stats_fn, blocking=False):
+        """
+        Export the numeric fields of stats_fn() as gauges named <prefix>_<field>.
+        blocking=True marks a stats_fn that does I/O (SQLite queries).
+        """
+        self._collectors.append((prefix, stats_fn, blocking))
+
+    @staticmethod
+    def _collect(prefix, stats_fn):
+        try:
+            return stats_fn()
+        except Exception as e:
+            print(f"[Metrics] Collector {prefix} failed: {e}")
+            return None
+
+    def render(self, collected=None) -> str:
+        """`collected` holds stats already gathered per prefix (see render_async)"""
+        collected = collected or {}
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for prefix, stats_fn, _ in self._collectors:
+            stats = collected[prefix] if prefix in collected else self._collect(prefix, stats_fn)
+            if stats is None:
+                continue
+            for field, value in _flatten(stats):
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{field}")
+                lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+    async def render_async(self) -> str:
+        """render(), with the blocking collectors run in a worker thread"""
+        blocking = [(prefix, stats_fn) for prefix, stats_fn, is_blocking in self._collectors if is_blocking]
+        collected = await asyncio.to_thread(
+            lambda: {prefix: self._collect(prefix, stats_fn) for prefix, stats_fn in blocking}
+        )
+        return self.render(collected)
+
+
+REGISTRY = Registry()
+
+SPAN_SECONDS = REGISTRY.register(Histogram(
+    "span_seconds", "Duration of instrumented operations (graph nodes, LLM calls, PDF extraction, DB)",
+    ["span"]
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_seconds", "HTTP request latency until the response starts", ["method", "route", "status"]
+))
+LLM_CALLS = REGISTRY.register(Counter(
+    "llm_calls_total", "LLM API calls by call site and outcome", ["call", "status"]
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "llm_tokens_total", "Tokens reported by the LLM API", ["call", "kind"]
+))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "llm_retries_total", "LLM calls retried by the scheduler, by upstream status", ["status"]
+))
+
+
+def register_collector(prefix, stats_fn, blocking=False):
+    REGISTRY.register_collector(prefix, stats_fn, blocking)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+async def render_async() -> str:
+    return await REGISTRY.render_async()
+
+
+# -------- Spans and per-request breakdowns -------- #
+
+_breakdown = contextvars.ContextVar("breakdown", default=None)
+
+
+def start_breakdown() -> dict:
+    """Collect span durations for the current request (call at request start)"""
+    breakdown = {}
+    _breakdown.set(breakdown)
+    return breakdown
+
+
+def format_breakdown(breakdown: dict) -> str:
+    return " ".join(
+        f"{name}={total:.3f}s" + (f"x{count}" if count > 1 else "")
+        for name, (total, count) in sorted(breakdown.items(), key=lambda item: -item[1][0])
+    )
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.observe(elapsed, span=name)
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            total, count = breakdown.get(name, (0.0, 0))
+            breakdown[name] = (total + elapsed, count + 1)
+
+
+def timed(name):
+    """Decorator form of span() for sync and async functions"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_usage(call, usage):
+    """Token counters from an OpenAI-style `usage` dict or a LangChain usage_metadata dict"""
+    if not usage:
+        return
+    prompt = usage.get("prompt_tokens", usage.get("input_tokens", 0))
+    completion = usage.get("completion_tokens", usage.get("output_tokens", 0))
+    if prompt:
+        LLM_TOKENS.inc(prompt, call=call, kind="prompt")
+    if completion:
+        LLM_TOKENS.inc(completion, call=call, kind="completion")
+
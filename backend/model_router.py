@@ -0,0 +1,159 @@
+"""
+Model routing for LLM calls.
+
+Every call site label (llm.<call>) maps to a task type, and every task type
+to a model tier: cheap tasks (expected answers, grading context, summaries)
+go to the small model, parsing / question generation / grading to the large
+one. MODEL_ROUTES overrides the tier of any task, e.g.
+"evaluation=small,expected_answer=large".
+
+Per model, the router keeps a rolling window of call latencies and errors
+(the last ROUTER_WINDOW_SECONDS). A model is unhealthy while it is cooling
+down after a 429, or when its recent error rate or median latency is over
+the limits; calls then go to the other tier's model first. Samples age out
+of the window, so an unhealthy model gets traffic again on its own.
+"""
+import os
+import time
+from collections import deque
+
+MODEL_LARGE = os.getenv("MODEL_LARGE", "llama-3.3-70b-versatile")
+MODEL_SMALL = os.getenv("MODEL_SMALL", "llama-3.1-8b-instant")
+
+ROUTER_WINDOW_SECONDS = float(os.getenv("ROUTER_WINDOW_SECONDS", "120"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+ROUTER_SLOW_SECONDS = float(os.getenv("ROUTER_SLOW_SECONDS", "10"))
+# Used after a 429 that carries no Retry-After
+ROUTER_COOLDOWN = float(os.getenv("ROUTER_COOLDOWN", "30"))
+
+TASK_TIERS = {
+    "parse": "large",
+    "questions": "large",
+    "evaluation": "large",
+    "expected_answer": "small",
+    "grading_context": "small",
+    "summary": "small",
+}
+
+# Call site label -> task type; "<call>_reask" follows <call>
+CALL_TASKS = {
+    "parse_resume": "parse",
+    "generate_questions": "questions",
+    "evaluate_answer": "evaluation",
+    "grade_batch": "evaluation",
+    "stream_evaluation": "evaluation",
+    "expected_answer": "expected_answer",
+    "grading_context": "grading_context",
+    "generate_text": "summary",
+}
+
+
+def _parse_routes(value):
+    routes = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        task, _, tier = item.partition("=")
+        if tier.strip() in ("large", "small"):
+            routes[task.strip()] = tier.strip()
+        else:
+            print(f"[Router] Ignoring MODEL_ROUTES entry {item!r}")
+    return routes
+
+
+def task_for(call: str) -> str:
+    return CALL_TASKS.get(call.removesuffix("_reask"), "default")
+
+
+class ModelHealth:
+    """Rolling latency / error window for one model"""
+
+    def __init__(self, model):
+        self.model = model
+        self.samples = deque()  # (time, seconds or None on error)
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    def _trim(self, now):
+        while self.samples and self.samples[0][0] < now - ROUTER_WINDOW_SECONDS:
+            self.samples.popleft()
+
+    def add(self, seconds, now):
+        self.calls += 1
+        if seconds is None:
+            self.errors += 1
+        self.samples.append((now, seconds))
+        self._trim(now)
+
+    def window(self, now):
+        """(latencies sorted, error count) over the window"""
+        self._trim(now)
+        latencies = sorted(s for _, s in self.samples if s is not None)
+        return latencies, len(self.samples) - len(latencies)
+
+    def problem(self, now):
+        """Why the model should not be first choice right now, or None"""
+        if now < self.cooldown_until:
+            return "cooldown"
+        latencies, errors = self.window(now)
+        total = len(latencies) + errors
+        if total >= ROUTER_MIN_SAMPLES and errors / total > ROUTER_MAX_ERROR_RATE:
+            return "errors"
+        if len(latencies) >= ROUTER_MIN_SAMPLES and latencies[len(latencies) // 2] > ROUTER_SLOW_SECONDS:
+            return "slow"
+        return None
+
+
+class ModelRouter:
+    """Picks the model for a call and records how each model is doing"""
+
+    def __init__(self, large=MODEL_LARGE, small=MODEL_SMALL, routes=None):
+        self.tiers = {"large": large, "small": small}
+        self.task_tiers = {**TASK_TIERS, **_parse_routes(os.getenv("MODEL_ROUTES", "")), **(routes or {})}
+        self.health = {model: ModelHealth(model) for model in self.tiers.values()}
+        self.counters = {"rerouted": 0, "failovers": 0}
+
+    def primary(self, call: str) -> str:
+        return self.tiers[self.task_tiers.get(task_for(call), "large")]
+
+    def candidates(self, call: str) -> list:
+        """Models to try in order: the task's tier first unless it is unhealthy"""
+        primary = self.primary(call)
+        order = [primary] + [model for model in self.health if model != primary]
+        now = time.monotonic()
+        healthy = [model for model in order if self.health[model].problem(now) is None]
+        if healthy and healthy[0] != primary:
+            self.counters["rerouted"] += 1
+        return healthy + [model for model in order if model not in healthy]
+
+    def record(self, model, seconds):
+        self.health[model].add(seconds, time.monotonic())
+
+    def record_error(self, model, status=None, retry_after=None):
+        """A failed call; a 429 also takes the model out of rotation for a while"""
+        now = time.monotonic()
+        health = self.health[model]
+        health.add(None, now)
+        if status == "429":
+            health.cooldown_until = max(health.cooldown_until, now + (retry_after or ROUTER_COOLDOWN))
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        models = {}
+        for model, health in self.health.items():
+            latencies, errors = health.window(now)
+            total = len(latencies) + errors
+            models[model] = {
+                "calls": health.calls,
+                "errors": health.errors,
+                "window_calls": total,
+                "window_error_rate": round(errors / total, 4) if total else 0.0,
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else 0.0,
+                "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else 0.0,
+                "cooldown_seconds": round(max(health.cooldown_until - now, 0.0), 3),
+                "healthy": int(health.problem(now) is None),
+            }
+        return {**self.counters, "models": models}
+
+
+router = ModelRouter()
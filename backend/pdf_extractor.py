@@ -0,0 +1,149 @@
+"""
+PDF text extraction off the event loop.
+
+pdfplumber is pure-Python and CPU-bound, so extraction runs in a process
+pool. Long PDFs are split into page ranges that are extracted in parallel.
+pdfplumber is imported inside the extraction functions: the server process
+never needs it, only the pool workers do.
+
+Timeout: a task (the head of a file, or one page range) is only handed to
+the pool when a worker is free, and EXTRACT_TIMEOUT bounds that task from
+then on. Time spent waiting for a worker under bulk load is never counted,
+so a healthy PDF can't time out before it starts.
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from metrics import span, timed
+
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "30"))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "4"))
+EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", "30"))
+EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+
+_pool = None
+# One per pool worker: tasks wait here, not in the pool's own queue
+_slots = None
+
+
+class ExtractionTimeout(Exception):
+    """A PDF extraction task ran longer than EXTRACT_TIMEOUT"""
+
+
+def get_pool():
+    global _pool, _slots
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS)
+        _slots = asyncio.Semaphore(EXTRACT_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _slots
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    _slots = None
+
+
+async def _run_in_pool(fn, *args):
+    """fn(*args) in the pool as soon as a worker is free; EXTRACT_TIMEOUT counts from then"""
+    pool = get_pool()
+    slots = _slots
+    await slots.acquire()
+    future = asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    # A running task can't be interrupted: its slot frees when the worker
+    # does, even after a timeout, so the pool never builds a queue
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=EXTRACT_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise ExtractionTimeout(f"PDF extraction task exceeded {EXTRACT_TIMEOUT}s")
+
+
+def clean_text(text: str):
+    """
+    Light cleaning for PDF noise.
+    Do NOT aggressively preprocess – LLM handles semantics.
+    """
+    text = text.replace("\x00", "")
+    text = text.replace("\n\n", "\n")
+    text = text.replace("  ", " ")
+    return text.strip()
+
+
+def _join_pages(pages):
+    return "".join(p + "\n" for p in pages if p)
+
+
+# -------- Process pool workers (must stay module-level to be picklable) -------- #
+
+def _extract_head(path):
+    """Open once: return the capped page count and the first chunk of pages"""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        page_count = min(len(pdf.pages), MAX_PDF_PAGES)
+        head = [page.extract_text() for page in pdf.pages[:min(page_count, PAGES_PER_TASK)]]
+    return page_count, head
+
+
+def _extract_page_range(path, start, end):
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [page.extract_text() for page in pdf.pages[start:end]]
+
+
+# ------------------------------------------------------------------------------- #
+
+@timed("pdf.extract")
+def extract_pages_from_pdf(path):
+    """Synchronous per-page extraction in the current process (scripts, workers)"""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        return [page.extract_text() for page in pdf.pages[:MAX_PDF_PAGES]]
+
+
+def extract_text_from_pdf(path):
+    return clean_text(_join_pages(extract_pages_from_pdf(path)))
+
+
+async def extract_pages_async(path):
+    """
+    Per-page text, extracted in the process pool without blocking the event loop.
+    Pages keep their boundaries so text_compactor can spot repeated headers/footers.
+    Raises ExtractionTimeout if one task runs longer than EXTRACT_TIMEOUT (see
+    the module docstring); ranges still waiting for a worker are cancelled,
+    a range already running finishes in its worker.
+    """
+    with span("pdf.extract"):
+        page_count, pages = await _run_in_pool(_extract_head, path)
+
+        # Remaining pages fan out across workers in PAGES_PER_TASK chunks
+        ranges = [
+            (start, min(start + PAGES_PER_TASK, page_count))
+            for start in range(PAGES_PER_TASK, page_count, PAGES_PER_TASK)
+        ]
+        tasks = [
+            asyncio.ensure_future(_run_in_pool(_extract_page_range, path, start, end))
+            for start, end in ranges
+        ]
+        try:
+            chunks = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        for chunk in chunks:
+            pages.extend(chunk)
+        return pages
+
+
+async def extract_text_async(path):
+    """Whole-document text (light cleaning only), extracted in the process pool"""
+    pages = await extract_pages_async(path)
+    with span("pdf.clean"):
+        return clean_text(_join_pages(pages))
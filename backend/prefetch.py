@@ -0,0 +1,135 @@
+"""
+Speculative prefetch of grading context.
+
+While a candidate is typing, the server is idle. As soon as a question is
+served we start generating its grading context (ideal answer, rubric, hints)
+in the background, so /submit-answer only has to make the final scoring call.
+
+Budget policy: at most PREFETCH_MAX_INFLIGHT LLM calls run at once, at most
+PREFETCH_MAX_PENDING entries are held, each call is capped at PREFETCH_TIMEOUT
+and unclaimed results expire after PREFETCH_TTL. Prefetches for an interview
+are cancelled when it completes.
+"""
+import asyncio
+import os
+import time
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_MAX_INFLIGHT = int(os.getenv("PREFETCH_MAX_INFLIGHT", "8"))
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "500"))
+PREFETCH_TIMEOUT = float(os.getenv("PREFETCH_TIMEOUT", "30"))
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", str(30 * 60)))
+# How long a submit waits on a still-running prefetch before grading without it
+PREFETCH_WAIT = float(os.getenv("PREFETCH_WAIT", "3"))
+
+
+class PrefetchManager:
+    """Background tasks keyed by (interview_id, question_idx)"""
+
+    def __init__(self, max_inflight=PREFETCH_MAX_INFLIGHT, max_pending=PREFETCH_MAX_PENDING,
+                 timeout=PREFETCH_TIMEOUT, ttl=PREFETCH_TTL):
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.ttl = ttl
+        self._limit = asyncio.Semaphore(max_inflight)
+        self._entries = {}  # key -> (task, scheduled_at)
+        self.counters = {
+            "scheduled": 0,
+            "skipped_budget": 0,
+            "hits": 0,           # ready when the answer arrived
+            "waited_hits": 0,    # still running, finished within PREFETCH_WAIT
+            "misses": 0,         # nothing scheduled, failed, or not ready in time
+            "failed": 0,
+            "cancelled": 0,
+            "expired": 0,
+        }
+        self.time_saved = 0.0
+
+    def schedule(self, key, coro_factory) -> bool:
+        """Start coro_factory() in the background unless disabled or over budget"""
+        if not PREFETCH_ENABLED or key in self._entries:
+            return False
+
+        self._expire()
+        if len(self._entries) >= self.max_pending:
+            self.counters["skipped_budget"] += 1
+            return False
+
+        task = asyncio.create_task(self._run(coro_factory))
+        # Unclaimed failures are expected; don't let asyncio log them as unretrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._entries[key] = (task, time.monotonic())
+        self.counters["scheduled"] += 1
+        return True
+
+    async def _run(self, coro_factory):
+        async with self._limit:
+            started = time.monotonic()
+            result = await asyncio.wait_for(coro_factory(), timeout=self.timeout)
+            return result, time.monotonic() - started
+
+    async def peek(self, key, wait=PREFETCH_WAIT):
+        """
+        A prefetched result, waiting up to `wait` seconds if in flight; None on
+        miss. The result stays claimable (and an unfinished prefetch keeps
+        running) until discard(key), so a grading call that fails and is
+        retried gets the same context again without paying for it twice.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+
+        task, _ = entry
+        ready = task.done()
+        waited_from = time.monotonic()
+        try:
+            result, duration = await asyncio.wait_for(asyncio.shield(task), timeout=wait)
+        except asyncio.TimeoutError:
+            self.counters["misses"] += 1
+            return None
+        except Exception as e:
+            print(f"[Prefetch] Failed for {key}: {e}")
+            self.discard(key)
+            self.counters["failed"] += 1
+            self.counters["misses"] += 1
+            return None
+
+        self.counters["hits" if ready else "waited_hits"] += 1
+        # Work that would otherwise have happened inside this request
+        self.time_saved += max(duration - (time.monotonic() - waited_from), 0.0)
+        return result
+
+    def discard(self, key):
+        """Drop a peeked result once it has been used"""
+        entry = self._entries.pop(key, None)
+        if entry is not None and not entry[0].done():
+            entry[0].cancel()
+
+    def cancel_interview(self, interview_id):
+        """Drop all prefetches of a finished or abandoned interview"""
+        for key in [k for k in self._entries if k[0] == interview_id]:
+            task, _ = self._entries.pop(key)
+            if not task.done():
+                task.cancel()
+                self.counters["cancelled"] += 1
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        for key in [k for k, (_, at) in self._entries.items() if at < cutoff]:
+            task, _ = self._entries.pop(key)
+            task.cancel()
+            self.counters["expired"] += 1
+
+    def stats(self) -> dict:
+        claimed = self.counters["hits"] + self.counters["waited_hits"] + self.counters["misses"]
+        hits = self.counters["hits"] + self.counters["waited_hits"]
+        return {
+            **self.counters,
+            "pending": len(self._entries),
+            "hit_rate": round(hits / claimed, 4) if claimed else 0.0,
+            "time_saved_seconds": round(self.time_saved, 3),
+        }
+
+
+prefetcher = PrefetchManager()
@@ -0,0 +1,270 @@
+"""
+Local pre-scoring of interview answers.
+
+Empty answers, "I don't know", copy-pastes of the question and answers with
+nothing in common with the reference don't need an LLM to grade. prescore()
+scores those locally (CPU only, microseconds) and returns None for anything
+ambiguous, which then goes to the LLM grader as before.
+
+Similarity is a cosine over stopword-filtered, sublinear term-frequency
+vectors. Answers that look like code are never judged on term overlap, since
+identifiers rarely share words with the question.
+
+Thresholds live in THRESHOLDS and can be fitted to a labeled sample set with
+calibrate() (or `python prescorer.py samples.jsonl`).
+"""
+import itertools
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter
+
+PRESCORE_ENABLED = os.getenv("PRESCORE_ENABLED", "1") == "1"
+
+THRESHOLDS = {
+    # Fewer content words than this is "too short" to grade
+    "min_words": int(os.getenv("PRESCORE_MIN_WORDS", "3")),
+    # "I don't know" only counts in answers up to this many words
+    "idk_max_words": int(os.getenv("PRESCORE_IDK_MAX_WORDS", "12")),
+    # Cosine with the question at or above this is a copy of the question
+    "copy_similarity": float(os.getenv("PRESCORE_COPY_SIMILARITY", "0.8")),
+    # Cosine with both the question and the reference below this is off-topic
+    "off_topic_similarity": float(os.getenv("PRESCORE_OFF_TOPIC_SIMILARITY", "0.05")),
+}
+
+# reason -> (correctness, depth, clarity, feedback)
+VERDICTS = {
+    "empty": (0, 0, 0, "No answer was given."),
+    "too_short": (5, 0, 20, "Your answer is too short to assess. Explain your reasoning in a few sentences."),
+    "idk": (0, 0, 30, "You said you don't know this one. Review the topic and try explaining what you do know next time."),
+    "copied": (5, 0, 20, "Your answer restates the question without answering it."),
+    "off_topic": (5, 5, 30, "Your answer doesn't address the question. Focus on the concept being asked about."),
+}
+
+# Samples whose labeled overall score is at most this are "trivial" in calibrate()
+TRIVIAL_MAX_SCORE = 25
+
+stats = {"answers": 0, "short_circuited": 0, **{reason: 0 for reason in VERDICTS}}
+
+_WORD = re.compile(r"[a-z0-9_+#]+")
+_IDK = re.compile(
+    r"\b(i\s*(do\s*n[o']?t|dont|have\s*no)\s*(know|idea|remember)|no\s*idea|not\s*sure|idk|no\s*clue|"
+    r"never\s*(heard|used))\b"
+)
+# "pass" / "skip" are everyday technical words; they only mean "I don't know" as the whole answer
+_IDK_WHOLE = re.compile(r"^\W*(pass|skip|next)\W*$")
+# Words that may surround an "I don't know" phrase without adding an answer
+_IDK_FILLER = {
+    "i", "m", "im", "am", "sorry", "honestly", "to", "be", "it", "this", "that", "one", "really", "much",
+    "the", "a", "an", "about", "of", "what", "is", "are", "any", "anything", "here", "tbh", "yet",
+}
+# Other words an "I don't know" answer may still carry ("idk, never used hash maps")
+IDK_MAX_OTHER_WORDS = 2
+_CODE_SIGNALS = [
+    re.compile(r"```"),
+    re.compile(r"^\s*(def|class|function|return|import|for|while|if)\b.*[:{(]", re.MULTILINE),
+    re.compile(r"[;{}]\s*$", re.MULTILINE),
+    re.compile(r"=>|==|!=|\+\+|->|::"),
+    re.compile(r"\w+\([^)]*\)"),
+    re.compile(r"^\s*(#include|SELECT|public|private|const|let|var)\b", re.MULTILINE | re.IGNORECASE),
+]
+_STOPWORDS = frozenset("""
+a an the and or but if then else of to in on at by for with from into about as is are was were be been
+being it its this that these those there here what which who whom whose when where why how do does did
+done can could would should will shall may might must i you he she we they me my your our their them
+his her us not no yes so such than too very just also more most some any all each both few other own
+same only s t don use used using explain describe difference between give example examples
+""".split())
+
+
+def _terms(text):
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        # Crude plural folding: "pointers" ~ "pointer", not "class" -> "clas"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _vector(terms):
+    return {term: 1 + math.log(count) for term, count in Counter(terms).items()}
+
+
+def cosine(a, b):
+    """Cosine similarity of two term vectors"""
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+    norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+    return dot / norm
+
+
+def says_idk(text):
+    """
+    True when the whole answer amounts to "I don't know": an IDK phrase with
+    at most IDK_MAX_OTHER_WORDS words besides filler. "Not sure, but a mutex
+    locks shared state" still goes to the grader.
+    """
+    text = text.lower().strip()
+    if _IDK_WHOLE.match(text):
+        return True
+    rest, found = _IDK.subn(" ", text)
+    if not found:
+        return False
+    others = [word for word in _WORD.findall(rest) if word not in _IDK_FILLER]
+    return len(others) <= IDK_MAX_OTHER_WORDS
+
+
+def looks_like_code(text):
+    """At least two independent code signals (or a fenced block)"""
+    hits = sum(1 for signal in _CODE_SIGNALS if signal.search(text))
+    return hits >= 2 or "```" in text
+
+
+def features(question, answer, reference=None):
+    """Threshold-independent measurements of one answer"""
+    answer = answer or ""
+    terms = _terms(answer)
+    vector = _vector(terms)
+    return {
+        "chars": len(answer.strip()),
+        "words": len(answer.split()),
+        "content_words": len(terms),
+        "idk": says_idk(answer),
+        "code": looks_like_code(answer),
+        "question_similarity": cosine(vector, _vector(_terms(question or ""))),
+        "reference_similarity": cosine(vector, _vector(_terms(reference))) if reference else None,
+    }
+
+
+def classify(f, thresholds=None):
+    """Short-circuit reason for a features() dict, or None when the LLM should grade"""
+    t = THRESHOLDS if thresholds is None else thresholds
+    if f["chars"] == 0:
+        return "empty"
+    if f["idk"] and f["words"] <= t["idk_max_words"]:
+        return "idk"
+    if f["code"]:
+        return None
+    if f["content_words"] < t["min_words"]:
+        return "too_short"
+    if f["question_similarity"] >= t["copy_similarity"]:
+        return "copied"
+    # Without a reference, low overlap with a short question proves nothing
+    if (f["reference_similarity"] is not None
+            and f["reference_similarity"] < t["off_topic_similarity"]
+            and f["question_similarity"] < t["off_topic_similarity"]):
+        return "off_topic"
+    return None
+
+
+def _verdict(reason):
+    correctness, depth, clarity, feedback = VERDICTS[reason]
+    return {"correctness": correctness, "depth": depth, "clarity": clarity, "feedback": feedback}
+
+
+def prescore(question, answer, reference=None):
+    """
+    Evaluation dict (same shape as the LLM grader's) for an obviously
+    trivial answer, or None if the answer needs the LLM.
+    """
+    if not PRESCORE_ENABLED:
+        return None
+    stats["answers"] += 1
+    reason = classify(features(question, answer, reference))
+    if reason is None:
+        return None
+    stats["short_circuited"] += 1
+    stats[reason] += 1
+    return _verdict(reason)
+
+
+def prescore_stats():
+    """Counters per reason plus the share of answers graded without the LLM"""
+    rate = stats["short_circuited"] / stats["answers"] if stats["answers"] else 0.0
+    return {**stats, "short_circuit_rate": round(rate, 4)}
+
+
+# -------- Calibration -------- #
+
+GRID = {
+    "min_words": [1, 2, 3, 4, 5],
+    "idk_max_words": [6, 8, 12, 16, 24],
+    "copy_similarity": [0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95],
+    "off_topic_similarity": [0.0, 0.02, 0.05, 0.08, 0.1, 0.15],
+}
+
+
+def _overall(sample):
+    if "score" in sample:
+        return sample["score"]
+    return (sample["correctness"] + sample["depth"] + sample["clarity"]) / 3
+
+
+def evaluate_thresholds(samples, thresholds, measured=None):
+    """Short-circuit count, rate and precision of `thresholds` on labeled samples"""
+    measured = measured or [
+        features(s["question"], s["answer"], s.get("reference")) for s in samples
+    ]
+    short = correct = 0
+    for sample, f in zip(samples, measured):
+        if classify(f, thresholds) is not None:
+            short += 1
+            correct += _overall(sample) <= TRIVIAL_MAX_SCORE
+    return {
+        "short_circuited": short,
+        "short_circuit_rate": round(short / len(samples), 4) if samples else 0.0,
+        "precision": round(correct / short, 4) if short else 1.0,
+    }
+
+
+def calibrate(samples, min_precision=0.95, apply=False):
+    """
+    Grid-search thresholds on labeled samples: each has question, answer,
+    optional reference, and the LLM/human grade as `score` (overall 0-100)
+    or correctness/depth/clarity. A short-circuit is right when the labeled
+    score is at most TRIVIAL_MAX_SCORE. Picks the thresholds that
+    short-circuit the most answers with precision >= min_precision,
+    preferring the most conservative setting on ties.
+    """
+    measured = [features(s["question"], s["answer"], s.get("reference")) for s in samples]
+    best = None
+    for values in itertools.product(*GRID.values()):
+        thresholds = dict(zip(GRID, values))
+        result = evaluate_thresholds(samples, thresholds, measured)
+        if result["precision"] < min_precision:
+            continue
+        # More short-circuits first; then fewer words/higher copy bar/lower off-topic bar
+        key = (
+            result["short_circuited"],
+            -thresholds["min_words"], -thresholds["idk_max_words"],
+            thresholds["copy_similarity"], -thresholds["off_topic_similarity"]
+        )
+        if best is None or key > best[0]:
+            best = (key, thresholds, result)
+
+    if best is None:
+        return {"thresholds": dict(THRESHOLDS), **evaluate_thresholds(samples, THRESHOLDS, measured)}
+    _, thresholds, result = best
+    if apply:
+        THRESHOLDS.update(thresholds)
+    return {"thresholds": thresholds, **result}
+
+
+if __name__ == "__main__":
+    # python prescorer.py samples.jsonl [min_precision]
+    with open(sys.argv[1]) as f:
+        labeled = [json.loads(line) for line in f if line.strip()]
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else 0.95
+    print(json.dumps({
+        "samples": len(labeled),
+        "current": {"thresholds": THRESHOLDS, **evaluate_thresholds(labeled, THRESHOLDS)},
+        "calibrated": calibrate(labeled, target),
+    }, indent=2))
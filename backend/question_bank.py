@@ -0,0 +1,231 @@
+"""
+Question bank keyed by a profile signature (normalized skills + experience band).
+
+Most candidates share skill sets, so questions generated for one profile are
+reused for the next profile with the same signature. A new interview only
+calls the LLM when the bank has fewer than QUESTION_BANK_MIN_POOL questions
+for its signature.
+
+Rotation: questions are retired after QUESTION_BANK_MAX_SERVES interviews or
+QUESTION_BANK_TTL seconds, and a fraction of hits (QUESTION_BANK_REFRESH_RATE)
+still trigger a background generation so fresh questions keep flowing in.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+QUESTION_BANK_PATH = os.getenv("QUESTION_BANK_PATH", "question_bank.db")
+QUESTION_BANK_MIN_POOL = int(os.getenv("QUESTION_BANK_MIN_POOL", "10"))
+QUESTION_BANK_MAX_PER_SIGNATURE = int(os.getenv("QUESTION_BANK_MAX_PER_SIGNATURE", "60"))
+QUESTION_BANK_MAX_SIGNATURES = int(os.getenv("QUESTION_BANK_MAX_SIGNATURES", "2000"))
+QUESTION_BANK_TTL = int(os.getenv("QUESTION_BANK_TTL", str(14 * 24 * 3600)))
+QUESTION_BANK_MAX_SERVES = int(os.getenv("QUESTION_BANK_MAX_SERVES", "25"))
+QUESTION_BANK_REFRESH_RATE = float(os.getenv("QUESTION_BANK_REFRESH_RATE", "0.1"))
+
+# Skills that make up a signature (the first ones listed on the resume)
+SIGNATURE_SKILLS = 6
+# Question mix of one interview: 3 conceptual + 2 coding
+DEFAULT_MIX = {"conceptual": 3, "coding": 2}
+
+SKILL_ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "golang": "go",
+    "sklearn": "scikit-learn",
+}
+
+
+def normalize_skill(skill) -> str:
+    skill = re.sub(r"\s+", " ", str(skill)).strip().lower()
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def experience_band(experience) -> str:
+    """Bucket free-form experience ("2", "3+ years", 4.5) into a coarse band"""
+    match = re.search(r"\d+(\.\d+)?", str(experience or ""))
+    if not match:
+        return "unknown"
+    years = float(match.group())
+    if years < 2:
+        return "junior"
+    if years < 5:
+        return "mid"
+    if years < 10:
+        return "senior"
+    return "staff"
+
+
+def profile_signature(profile: dict):
+    """e.g. "mid|fastapi,python,sql"; None when the profile lists no skills"""
+    skills = []
+    for skill in profile.get("skills") or []:
+        skill = normalize_skill(skill)
+        if skill and skill not in skills:
+            skills.append(skill)
+    if not skills:
+        return None
+    return f"{experience_band(profile.get('experience'))}|{','.join(sorted(skills[:SIGNATURE_SKILLS]))}"
+
+
+class QuestionBank:
+    """Bounded SQLite store of generated questions per profile signature"""
+
+    def __init__(self, path=QUESTION_BANK_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS bank_questions (
+                    signature TEXT,
+                    question_hash TEXT,
+                    question TEXT,
+                    question_type TEXT,
+                    served INTEGER DEFAULT 0,
+                    created_at REAL,
+                    PRIMARY KEY (signature, question_hash)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS bank_signatures (
+                    signature TEXT PRIMARY KEY,
+                    last_used REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_bank_signatures_used ON bank_signatures(last_used)")
+            self._conn.commit()
+        return self._conn
+
+    def sample(self, signature, mix=DEFAULT_MIX):
+        """
+        Questions for a new interview, or None on a miss (pool too small).
+        Less-served questions are more likely to be picked.
+        """
+        if signature is None:
+            return None
+
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            rows = conn.execute(
+                """SELECT question_hash, question, question_type, served FROM bank_questions
+                   WHERE signature = ? AND created_at >= ? AND served < ?""",
+                (signature, now - QUESTION_BANK_TTL, QUESTION_BANK_MAX_SERVES)
+            ).fetchall()
+
+            if len(rows) < QUESTION_BANK_MIN_POOL:
+                self.misses += 1
+                return None
+
+            # Weighted sampling without replacement (key = u ** (1 / weight))
+            ranked = sorted(rows, key=lambda r: random.random() ** (1 + r[3]), reverse=True)
+            picked = []
+            for qtype, count in mix.items():
+                picked += [r for r in ranked if r[2] == qtype][:count]
+            # Not enough of one type: fill up from whatever is left
+            wanted = sum(mix.values())
+            picked += [r for r in ranked if r not in picked][:wanted - len(picked)]
+
+            conn.executemany(
+                "UPDATE bank_questions SET served = served + 1 WHERE signature = ? AND question_hash = ?",
+                [(signature, r[0]) for r in picked]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO bank_signatures (signature, last_used) VALUES (?, ?)",
+                (signature, now)
+            )
+            conn.commit()
+            self.hits += 1
+
+        questions = [json.loads(r[1]) for r in picked]
+        random.shuffle(questions)
+        return questions
+
+    def add(self, signature, questions):
+        """Store freshly generated questions and enforce the size limits"""
+        if signature is None or not questions:
+            return
+
+        now = time.time()
+        rows = []
+        for q in questions:
+            if not isinstance(q, dict) or not q.get("question"):
+                continue
+            payload = json.dumps(q, separators=(",", ":"))
+            digest = hashlib.sha256(q["question"].strip().lower().encode("utf-8")).hexdigest()
+            rows.append((signature, digest, payload, q.get("type"), now))
+
+        with self._lock:
+            conn = self._db()
+            conn.executemany(
+                """INSERT OR IGNORE INTO bank_questions
+                   (signature, question_hash, question, question_type, served, created_at)
+                   VALUES (?, ?, ?, ?, 0, ?)""",
+                rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO bank_signatures (signature, last_used) VALUES (?, ?)",
+                (signature, now)
+            )
+            self._evict(conn, signature, now)
+            conn.commit()
+
+    def _evict(self, conn, signature, now):
+        # Rotation: stale or over-served questions
+        conn.execute(
+            "DELETE FROM bank_questions WHERE created_at < ? OR served >= ?",
+            (now - QUESTION_BANK_TTL, QUESTION_BANK_MAX_SERVES)
+        )
+        # Per-signature cap: oldest questions go first
+        conn.execute(
+            """DELETE FROM bank_questions WHERE signature = ? AND question_hash IN (
+                   SELECT question_hash FROM bank_questions WHERE signature = ?
+                   ORDER BY created_at DESC LIMIT -1 OFFSET ?)""",
+            (signature, signature, QUESTION_BANK_MAX_PER_SIGNATURE)
+        )
+        # Signature cap: least recently used signatures go first
+        stale = conn.execute(
+            "SELECT signature FROM bank_signatures ORDER BY last_used DESC LIMIT -1 OFFSET ?",
+            (QUESTION_BANK_MAX_SIGNATURES,)
+        ).fetchall()
+        conn.executemany("DELETE FROM bank_questions WHERE signature = ?", stale)
+        conn.executemany("DELETE FROM bank_signatures WHERE signature = ?", stale)
+
+    def should_refresh(self) -> bool:
+        """On a hit, whether to also generate fresh questions in the background"""
+        return random.random() < QUESTION_BANK_REFRESH_RATE
+
+    def stats(self) -> dict:
+        with self._lock:
+            signatures, questions = self._db().execute(
+                "SELECT COUNT(DISTINCT signature), COUNT(*) FROM bank_questions"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "signatures": signatures,
+            "questions": questions
+        }
+
+
+question_bank = QuestionBank()
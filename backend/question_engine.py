@@ -1,38 +1,58 @@
+import asyncio
 from llm import generate_json
+from question_bank import question_bank, profile_signature
+from structured import parse_structured, QuestionList
 import json
-import re
 
 SYSTEM_PROMPT = """
 You are a senior software engineer conducting a technical interview.
 Return ONLY valid JSON. No markdown, no ``` fences.
 """
 
-def generate_questions(profile_json):
+async def generate_questions(profile_json):
+    # Accept the profile as a dict or as a JSON string
+    profile = profile_json
+    if isinstance(profile_json, str):
+        try:
+            profile = json.loads(profile_json)
+        except ValueError:
+            profile = {}
+    signature = profile_signature(profile) if isinstance(profile, dict) else None
+
+    questions = await asyncio.to_thread(question_bank.sample, signature)
+    if questions is not None:
+        return questions
+
     USER_PROMPT = f"""
 Based on this candidate profile, generate:
 - 3 conceptual questions
 - 2 coding questions with hints
 
 Return JSON in this exact format:
-[
-  {{
-    "type": "conceptual",
-    "question": "..."
-  }},
-  {{
-    "type": "coding",
-    "question": "...",
-    "hint": "..."
-  }}
-]
+{{
+  "questions": [
+    {{
+      "type": "conceptual",
+      "question": "..."
+    }},
+    {{
+      "type": "coding",
+      "question": "...",
+      "hint": "..."
+    }}
+  ]
+}}
 
 Candidate Profile:
 {profile_json}
 """
 
-    raw = generate_json(SYSTEM_PROMPT, USER_PROMPT)
-
-    # Remove markdown if Groq adds it
-    clean = re.sub(r"```json|```", "", raw).strip()
+    raw = await generate_json(SYSTEM_PROMPT, USER_PROMPT, call="generate_questions", schema=QuestionList)
 
-    return json.loads(clean)
+    parsed = await parse_structured(
+        raw, QuestionList,
+        reask=lambda prompt: generate_json(SYSTEM_PROMPT, prompt, call="generate_questions_reask")
+    )
+    questions = [q.model_dump(exclude_none=True) for q in parsed.questions]
+    await asyncio.to_thread(question_bank.add, signature, questions)
+    return questions
@@ -0,0 +1,171 @@
+"""
+Cache for deterministic LLM responses.
+
+_call_groq (llm.py) looks calls up here when their temperature is at most
+LLM_CACHE_MAX_TEMPERATURE, so a repeated prompt (the same question's expected
+answer, a retried request, the same answer graded twice) is served without
+a Groq call. The key is the sha256 of model, messages, temperature and JSON
+mode.
+
+Two layers:
+- memory: LRU of the most recent LLM_CACHE_MEMORY_ENTRIES responses
+- disk: a small local SQLite file, evicted by age and by entry count / total size
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.2"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Disk eviction runs every this many writes rather than on each one, so the
+# store can run up to EVICT_EVERY entries over LLM_CACHE_MAX_ENTRIES
+EVICT_EVERY = 100
+
+
+def cache_key(model, messages, temperature, json_mode=False) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "json_mode": json_mode},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Memory LRU in front of a bounded SQLite store; counters are per call site"""
+
+    def __init__(self, path=LLM_CACHE_PATH, enabled=LLM_CACHE_ENABLED,
+                 max_temperature=LLM_CACHE_MAX_TEMPERATURE, memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+                 max_entries=LLM_CACHE_MAX_ENTRIES, max_bytes=LLM_CACHE_MAX_BYTES, ttl=LLM_CACHE_TTL):
+        self.path = path
+        self.enabled = enabled
+        self.max_temperature = max_temperature
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.calls = {}  # call -> {memory_hits, disk_hits, misses}
+        self._memory = OrderedDict()  # key -> (content, created_at)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def eligible(self, temperature) -> bool:
+        return self.enabled and temperature <= self.max_temperature
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL + NORMAL: a put appends to the log without an fsync per response
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    call TEXT,
+                    content TEXT,
+                    size INTEGER,
+                    created_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def _count(self, call, outcome):
+        counters = self.calls.setdefault(call, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def _remember(self, key, content, created_at):
+        self._memory[key] = (content, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key, call="call_groq"):
+        """Cached response text for `key`, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._memory.move_to_end(key)
+                self._count(call, "memory_hits")
+                return entry[0]
+
+            conn = self._db()
+            row = conn.execute("SELECT content, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self._memory.pop(key, None)
+                self._count(call, "misses")
+                return None
+
+            conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self._remember(key, row[0], row[1])
+            self._count(call, "disk_hits")
+            return row[0]
+
+    def put(self, key, content, call="call_groq"):
+        now = time.time()
+        with self._lock:
+            self._remember(key, content, now)
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, call, content, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, call, content, len(content), now, now)
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then least-recently-used until under both limits"""
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        for (key,) in victims:
+            self._memory.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            calls = {}
+            for call, counters in self.calls.items():
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                lookups = hits + counters["misses"]
+                calls[call] = {**counters, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+            return {
+                "enabled": int(self.enabled),
+                "calls": calls,
+                "memory_entries": len(self._memory),
+                "entries": count,
+                "bytes": total,
+            }
+
+
+response_cache = ResponseCache()
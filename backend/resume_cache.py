@@ -0,0 +1,138 @@
+"""
+Content-addressed cache for parsed resume profiles.
+
+Two lookup layers:
+- file: sha256 of the uploaded PDF bytes (exact re-upload)
+- text: sha256 of the normalized extracted text (same resume, different PDF bytes)
+
+Entries live in a small local SQLite file and are evicted by age and total size.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+RESUME_CACHE_PATH = os.getenv("RESUME_CACHE_PATH", "resume_cache.db")
+RESUME_CACHE_MAX_ENTRIES = int(os.getenv("RESUME_CACHE_MAX_ENTRIES", "5000"))
+RESUME_CACHE_MAX_BYTES = int(os.getenv("RESUME_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+RESUME_CACHE_TTL = int(os.getenv("RESUME_CACHE_TTL", str(30 * 24 * 3600)))
+
+
+def normalize_text(text: str) -> str:
+    """Case/whitespace-insensitive form used for the text layer key"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class ResumeCache:
+    """Bounded profile store keyed by file hash and normalized-text hash"""
+
+    def __init__(self, path=RESUME_CACHE_PATH, max_entries=RESUME_CACHE_MAX_ENTRIES,
+                 max_bytes=RESUME_CACHE_MAX_BYTES, ttl=RESUME_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = {"file": 0, "text": 0}
+        self.misses = {"file": 0, "text": 0}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS resume_cache (
+                    key TEXT PRIMARY KEY,
+                    profile TEXT,
+                    size INTEGER,
+                    created_at REAL,
+                    accessed_at REAL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_resume_cache_accessed ON resume_cache(accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, layer: str, digest: str):
+        """Return the cached profile for a file/text digest, or None"""
+        key = f"{layer}:{digest}"
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            row = conn.execute(
+                "SELECT profile, created_at FROM resume_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                self.misses[layer] += 1
+                return None
+
+            conn.execute("UPDATE resume_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits[layer] += 1
+            return json.loads(row[0])
+
+    def put(self, profile: dict, file_digest: str = None, text_digest: str = None):
+        """Store a parsed profile under whichever digests are known"""
+        payload = json.dumps(profile, separators=(",", ":"))
+        now = time.time()
+        keys = []
+        if file_digest:
+            keys.append(f"file:{file_digest}")
+        if text_digest:
+            keys.append(f"text:{text_digest}")
+
+        with self._lock:
+            conn = self._db()
+            conn.executemany(
+                "INSERT OR REPLACE INTO resume_cache (key, profile, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                [(k, payload, len(payload), now, now) for k in keys]
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then least-recently-used until under both limits"""
+        conn.execute("DELETE FROM resume_cache WHERE created_at < ?", (now - self.ttl,))
+
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM resume_cache"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM resume_cache ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM resume_cache WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._db().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM resume_cache"
+            ).fetchone()
+        # every upload does one file-layer lookup; text hits are a subset of file misses
+        lookups = self.hits["file"] + self.misses["file"]
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "hit_rate": round(sum(self.hits.values()) / lookups, 4) if lookups else 0.0,
+            "entries": count,
+            "bytes": total
+        }
+
+
+resume_cache = ResumeCache()
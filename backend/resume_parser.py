@@ -1,13 +1,12 @@
-import json
-import re
 from llm import generate_json
+from structured import parse_structured, ResumeProfile
 
 SYSTEM_PROMPT = """
 You are an expert technical recruiter and resume analyst.
 Return only valid JSON. Do not include ``` or explanations.
 """
 
-def parse_resume(resume_text):
+async def parse_resume(resume_text, priority="default"):
     USER_PROMPT = f"""
 Extract the following resume into structured JSON with:
 name, skills, projects (name, tech, description), experience.
@@ -16,8 +15,13 @@ Resume:
 {resume_text}
 """
 
-    result = generate_json(SYSTEM_PROMPT, USER_PROMPT)
+    result = await generate_json(
+        SYSTEM_PROMPT, USER_PROMPT, call="parse_resume", priority=priority, schema=ResumeProfile
+    )
 
-    # clean any accidental markdown
-    clean = re.sub(r"```json|```", "", result).strip()
-    return json.loads(clean)
+    # Re-asks only send back the broken output, not the resume text
+    profile = await parse_structured(
+        result, ResumeProfile,
+        reask=lambda prompt: generate_json(SYSTEM_PROMPT, prompt, call="parse_resume_reask", priority=priority)
+    )
+    return profile.model_dump()
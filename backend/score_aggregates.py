@@ -0,0 +1,76 @@
+"""
+Running score totals.
+
+The same sums-and-counts shape is kept in two places: in InterviewState for
+the live summary, and in the score_aggregates table (db.py) for reports and
+the dashboard. Both are updated once per answer, so reading a mean is a
+division, never a scan over every score.
+"""
+
+METRICS = ("correctness", "depth", "clarity")
+HISTOGRAM_BUCKETS = 10  # 0-9, 10-19, ..., 90-100
+
+# Mean overall score that makes a skill a strength / a weak area in summaries
+STRENGTH_MIN_SCORE = 75
+WEAK_MAX_SCORE = 60
+SUMMARY_SKILLS = 3
+
+
+def overall(score: dict) -> float:
+    return sum(score.get(metric, 0) or 0 for metric in METRICS) / len(METRICS)
+
+
+def bucket(value) -> int:
+    """Histogram bucket of a 0-100 score"""
+    return min(max(int(value or 0) // 10, 0), HISTOGRAM_BUCKETS - 1)
+
+
+def new_totals() -> dict:
+    return {"answers": 0, **{metric: 0.0 for metric in METRICS}}
+
+
+def add(totals: dict, score: dict) -> dict:
+    totals["answers"] += 1
+    for metric in METRICS:
+        totals[metric] += score.get(metric, 0) or 0
+    return totals
+
+
+def means(totals: dict) -> dict:
+    """{answers, correctness, depth, clarity, overall} means, rounded"""
+    count = totals.get("answers", 0)
+    if not count:
+        return {"answers": 0, **{metric: 0.0 for metric in METRICS}, "overall": 0.0}
+    values = {metric: totals[metric] / count for metric in METRICS}
+    return {
+        "answers": count,
+        **{metric: round(value, 2) for metric, value in values.items()},
+        "overall": round(sum(values.values()) / len(METRICS), 2),
+    }
+
+
+def topic(question: dict) -> str:
+    """Label a question is aggregated under: its skill, else its type"""
+    return question.get("skill") or f"{question.get('type', 'general')} questions"
+
+
+def new_interview_totals() -> dict:
+    return {"all": new_totals(), "topics": {}}
+
+
+def add_answer(totals: dict, question: dict, score: dict) -> dict:
+    """Fold one graded answer into interview totals (InterviewState['totals'])"""
+    add(totals["all"], score)
+    add(totals["topics"].setdefault(topic(question), new_totals()), score)
+    return totals
+
+
+def strengths_and_weaknesses(topics: dict):
+    """(strengths, weak_areas): best and worst topics by mean overall score"""
+    ranked = sorted(
+        ((name, means(t)["overall"]) for name, t in topics.items() if t.get("answers")),
+        key=lambda item: item[1], reverse=True
+    )
+    strengths = [name for name, score in ranked if score >= STRENGTH_MIN_SCORE][:SUMMARY_SKILLS]
+    weak = [name for name, score in reversed(ranked) if score < WEAK_MAX_SCORE][:SUMMARY_SKILLS]
+    return strengths, weak
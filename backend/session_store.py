@@ -0,0 +1,174 @@
+"""
+Session storage for active interviews (InterviewState per interview_id).
+
+Backends:
+- memory: process-local LRU with an idle TTL; fastest, single worker only
+- sqlite: compact serialized states in the backend SQLite file, so any
+  uvicorn worker can continue any interview
+
+Select with SESSION_STORE=memory|sqlite.
+
+Both backends hand out copies: a request that fails halfway through never
+leaves a partly updated state behind. Only put() changes the stored state.
+
+The methods block (the SQLite backend waits up to 10 s on a locked file);
+async callers run them through asyncio.to_thread.
+"""
+import abc
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from db import DB_PATH
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(2 * 3600)))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+
+
+def serialize_state(state: dict) -> bytes:
+    """Compact JSON + zlib; InterviewState is plain JSON-compatible data"""
+    return zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+
+
+def deserialize_state(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SessionStore(abc.ABC):
+    """Interface shared by all backends"""
+
+    @abc.abstractmethod
+    def get(self, interview_id: str):
+        """A private copy of the stored state, or None"""
+
+    @abc.abstractmethod
+    def put(self, interview_id: str, state: dict):
+        ...
+
+    @abc.abstractmethod
+    def delete(self, interview_id: str):
+        ...
+
+    @abc.abstractmethod
+    def __len__(self):
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    """LRU ordered by last access; idle sessions expire after ttl seconds"""
+
+    def __init__(self, max_sessions=SESSION_MAX, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, interview_id):
+        with self._lock:
+            entry = self._sessions.get(interview_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at < time.time():
+                del self._sessions[interview_id]
+                return None
+            self._sessions[interview_id] = (time.time() + self.ttl, state)
+            self._sessions.move_to_end(interview_id)
+        return copy.deepcopy(state)
+
+    def put(self, interview_id, state):
+        now = time.time()
+        state = copy.deepcopy(state)
+        with self._lock:
+            self._sessions[interview_id] = (now + self.ttl, state)
+            self._sessions.move_to_end(interview_id)
+
+            # Oldest-accessed sessions sit at the front: expire, then cap size
+            while self._sessions:
+                oldest_id, (expires_at, _) = next(iter(self._sessions.items()))
+                if expires_at >= now and len(self._sessions) <= self.max_sessions:
+                    break
+                del self._sessions[oldest_id]
+
+    def delete(self, interview_id):
+        with self._lock:
+            self._sessions.pop(interview_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Serialized states in a shared SQLite table; visible to every worker"""
+
+    PURGE_EVERY = 200
+
+    def __init__(self, path=DB_PATH, ttl=SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._puts = 0
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    state BLOB,
+                    expires_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, interview_id):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT state, expires_at FROM sessions WHERE id = ?", (interview_id,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return deserialize_state(row[0])
+
+    def put(self, interview_id, state):
+        blob = serialize_state(state)
+        now = time.time()
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, expires_at) VALUES (?, ?, ?)",
+                (interview_id, blob, now + self.ttl)
+            )
+            self._puts += 1
+            if self._puts % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+            conn.commit()
+
+    def delete(self, interview_id):
+        with self._lock:
+            conn = self._db()
+            conn.execute("DELETE FROM sessions WHERE id = ?", (interview_id,))
+            conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db().execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at >= ?", (time.time(),)
+            ).fetchone()[0]
+
+
+def create_session_store(kind=SESSION_STORE) -> SessionStore:
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    if kind == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_STORE backend: {kind}")
@@ -0,0 +1,382 @@
+"""
+Structured LLM output: typed schemas, local JSON repair and targeted re-asks.
+
+Every JSON-producing call site requests Groq's JSON mode (which only returns
+objects, so lists are wrapped: {"questions": [...]}) and then goes through
+parse_structured():
+
+1. json.loads, or a local repair of near-valid JSON (fences, prose around
+   the payload, trailing commas, Python literals, truncated output).
+2. Validation against the pydantic schema. List schemas are validated item
+   by item so one bad question doesn't discard the other four.
+3. Only what is still invalid is sent back to the model with the
+   validation errors (not the original prompt), at most
+   STRUCTURED_MAX_REASKS times.
+"""
+import ast
+import json
+import os
+import re
+from typing import Any, List, Literal
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError, field_validator
+
+from metrics import span
+
+STRUCTURED_MAX_REASKS = int(os.getenv("STRUCTURED_MAX_REASKS", "1"))
+# Longest previous output echoed back in a re-ask prompt
+REASK_MAX_CHARS = 6000
+
+JSON_MODE = {"type": "json_object"}
+
+stats = {
+    "parsed": 0,        # valid on the first try
+    "repaired": 0,      # needed local repair, no extra call
+    "reasked": 0,       # re-ask calls made
+    "items_dropped": 0,  # list items still invalid after re-asking
+    "failed": 0,        # nothing usable
+}
+
+
+class StructuredOutputError(ValueError):
+    """LLM output could not be turned into the requested schema"""
+
+
+# -------- Schemas -------- #
+
+class Project(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    name: str = ""
+    tech: List[str] | str = []
+    description: str = ""
+
+
+class ResumeProfile(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    name: str = ""
+    skills: List[str] = []
+    projects: List[Project] = []
+    experience: Any = None
+
+    @field_validator("skills", mode="before")
+    @classmethod
+    def _split_skills(cls, value):
+        # "Python, SQL" -> ["Python", "SQL"]
+        if isinstance(value, str):
+            return [s.strip() for s in value.split(",") if s.strip()]
+        return value
+
+
+class Question(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    question: str = Field(min_length=1)
+    type: Literal["conceptual", "coding"]
+    hint: str = ""
+    skill: str | None = None
+
+    @field_validator("type", mode="before")
+    @classmethod
+    def _normalize_type(cls, value):
+        return value.strip().lower() if isinstance(value, str) else value
+
+
+class ItemList(BaseModel):
+    """A reply wrapping one list; `dropped` counts items no re-ask could fix"""
+    _dropped: int = PrivateAttr(default=0)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+
+class QuestionList(ItemList):
+    questions: List[Question]
+
+
+class Evaluation(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    correctness: int = Field(ge=0, le=100)
+    depth: int = Field(ge=0, le=100)
+    clarity: int = Field(ge=0, le=100)
+    feedback: str = ""
+
+    @field_validator("correctness", "depth", "clarity", mode="before")
+    @classmethod
+    def _score(cls, value):
+        # "85", 85.4 and "85/100" all mean 85
+        if isinstance(value, str):
+            match = re.match(r"\s*(\d+(\.\d+)?)", value)
+            value = float(match.group(1)) if match else value
+        if isinstance(value, float):
+            value = round(value)
+        return value
+
+
+class IndexedEvaluation(Evaluation):
+    index: int | None = None  # position in the batch; missing means "in order"
+
+
+class EvaluationList(ItemList):
+    evaluations: List[IndexedEvaluation]
+
+
+class GradingContext(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    ideal_answer: str = Field(min_length=1)
+    rubric: List[str] = []
+    hints: List[str] = []
+
+
+# -------- Local repair -------- #
+
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _outside_strings(text, fn):
+    """Apply fn to the parts of a JSON text that are not inside string literals"""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    return "".join(part if i % 2 else fn(part) for i, part in enumerate(parts))
+
+
+def _close_truncated(text):
+    """Close an unterminated string and any open brackets (output cut off mid-way)"""
+    stack = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+        elif ch in "]}" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = re.sub(r'[,:]\s*$', "", text.rstrip())
+    # A dangling key ({"a": 1, "b") can't be completed: drop it
+    text = re.sub(r',\s*"[^"]*"\s*$', "", text)
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> str:
+    """Best-effort cleanup of near-valid JSON. The result may still not parse."""
+    text = _FENCE.sub("", text).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if starts:
+        start = min(starts)
+        end = max(text.rfind("}"), text.rfind("]"))
+        # Drop prose before the payload; after it only if the payload looks closed
+        text = text[start:end + 1] if end > start else text[start:]
+    text = _outside_strings(text, lambda part: _TRAILING_COMMA.sub(r"\1", part))
+    text = _outside_strings(text, lambda part: re.sub(
+        r"\b(True|False|None)\b", lambda m: _PY_LITERALS[m.group(1)], part
+    ))
+    return _close_truncated(text)
+
+
+def loads_lenient(text: str):
+    """json.loads, falling back to repair_json(); returns (data, repaired)"""
+    try:
+        return json.loads(text), False
+    except (TypeError, ValueError):
+        pass
+    repaired = repair_json(text or "")
+    try:
+        return json.loads(repaired), True
+    except ValueError as e:
+        error = e
+    # Python-style dicts ({'a': 1}) are a common near-miss
+    try:
+        data = ast.literal_eval(repaired)
+        if isinstance(data, (dict, list)):
+            return data, True
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+    raise StructuredOutputError(f"Not valid JSON: {error}") from error
+
+
+# -------- Validation + re-ask -------- #
+
+def is_valid(raw: str, schema) -> bool:
+    """raw validates against schema as returned, with no repair or re-ask (safe to cache)"""
+    try:
+        schema.model_validate_json(raw)
+    except (ValidationError, ValueError):
+        return False
+    return True
+
+
+def _list_field(schema):
+    """(field name, item model) when the schema is a wrapper around one list"""
+    fields = schema.model_fields
+    if len(fields) == 1:
+        name, info = next(iter(fields.items()))
+        args = getattr(info.annotation, "__args__", ())
+        if args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+            return name, args[0]
+    return None, None
+
+
+def _unwrap(data, field):
+    """Accept a bare list, or the list under a different key, for a list schema"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        if isinstance(data.get(field), list):
+            return data[field]
+        lists = [value for value in data.values() if isinstance(value, list)]
+        if len(lists) == 1:
+            return lists[0]
+    raise StructuredOutputError(f'Expected an object with a "{field}" list')
+
+
+def _errors(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc']) or 'root'}: {e['msg']}" for e in error.errors()
+    )
+
+
+def _schema_hint(model) -> str:
+    return json.dumps(model.model_json_schema(), separators=(",", ":"))
+
+
+FIX_JSON_PROMPT = """Your previous reply could not be used: {errors}
+
+Previous reply:
+{output}
+
+Return ONLY corrected JSON matching this JSON schema:
+{schema}"""
+
+FIX_ITEMS_PROMPT = """These items from your previous JSON reply are invalid:
+{items}
+
+Errors:
+{errors}
+
+Return ONLY a JSON object {{"{field}": [...]}} with the corrected items, in the same order,
+each matching this JSON schema:
+{schema}"""
+
+
+async def parse_structured(raw: str, schema, reask=None, max_reasks=None):
+    """
+    Validated `schema` instance from raw LLM output.
+    reask(prompt) -> raw text is an async callable used for targeted
+    corrections; without it only local repair is attempted.
+    Raises StructuredOutputError when nothing usable is left.
+    """
+    max_reasks = STRUCTURED_MAX_REASKS if max_reasks is None else max_reasks
+    if reask is None:
+        max_reasks = 0
+    field, item_model = _list_field(schema)
+    reasks = 0
+
+    # 1. Syntax: local repair, then (if allowed) one re-ask with the broken output
+    while True:
+        try:
+            with span("json.parse"):
+                data, repaired = loads_lenient(raw)
+                if field:
+                    data = _unwrap(data, field)
+            break
+        except StructuredOutputError as e:
+            if reasks >= max_reasks:
+                stats["failed"] += 1
+                raise
+            reasks += 1
+            stats["reasked"] += 1
+            raw = await reask(FIX_JSON_PROMPT.format(
+                errors=e, output=(raw or "")[:REASK_MAX_CHARS], schema=_schema_hint(schema)
+            ))
+
+    if field:
+        return await _validate_items(data, schema, field, item_model, repaired, reask, max_reasks - reasks)
+    return await _validate_object(data, schema, repaired, reask, max_reasks - reasks)
+
+
+async def _validate_object(data, schema, repaired, reask, reasks_left):
+    try:
+        result = schema.model_validate(data)
+        stats["repaired" if repaired else "parsed"] += 1
+        return result
+    except ValidationError as e:
+        error = e
+
+    while reasks_left > 0:
+        reasks_left -= 1
+        stats["reasked"] += 1
+        raw = await reask(FIX_JSON_PROMPT.format(
+            errors=_errors(error), output=json.dumps(data)[:REASK_MAX_CHARS], schema=_schema_hint(schema)
+        ))
+        try:
+            data, _ = loads_lenient(raw)
+        except StructuredOutputError:
+            stats["failed"] += 1
+            raise
+        try:
+            return schema.model_validate(data)
+        except ValidationError as e:
+            error = e
+
+    stats["failed"] += 1
+    raise StructuredOutputError(_errors(error))
+
+
+async def _validate_items(items, schema, field, item_model, repaired, reask, reasks_left):
+    valid = {}
+    invalid = {}
+    for i, item in enumerate(items):
+        try:
+            valid[i] = item_model.model_validate(item)
+        except ValidationError as e:
+            invalid[i] = (item, e)
+
+    if not invalid:
+        stats["repaired" if repaired else "parsed"] += 1
+
+    # Re-ask for the broken items only, matched back by position
+    while invalid and reasks_left > 0:
+        reasks_left -= 1
+        stats["reasked"] += 1
+        positions = sorted(invalid)
+        raw = await reask(FIX_ITEMS_PROMPT.format(
+            items=json.dumps([invalid[i][0] for i in positions])[:REASK_MAX_CHARS],
+            errors="\n".join(f"- item {n}: {_errors(invalid[i][1])}" for n, i in enumerate(positions)),
+            field=field,
+            schema=_schema_hint(item_model)
+        ))
+        try:
+            fixed, _ = loads_lenient(raw)
+            fixed = _unwrap(fixed, field)
+        except StructuredOutputError:
+            break
+        for i, item in zip(positions, fixed):
+            try:
+                valid[i] = item_model.model_validate(item)
+                del invalid[i]
+            except ValidationError as e:
+                invalid[i] = (item, e)
+
+    stats["items_dropped"] += len(invalid)
+    if not valid:
+        stats["failed"] += 1
+        raise StructuredOutputError(f'No valid "{field}" items')
+    result = schema.model_validate({field: [valid[i] for i in sorted(valid)]})
+    if isinstance(result, ItemList):
+        # Later items moved up: callers that match items by position must know
+        result._dropped = len(invalid)
+    return result
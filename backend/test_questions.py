@@ -1,3 +1,4 @@
+import asyncio
 from question_engine import generate_questions
 import json
 
@@ -10,5 +11,5 @@ profile = {
     ]
 }
 
-questions = generate_questions(json.dumps(profile))
+questions = asyncio.run(generate_questions(json.dumps(profile)))
 print(questions)
@@ -0,0 +1,167 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import db
+import interview_agent
+import llm
+import main
+from llm import LLMScheduler
+from model_router import ModelRouter
+from session_store import MemorySessionStore
+
+QUESTION = {"question": "How does Python manage memory?", "type": "conceptual", "hint": "", "skill": "Python"}
+ANSWER = "Python uses reference counting plus a cyclic garbage collector for memory management"
+# The marker is split across chunks so the held-back tail is exercised
+CHUNKS = ["Clear answer", " on refcounting. SCO", 'RES: {"correctness": 88, ', '"depth": 77, "clarity": 66}']
+
+
+class FakeLLM:
+    def __init__(self, chunks, then=None):
+        self.chunks = chunks
+        self.then = then
+
+    async def astream(self, messages):
+        for content in self.chunks:
+            yield SimpleNamespace(content=content, usage_metadata=None)
+        if self.then is not None:
+            await self.then()
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    db.stop_writer()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "interviews.db"))
+    db.init_db()
+    router = ModelRouter(large="large", small="small")
+    monkeypatch.setattr(llm, "router", router)
+    monkeypatch.setattr(interview_agent, "router", router)
+    monkeypatch.setattr(llm, "_scheduler", LLMScheduler())
+    monkeypatch.setattr(main, "sessions", MemorySessionStore())
+    monkeypatch.setattr(main.agent, "_prefetch_grading_context", lambda state: None)
+
+    async def no_context(state):
+        return {}
+
+    monkeypatch.setattr(main.agent, "_peek_grading_context", no_context)
+    main.sessions.put("stream-test", {
+        "interview_id": "stream-test", "profile": {}, "questions": [QUESTION, QUESTION],
+        "current_question_idx": 0, "answers": [], "scores": [], "stage": "generate_questions",
+        "next_question": QUESTION, "evaluation_result": None, "question_ids": ["q0", "q1"],
+        "grading_mode": "live",
+    })
+    yield main.app
+    db.stop_writer()
+
+
+def _use_llm(monkeypatch, fake):
+    monkeypatch.setattr(main.agent, "_llm", lambda model, json_mode=False: fake)
+
+
+def _body():
+    return {"interview_id": "stream-test", "question_id": 0, "answer": ANSWER}
+
+
+def _events(text):
+    events = []
+    for frame in text.strip().split("\n\n"):
+        kind, data = frame.split("\n")
+        events.append((kind[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def _post(app):
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/submit-answer/stream", json=_body())
+
+    return asyncio.run(post())
+
+
+def test_feedback_streams_without_the_score_marker(app, monkeypatch):
+    _use_llm(monkeypatch, FakeLLM(CHUNKS))
+    response = _post(app)
+
+    assert response.status_code == 200
+    events = _events(response.text)
+    tokens = "".join(data for kind, data in events if kind == "token")
+    assert tokens.strip() == "Clear answer on refcounting."
+    assert "SCO" not in tokens
+    assert events[-1][0] == "score"
+    score = events[-1][1]["last_score"]
+    assert (score["correctness"], score["depth"], score["clarity"]) == (88, 77, 66)
+    assert score["feedback"] == "Clear answer on refcounting."
+    state = main.sessions.get("stream-test")
+    assert (state["answers"], state["current_question_idx"]) == ([ANSWER], 1)
+    assert llm.get_scheduler().stats()["inflight"] == 0
+
+
+def test_full_queue_is_a_429_before_the_stream_starts(app, monkeypatch):
+    _use_llm(monkeypatch, FakeLLM(CHUNKS))
+    monkeypatch.setattr(llm, "_scheduler", LLMScheduler(max_queue=0))
+    response = _post(app)
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert main.sessions.get("stream-test")["answers"] == []
+
+
+def test_failure_mid_stream_ends_with_an_error_event(app, monkeypatch):
+    async def fail():
+        raise llm.GroqAPIError(503, "unavailable")
+
+    _use_llm(monkeypatch, FakeLLM(CHUNKS[:1], then=fail))
+    response = _post(app)
+
+    assert response.status_code == 200
+    events = _events(response.text)
+    # The tail that could begin the marker is held back, then never sent
+    assert events[0] == ("token", "Clear ")
+    assert events[-1][0] == "error" and events[-1][1]["status"] == 500
+    state = main.sessions.get("stream-test")
+    assert (state["answers"], state["current_question_idx"]) == ([], 0)
+    assert llm.get_scheduler().stats()["inflight"] == 0
+
+
+def test_client_disconnect_mid_stream_frees_the_slot(app, monkeypatch):
+    _use_llm(monkeypatch, FakeLLM(CHUNKS[:2], then=lambda: asyncio.Event().wait()))
+    body = json.dumps(_body()).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/submit-answer/stream", "raw_path": b"/submit-answer/stream",
+        "root_path": "", "query_string": b"", "client": ("test", 1), "server": ("test", 80),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+
+    async def scenario():
+        first_token = asyncio.Event()
+        incoming = [{"type": "http.request", "body": body, "more_body": False}]
+        sent = []
+
+        async def receive():
+            if incoming:
+                return incoming.pop(0)
+            await first_token.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                # The slot is already held when the response starts
+                assert llm.get_scheduler().stats()["inflight"] == 1
+            sent.append(message)
+            if message["type"] == "http.response.body" and b"event: token" in message.get("body", b""):
+                first_token.set()
+
+        await asyncio.wait_for(app(scope, receive, send), 5)
+        return sent
+
+    sent = asyncio.run(scenario())
+    assert sent[0]["status"] == 200
+    assert not any(b"event: score" in message.get("body", b"") for message in sent)
+    state = main.sessions.get("stream-test")
+    assert (state["answers"], state["current_question_idx"]) == ([], 0)
+    assert llm.get_scheduler().stats()["inflight"] == 0
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+import bulk_ingest
+import db
+from resume_cache import ResumeCache
+
+RESUME_TEXT = "Jane Doe\nSkills\nPython, SQL, FastAPI\nExperience\n" + "Built data pipelines at Acme. " * 10
+
+
+@pytest.fixture
+def bulk(tmp_path, monkeypatch):
+    db.stop_writer()
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "interviews.db"))
+    db.init_db()
+    monkeypatch.setattr(bulk_ingest, "BULK_DIR", str(tmp_path / "bulk"))
+    monkeypatch.setattr(bulk_ingest, "resume_cache", ResumeCache(path=str(tmp_path / "rc.db")))
+
+    async def extract(path):
+        with open(path) as f:
+            return [f.read()]
+
+    async def parse(text, priority="default"):
+        return {"name": text.split("\n")[0]}
+
+    monkeypatch.setattr(bulk_ingest, "extract_pages_async", extract)
+    monkeypatch.setattr(bulk_ingest, "parse_resume", parse)
+    yield bulk_ingest
+    db.stop_writer()
+
+
+def _write(job_id, contents):
+    os.makedirs(os.path.join(bulk_ingest.BULK_DIR, job_id), exist_ok=True)
+    for index, text in enumerate(contents):
+        with open(bulk_ingest.item_path(job_id, index), "w") as f:
+            f.write(text)
+    return [f"{index}.pdf" for index in range(len(contents))]
+
+
+async def _read(stream):
+    return [json.loads(line) async for line in stream]
+
+
+def test_failing_item_is_reported_and_its_file_kept(bulk):
+    filenames = _write("job-fail", [RESUME_TEXT, "too short"])
+
+    async def run():
+        bulk.start_job("job-fail", filenames)
+        return await _read(bulk.stream_results("job-fail"))
+
+    lines = asyncio.run(run())
+    items = {line["index"]: line for line in lines if line["event"] == "item"}
+    assert items[0]["status"] == "done" and items[0]["profile"] == {"name": "Jane Doe"}
+    assert items[1]["status"] == "error" and "meaningful text" in items[1]["error"]
+    assert lines[-1]["event"] == "done" and lines[-1]["status"] == "completed"
+    assert not os.path.exists(bulk.item_path("job-fail", 0))
+    assert os.path.exists(bulk.item_path("job-fail", 1))
+
+
+def test_interrupted_job_resumes_from_pending_items(bulk):
+    filenames = _write("job-resume", [RESUME_TEXT, RESUME_TEXT.replace("Jane", "John")])
+    # Recorded but never run here: what a restart mid-job leaves behind
+    db.create_bulk_job("job-resume", filenames)
+
+    async def run():
+        assert (await bulk.job_status("job-resume"))["status"] == "interrupted"
+        assert await bulk.resume_job("job-resume")
+        return await _read(bulk.stream_results("job-resume"))
+
+    lines = asyncio.run(run())
+    names = sorted(line["profile"]["name"] for line in lines if line["event"] == "item")
+    assert names == ["Jane Doe", "John Doe"]
+    assert lines[-1]["status"] == "completed"
+    # A reader that saw seq 1 only gets the rest
+    rest = asyncio.run(_read(bulk.stream_results("job-resume", after=1)))
+    assert [line["seq"] for line in rest if line["event"] == "item"] == [2]
+
+
+def test_sweep_removes_only_idle_job_files(bulk):
+    _write("old-job", ["leftover"])
+    _write("new-job", ["leftover"])
+    old = time.time() - bulk.BULK_FILE_TTL - 60
+    for path in (bulk.item_path("old-job", 0), os.path.dirname(bulk.item_path("old-job", 0))):
+        os.utime(path, (old, old))
+
+    assert bulk.sweep() == 1
+    assert not os.path.exists(os.path.join(bulk.BULK_DIR, "old-job"))
+    assert os.path.exists(bulk.item_path("new-job", 0))
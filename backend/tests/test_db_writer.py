@@ -0,0 +1,29 @@
+import threading
+import time
+
+import db
+
+
+def test_flush_returns_while_writes_keep_arriving(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "interviews.db"))
+    db.init_db()
+    writer = db._WriteBehind()
+    stop = threading.Event()
+
+    def keep_writing():
+        while not stop.is_set():
+            writer.submit("INSERT INTO resumes (id, profile, created_at) VALUES (?, '{}', '')", (str(time.time_ns()),))
+
+    writer.submit("INSERT INTO resumes (id, profile, created_at) VALUES ('first', '{}', '')", ())
+    producer = threading.Thread(target=keep_writing, daemon=True)
+    producer.start()
+    try:
+        done = threading.Event()
+        threading.Thread(target=lambda: (writer.flush(), done.set()), daemon=True).start()
+        assert done.wait(5)
+        with db.get_db() as conn:
+            assert conn.execute("SELECT 1 FROM resumes WHERE id = 'first'").fetchone()
+    finally:
+        stop.set()
+        producer.join()
+        writer.stop()
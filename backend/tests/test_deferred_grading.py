@@ -0,0 +1,107 @@
+import asyncio
+import copy
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from interview_agent import InterviewAgent
+from llm import LLMOverloaded
+from prefetch import prefetcher
+
+
+def _state():
+    questions = [{"question": f"Q{i}", "type": "conceptual", "hint": "", "skill": "Python"} for i in range(2)]
+    return {
+        "interview_id": "t", "profile": {}, "questions": questions, "current_question_idx": 1,
+        "answers": ["first"], "scores": [], "stage": "get_next_question", "next_question": questions[1],
+        "evaluation_result": None, "question_ids": ["q0", "q1"], "grading_mode": "deferred",
+    }
+
+
+def test_failed_batch_grading_leaves_last_question_open(monkeypatch):
+    agent = InterviewAgent()
+    state = _state()
+    monkeypatch.setattr(agent, "_prefetch_grading_context", lambda state: None)
+
+    async def overloaded(state):
+        raise LLMOverloaded("busy")
+
+    monkeypatch.setattr(agent, "grade_batch", overloaded)
+    with pytest.raises(LLMOverloaded):
+        asyncio.run(agent.submit_answer(state, "second"))
+    assert state["current_question_idx"] == 1
+    assert state["answers"] == ["first"]
+
+    async def graded(state):
+        state["scores"] = [{"correctness": 80, "depth": 70, "clarity": 90, "feedback": ""}] * 2
+        state["evaluation_result"] = state["scores"][-1]
+        return state
+
+    monkeypatch.setattr(agent, "grade_batch", graded)
+    result = asyncio.run(agent.submit_answer(state, "second"))
+    assert result["status"] == "completed"
+    assert state["answers"] == ["first", "second"]
+
+
+def test_dropped_batch_item_does_not_shift_later_scores(monkeypatch):
+    agent = InterviewAgent()
+    chunk = [(n, ({"question": f"Q{n}", "type": "conceptual"}, f"answer {n}")) for n in range(3)]
+
+    def evaluation(score):
+        return {"correctness": score, "depth": score, "clarity": score, "feedback": f"f{score}"}
+
+    async def ainvoke(call, messages, priority="default", json_mode=False):
+        prompt = messages[-1].content
+        if call == "grade_batch_reask":
+            content = '{"evaluations": [{"correctness": "still bad"}]}'
+        elif prompt.count("Answer:") > 1:
+            # Unindexed, in order, with the middle item unusable
+            content = json.dumps({"evaluations": [evaluation(10), {"correctness": "high"}, evaluation(30)]})
+        else:
+            n = int(prompt.split("Answer: answer ")[1][0])
+            content = json.dumps({"evaluations": [evaluation(90 + n)]})
+        return SimpleNamespace(content=content)
+
+    monkeypatch.setattr(agent, "_ainvoke", ainvoke)
+    scores = asyncio.run(agent._grade_chunk(chunk))
+    assert [s["correctness"] for s in scores] == [90, 91, 92]
+
+
+def test_prefetched_context_survives_a_failed_grading_call(monkeypatch):
+    agent = InterviewAgent()
+    question = {"question": "How does Python manage memory?", "type": "conceptual", "hint": "", "skill": "Python"}
+    answer = "Python uses reference counting plus a cyclic garbage collector for memory management"
+    reference = "CPython frees objects by reference counting and a generational garbage collector"
+    state = {
+        "interview_id": "prefetch-test", "profile": {}, "questions": [question], "current_question_idx": 0,
+        "answers": [answer], "scores": [], "stage": "evaluate_answer", "next_question": question,
+        "evaluation_result": None, "question_ids": ["q0"], "grading_mode": "live",
+    }
+    key = ("prefetch-test", 0)
+    prompts = []
+    generated = []
+
+    async def context():
+        generated.append(1)
+        return {"ideal_answer": reference}
+
+    async def ainvoke(call, messages, priority="default", json_mode=False):
+        prompts.append(messages[-1].content)
+        if len(prompts) == 1:
+            raise LLMOverloaded("busy")
+        return SimpleNamespace(content='{"correctness": 80, "depth": 70, "clarity": 90, "feedback": "ok"}')
+
+    monkeypatch.setattr(agent, "_ainvoke", ainvoke)
+
+    async def scenario():
+        prefetcher.schedule(key, context)
+        with pytest.raises(LLMOverloaded):
+            await agent._evaluate_answer_node(copy.deepcopy(state))
+        return await agent._evaluate_answer_node(state)
+
+    result = asyncio.run(scenario())
+    assert result["scores"][0]["correctness"] == 80
+    assert len(generated) == 1
+    assert reference in prompts[0] and reference in prompts[1]
+    assert key not in prefetcher._entries
@@ -0,0 +1,30 @@
+import asyncio
+
+import jobs
+
+
+def test_job_is_visible_from_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_POLL_INTERVAL", 0.01)
+    path = str(tmp_path / "interviews.db")
+    owner = jobs.JobRunner(workers=1, store=jobs.SQLiteJobStore(path))
+    other = jobs.JobRunner(workers=1, store=jobs.SQLiteJobStore(path))
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return {"answer": 42}
+
+        job = await owner.submit("test", work)
+        seen = await other.get(job.id)
+        assert seen.snapshot()["status"] in ("queued", "running")
+        release.set()
+        await seen.wait(5)
+        await owner.stop()
+        return seen.snapshot(), await jobs.JobRunner(store=None).get(job.id)
+
+    snapshot, unshared = asyncio.run(scenario())
+    assert snapshot["status"] == "done"
+    assert snapshot["result"] == {"answer": 42}
+    assert unshared is None
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from llm import LANE_MAX_WAIT, LLMOverloaded, LLMScheduler
+
+
+async def _until(condition):
+    for _ in range(1000):
+        if condition():
+            return
+        await asyncio.sleep(0)
+    raise AssertionError("condition never held")
+
+
+def _queued(scheduler):
+    return sum(scheduler.stats()["queued"].values())
+
+
+def test_waiters_are_granted_by_priority_then_arrival():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1)
+        release = await scheduler.hold("interactive")
+        granted = []
+
+        async def call(lane, name):
+            await scheduler.run(lambda: asyncio.sleep(0, granted.append(name)), priority=lane)
+
+        # Submitted lowest priority first so arrival order alone would be wrong
+        lanes = [("background", "bg"), ("default", "d1"), ("interactive", "i"), ("default", "d2")]
+        tasks = []
+        for lane, name in lanes:
+            tasks.append(asyncio.create_task(call(lane, name)))
+            await _until(lambda: _queued(scheduler) == len(tasks))
+        release()
+        await asyncio.gather(*tasks)
+        scheduler.close()
+        return granted
+
+    assert asyncio.run(scenario()) == ["i", "d1", "d2", "bg"]
+
+
+def test_full_queue_is_refused_with_retry_after():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+        release = await scheduler.hold()
+        waiter = asyncio.create_task(scheduler.hold())
+        await _until(lambda: _queued(scheduler) == 1)
+        with pytest.raises(LLMOverloaded) as refused:
+            await scheduler.hold()
+        release()
+        (await waiter)()
+        scheduler.close()
+        return refused.value, scheduler.stats()
+
+    refused, stats = asyncio.run(scenario())
+    assert refused.retry_after >= 1
+    assert stats["rejected"] == 1 and stats["inflight"] == 0
+
+
+def test_call_that_cannot_start_within_its_lane_budget_is_refused():
+    async def scenario():
+        # An empty token bucket refilling at 60/minute needs a minute for 60 tokens
+        scheduler = LLMScheduler(tpm=60)
+        scheduler.tokens.consume(60)
+        with pytest.raises(LLMOverloaded) as refused:
+            await scheduler.hold("interactive", tokens=60)
+        return refused.value, scheduler.stats()
+
+    refused, stats = asyncio.run(scenario())
+    assert refused.retry_after > LANE_MAX_WAIT["interactive"]
+    assert stats["rejected"] == 1 and stats["queued"]["interactive"] == 0
+
+
+def test_cancelled_hold_gives_up_its_place_and_release_is_idempotent():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+        release = await scheduler.hold()
+        waiter = asyncio.create_task(scheduler.hold())
+        await _until(lambda: _queued(scheduler) == 1)
+        # Let the dispatcher go idle so only the cancellation itself can free the place
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The cancelled waiter no longer counts against max_queue
+        assert _queued(scheduler) == 0
+        queued_again = asyncio.create_task(scheduler.hold())
+        await _until(lambda: _queued(scheduler) == 1)
+
+        release()
+        release()
+        next_release = await asyncio.wait_for(queued_again, 5)
+        assert scheduler.stats()["inflight"] == 1
+        next_release()
+        next_release()
+        scheduler.close()
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["inflight"] == 0 and stats["dispatched"] == 2
@@ -0,0 +1,25 @@
+import asyncio
+import threading
+
+from metrics import Registry
+
+
+def test_blocking_collectors_run_off_the_event_loop_thread():
+    registry = Registry()
+    threads = {}
+
+    def sqlite_stats():
+        threads["blocking"] = threading.current_thread()
+        return {"entries": 3}
+
+    def memory_stats():
+        threads["inline"] = threading.current_thread()
+        return {"pending": 1}
+
+    registry.register_collector("cache", sqlite_stats, blocking=True)
+    registry.register_collector("prefetch", memory_stats)
+    text = asyncio.run(registry.render_async())
+
+    assert "cache_entries 3" in text and "prefetch_pending 1" in text
+    assert threads["inline"] is threading.main_thread()
+    assert threads["blocking"] is not threading.main_thread()
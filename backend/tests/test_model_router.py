@@ -0,0 +1,71 @@
+import asyncio
+import types
+
+import pytest
+
+import llm
+import model_router
+from llm import GroqAPIError
+from model_router import ModelRouter, ROUTER_MIN_SAMPLES, ROUTER_WINDOW_SECONDS
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(model_router, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def router(monkeypatch, clock):
+    router = ModelRouter(large="large", small="small")
+    monkeypatch.setattr(llm, "router", router)
+    monkeypatch.setattr(llm, "_scheduler", None)
+    return router
+
+
+def test_errors_in_window_reroute_until_they_age_out(router, clock):
+    assert router.candidates("evaluate_answer") == ["large", "small"]
+    for _ in range(ROUTER_MIN_SAMPLES):
+        router.record_error("large", "503")
+    assert router.candidates("evaluate_answer") == ["small", "large"]
+    assert router.counters["rerouted"] == 1
+
+    clock.now += ROUTER_WINDOW_SECONDS + 1
+    assert router.candidates("evaluate_answer") == ["large", "small"]
+
+
+def test_429_cools_the_model_down_for_retry_after(router, clock):
+    router.record_error("large", "429", retry_after=5)
+    assert router.candidates("evaluate_answer")[0] == "small"
+    clock.now += 6
+    assert router.candidates("evaluate_answer")[0] == "large"
+
+
+def test_retryable_error_fails_over_to_the_other_model(router):
+    tried = []
+
+    async def invoke(model):
+        tried.append(model)
+        if model == "large":
+            raise GroqAPIError(503, "unavailable")
+        return "ok"
+
+    assert asyncio.run(llm.call_routed("evaluate_answer", invoke)) == "ok"
+    assert tried == ["large", "small"]
+    assert router.counters["failovers"] == 1
+    assert router.stats()["models"]["large"]["errors"] == 1
+
+
+def test_bad_request_does_not_mark_the_model_unhealthy(router):
+    async def invoke(model):
+        raise GroqAPIError(400, "json_validate_failed")
+
+    async def calls():
+        for _ in range(ROUTER_MIN_SAMPLES * 2):
+            with pytest.raises(GroqAPIError):
+                await llm.call_routed("evaluate_answer", invoke)
+
+    asyncio.run(calls())
+    assert router.stats()["models"]["large"]["errors"] == 0
+    assert router.candidates("evaluate_answer")[0] == "large"
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pdf_extractor
+from pdf_extractor import ExtractionTimeout
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """One worker; threads stand in for processes"""
+    monkeypatch.setattr(pdf_extractor, "_pool", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(pdf_extractor, "_slots", asyncio.Semaphore(1))
+    monkeypatch.setattr(pdf_extractor, "EXTRACT_TIMEOUT", 0.5)
+    yield
+    pdf_extractor._pool.shutdown(wait=True)
+
+
+def _slow_head(seconds):
+    def head(path):
+        time.sleep(seconds)
+        return 1, [f"text of {path}"]
+    return head
+
+
+def test_waiting_for_a_worker_does_not_count_toward_the_timeout(pool, monkeypatch):
+    # Three files, one worker: the last one waits ~0.6 s before it starts
+    monkeypatch.setattr(pdf_extractor, "_extract_head", _slow_head(0.3))
+
+    async def extract_all():
+        return await asyncio.gather(*[pdf_extractor.extract_pages_async(f"f{n}") for n in range(3)])
+
+    assert asyncio.run(extract_all()) == [["text of f0"], ["text of f1"], ["text of f2"]]
+
+
+def test_a_task_running_past_the_timeout_fails(pool, monkeypatch):
+    monkeypatch.setattr(pdf_extractor, "_extract_head", _slow_head(0.8))
+    with pytest.raises(ExtractionTimeout):
+        asyncio.run(pdf_extractor.extract_pages_async("slow"))
@@ -0,0 +1,24 @@
+import pytest
+
+from prescorer import classify, features, says_idk
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("What is the difference between pass by value and pass by reference?",
+     "Pass by reference passes the address of the variable, so the callee can modify the caller's object."),
+    ("How does a skip list work?", "A skip list layers linked lists with express lanes so search is O(log n) on average."),
+    ("What does the pass statement do in Python?", "pass is a no-op placeholder where a statement is syntactically required."),
+    ("What is a mutex?", "Not sure, but a mutex locks shared state so only one thread uses it at a time."),
+])
+def test_technical_answers_containing_idk_words_go_to_the_grader(question, answer):
+    assert not says_idk(answer)
+    assert classify(features(question, answer)) is None
+
+
+@pytest.mark.parametrize("answer", [
+    "I don't know", "Not sure, sorry.", "idk, I never used hash maps much", "pass", "Skip.",
+    "Honestly no idea, sorry.",
+])
+def test_whole_answer_idk_is_short_circuited(answer):
+    assert says_idk(answer)
+    assert classify(features("Explain how a hash map handles collisions.", answer)) == "idk"
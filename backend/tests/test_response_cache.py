@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+
+import llm
+from response_cache import ResponseCache
+from structured import Evaluation
+
+
+def _client(replies, seen):
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"choices": [{"message": {"content": replies[len(seen) - 1]}}]})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _run(monkeypatch, tmp_path, replies):
+    seen = []
+    monkeypatch.setattr(llm, "response_cache", ResponseCache(path=str(tmp_path / "llm.db"), enabled=True))
+    monkeypatch.setattr(llm, "_client", _client(replies, seen))
+    monkeypatch.setattr(llm, "_scheduler", None)
+
+    async def twice():
+        first = await llm.generate_json("s", "u", call="evaluate_answer", schema=Evaluation)
+        second = await llm.generate_json("s", "u", call="evaluate_answer", schema=Evaluation)
+        return first, second
+
+    return asyncio.run(twice()), seen
+
+
+def test_valid_reply_is_replayed_from_cache(monkeypatch, tmp_path):
+    valid = '{"correctness": 80, "depth": 70, "clarity": 90, "feedback": "ok"}'
+    (first, second), seen = _run(monkeypatch, tmp_path, [valid])
+    assert first == second == valid
+    assert len(seen) == 1
+
+
+def test_unusable_reply_is_not_cached(monkeypatch, tmp_path):
+    broken = '{"correctness": "high"'
+    valid = '{"correctness": 80, "depth": 70, "clarity": 90, "feedback": "ok"}'
+    (first, second), seen = _run(monkeypatch, tmp_path, [broken, valid])
+    assert (first, second) == (broken, valid)
+    assert len(seen) == 2
+
+
+def test_json_validate_failed_returns_rejected_generation(monkeypatch, tmp_path):
+    rejected = '{"correctness": 80, "depth": 70, "clarity": 90, "feedback": "ok",}'
+
+    def handler(request):
+        return httpx.Response(400, json={"error": {
+            "message": "Failed to generate JSON", "type": "invalid_request_error",
+            "code": "json_validate_failed", "failed_generation": rejected,
+        }})
+
+    monkeypatch.setattr(llm, "response_cache", ResponseCache(path=str(tmp_path / "llm.db"), enabled=True))
+    monkeypatch.setattr(llm, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(llm, "_scheduler", None)
+    reply = asyncio.run(llm.generate_json("s", "u", call="evaluate_answer", schema=Evaluation))
+    assert reply == rejected
+    assert llm.response_cache.stats()["entries"] == 0
@@ -0,0 +1,58 @@
+import pytest
+
+import session_store
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore(max_sessions=3, ttl=60)
+    return SQLiteSessionStore(path=str(tmp_path / "sessions.db"), ttl=60)
+
+
+def test_get_and_put_hand_out_copies(store):
+    state = {"answers": ["a"], "current_question_idx": 0}
+    store.put("i1", state)
+    state["answers"].append("changed after put")
+
+    loaded = store.get("i1")
+    loaded["answers"].append("changed after get")
+    loaded["current_question_idx"] = 1
+
+    assert store.get("i1") == {"answers": ["a"], "current_question_idx": 0}
+
+
+def test_idle_sessions_expire(store, clock):
+    store.put("i1", {"n": 1})
+    clock.now += 59
+    assert store.get("i1") == {"n": 1}
+    clock.now += 61
+    assert store.get("i1") is None
+
+
+def test_memory_store_evicts_least_recently_used(clock):
+    store = MemorySessionStore(max_sessions=3, ttl=60)
+    for n in range(3):
+        store.put(f"i{n}", {"n": n})
+    store.get("i0")
+    store.put("i3", {"n": 3})
+
+    assert store.get("i1") is None
+    assert [store.get(f"i{n}") for n in (0, 2, 3)] == [{"n": 0}, {"n": 2}, {"n": 3}]
+    assert len(store) == 3
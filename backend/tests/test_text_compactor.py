@@ -0,0 +1,57 @@
+from text_compactor import compact_pages, strip_repeated_lines
+
+HEADER = "Jane Doe | jane@x.com | +1 555 0100"
+
+
+def test_two_page_resume_keeps_repeated_top_lines():
+    pages = [
+        f"{HEADER}\nSoftware Engineer\nExperience\nBuilt APIs at Acme\n1",
+        f"{HEADER}\nSoftware Engineer\nProjects\nQueue service in Go\n2",
+    ]
+    text = compact_pages(pages)
+    assert HEADER in text
+    assert text.count("Software Engineer") == 2
+    assert "Built APIs at Acme" in text and "Queue service in Go" in text
+
+
+def test_header_footer_kept_once_and_page_numbers_dropped():
+    body = "\n".join(f"Bullet {i} about shipped work" for i in range(8))
+    pages = [
+        f"{HEADER}\nSkills\nPython, SQL\n{body}\nConfidential resume\nPage {n} of 4"
+        for n in range(1, 5)
+    ]
+    cleaned = strip_repeated_lines(pages)
+    joined = "\n".join(cleaned)
+    assert cleaned[0].startswith(HEADER)
+    assert joined.count(HEADER) == 1
+    assert joined.count("Confidential resume") == 1
+    assert "Page" not in joined
+    # Body lines are not edge noise even though they repeat
+    assert joined.count("Bullet 4 about shipped work") == 4
+
+
+def test_job_titles_on_several_pages_survive_compaction():
+    pages = [
+        f"{HEADER}\nExperience\nSoftware Engineer\nAcme 2019-2021\n1",
+        f"{HEADER}\nSoftware Engineer\nGlobex 2021-2023\n2",
+        f"{HEADER}\nProjects\nSoftware Engineer tooling\n3",
+    ]
+    text = compact_pages(pages)
+    assert text.count(HEADER) == 1
+    assert text.splitlines().count("Software Engineer") == 2
+    assert "Acme 2019-2021" in text and "Globex 2021-2023" in text
+
+
+def test_dated_job_headers_at_page_tops_are_content():
+    body = "\n".join(f"Delivered project {i} on time" for i in range(6))
+    jobs = [("Staff Engineer", "2019 - 2023"), ("Senior Engineer", "2017 - 2019"),
+            ("Engineer", "2015 - 2017"), ("Junior Engineer", "2013 - 2015")]
+    pages = [
+        f"{title}\n{dates}\n{body}\nJane Doe - Page {n} of 4"
+        for n, (title, dates) in enumerate(jobs, start=1)
+    ]
+    joined = "\n".join(strip_repeated_lines(pages))
+    for title, dates in jobs:
+        assert title in joined and dates in joined
+    # The numbered footer is still recognised as one repeated line
+    assert joined.count("Jane Doe - Page") == 1
@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import pytest
+from starlette.datastructures import UploadFile
+
+import upload_store
+from upload_store import UploadTooLarge
+
+PDF = b"%PDF-1.4 resume " * 100
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(upload_store, "get_upload_refcounts", lambda: {})
+    monkeypatch.setattr(upload_store, "stats", dict.fromkeys(upload_store.stats, 0))
+    return upload_store
+
+
+def _put(data, limit=10 * 1024 * 1024):
+    return asyncio.run(upload_store.put(UploadFile(io.BytesIO(data), filename="r.pdf"), limit))
+
+
+def _leftovers():
+    return [name for _, _, names in os.walk(upload_store.UPLOAD_DIR) for name in names if name.endswith(".tmp")]
+
+
+def test_identical_uploads_are_stored_once(store):
+    digest, path = _put(PDF)
+    assert digest == hashlib.sha256(PDF).hexdigest()
+    assert path == store.path_for(digest)
+    with open(path, "rb") as f:
+        assert f.read() == PDF
+
+    assert _put(PDF) == (digest, path)
+    assert (store.stats["writes"], store.stats["dedup_hits"]) == (1, 1)
+    assert _leftovers() == []
+
+
+def test_oversized_upload_leaves_nothing_behind(store):
+    with pytest.raises(UploadTooLarge):
+        _put(PDF, limit=100)
+    assert _leftovers() == []
+    assert not os.path.exists(store.path_for(hashlib.sha256(PDF).hexdigest()))
+
+
+def test_sweep_removes_orphans_and_stale_temp_files(store):
+    _, old = _put(PDF)
+    _, new = _put(PDF + b"v2")
+    stale_tmp = os.path.join(store.UPLOAD_DIR, ".abandoned.tmp")
+    open(stale_tmp, "wb").close()
+    past = time.time() - store.UPLOAD_ORPHAN_TTL - 60
+    for path in (old, stale_tmp):
+        os.utime(path, (past, past))
+
+    assert store.sweep() == 2
+    assert not os.path.exists(old) and not os.path.exists(stale_tmp)
+    assert os.path.exists(new)
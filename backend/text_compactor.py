@@ -0,0 +1,195 @@
+"""
+Resume text compaction before parse_resume.
+
+PDF exports repeat a header/footer on every page and add page numbers, so
+the prompt for a 12-page CV carries a dozen copies of the same lines.
+compact_pages() removes that noise (keeping the first copy of a repeated
+header, which is usually the candidate's name and contact line), collapses whitespace in one pass,
+splits the text into sections and trims it to RESUME_TOKEN_BUDGET tokens,
+dropping low-value sections (references, hobbies) before high-value ones
+(skills, experience, projects).
+"""
+import math
+import os
+import re
+from collections import Counter
+
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+
+# Lines at the top/bottom of each page checked for repetition
+EDGE_LINES = 3
+# A top/bottom line on at least this share of pages, and on at least
+# MIN_REPEAT_PAGES pages, is a header/footer. Two pages are not enough: a
+# job title at the top of both pages of a CV is content.
+REPEAT_THRESHOLD = 0.5
+MIN_REPEAT_PAGES = 3
+
+# Heading -> canonical section. Lower priority number survives trimming longer.
+SECTIONS = {
+    "summary": "summary", "profile": "summary", "about me": "summary", "objective": "summary",
+    "professional summary": "summary", "career objective": "summary",
+    "skills": "skills", "technical skills": "skills", "core skills": "skills",
+    "technologies": "skills", "tech stack": "skills", "core competencies": "skills",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "employment": "experience", "employment history": "experience", "work history": "experience",
+    "projects": "projects", "personal projects": "projects", "key projects": "projects",
+    "education": "education", "academic background": "education",
+    "certifications": "certifications", "certificates": "certifications", "courses": "certifications",
+    "achievements": "achievements", "awards": "achievements", "honors": "achievements",
+    "publications": "publications",
+    "languages": "languages",
+    "volunteering": "other", "volunteer experience": "other", "activities": "other",
+    "interests": "interests", "hobbies": "interests",
+    "references": "references",
+}
+SECTION_PRIORITY = {
+    "header": 0, "skills": 0, "experience": 1, "projects": 2, "summary": 3, "education": 4,
+    "certifications": 5, "achievements": 5, "publications": 6, "languages": 6, "other": 7,
+    "interests": 8, "references": 9,
+}
+# Sections that never help the parser ("References available upon request")
+DROP_SECTIONS = {"references"}
+# When trimming, every section first keeps up to this many lines, so a long
+# project list can't crowd out education or certifications
+SECTION_HEAD_LINES = 6
+
+_PAGE_NUMBER = re.compile(r"^\s*(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?\s*$", re.IGNORECASE)
+# "Page 3", "page 3 of 12", "Page 3/12" anywhere in a header/footer line
+_PAGE_FOOTER = re.compile(r"\bpage\s*\d{1,3}(\s*(of|/)\s*\d{1,3})?\b", re.IGNORECASE)
+# Only runs that change: lone spaces and lone newlines never match
+_WHITESPACE = re.compile(r"[^\S\n]+\n\s*|\n\s+|[^\S\n]{2,}|[^\S\n ]|\x00")
+# One token per punctuation mark and per (up to) 4 word characters
+_TOKEN = re.compile(r"\w{1,4}|[^\w\s]")
+# Longest line that can still be a section heading
+_MAX_HEADING_CHARS = 40
+
+stats = {"compacted": 0, "tokens_in": 0, "tokens_out": 0, "trimmed": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local BPE-style estimate: punctuation is one token, words one token per
+    ~4 characters. Close enough to the Llama tokenizer for budgeting.
+    """
+    return len(_TOKEN.findall(text))
+
+
+def _line_key(line: str) -> str:
+    """
+    Identity of an edge line. Only page-number footers ("Jane Doe - Page 3
+    of 12") have their numbers masked; any other line must repeat exactly,
+    so date ranges and numbered content never collapse into one "header".
+    """
+    line = line.strip()
+    if _PAGE_FOOTER.search(line):
+        return _PAGE_FOOTER.sub("page #", line.lower())
+    return line
+
+
+def strip_repeated_lines(pages):
+    """
+    Drop bare page numbers and repeated headers/footers, keeping the first
+    copy of each header/footer. Returns a list of page texts.
+    """
+    pages = [(page or "").splitlines() for page in pages]
+    edges = Counter()
+    for lines in pages:
+        content = [line for line in lines if line.strip()]
+        edges.update({_line_key(line) for line in content[:EDGE_LINES] + content[-EDGE_LINES:]})
+
+    min_pages = max(MIN_REPEAT_PAGES, math.ceil(len(pages) * REPEAT_THRESHOLD))
+    repeated = {key for key, count in edges.items() if count >= min_pages}
+
+    cleaned = []
+    first_seen = set()
+    for lines in pages:
+        content = [line for line in lines if line.strip()]
+        edge = set(content[:EDGE_LINES] + content[-EDGE_LINES:])
+        kept = []
+        for line in lines:
+            if _PAGE_NUMBER.match(line):
+                continue
+            key = _line_key(line)
+            if line in edge and key in repeated:
+                if key in first_seen:
+                    continue
+                first_seen.add(key)
+            kept.append(line)
+        cleaned.append("\n".join(kept))
+    return cleaned
+
+
+def collapse_whitespace(text: str) -> str:
+    """One pass: newline runs -> one newline, other whitespace runs -> one space, NULs dropped"""
+    def repl(match):
+        run = match.group()
+        if run == "\x00":
+            return ""
+        return "\n" if "\n" in run else " "
+    return _WHITESPACE.sub(repl, text).strip()
+
+
+def _heading(line: str):
+    if len(line) > _MAX_HEADING_CHARS:
+        return None
+    key = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    if len(key.split()) <= 3 and key in SECTIONS:
+        return SECTIONS[key]
+    return None
+
+
+def segment(text: str):
+    """Split into [(section, [lines])]; text before the first heading is the "header" section"""
+    sections = [("header", [])]
+    for line in text.split("\n"):
+        section = _heading(line)
+        if section is not None:
+            sections.append((section, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, lines) for name, lines in sections if lines]
+
+
+def fit_budget(sections, costs, budget: int):
+    """
+    Keep whole lines within the budget: first the head of every section, then
+    the rest, each pass in priority order. Sections keep their original order.
+    costs[i][j] is the token cost of line j of section i.
+    """
+    kept = [0] * len(sections)
+    remaining = budget
+    order = sorted(range(len(sections)), key=lambda i: SECTION_PRIORITY.get(sections[i][0], 7))
+    for limit in (SECTION_HEAD_LINES, None):
+        for i in order:
+            for cost in costs[i][kept[i]:limit]:
+                if cost > remaining:
+                    break
+                remaining -= cost
+                kept[i] += 1
+    # A heading whose body didn't fit is noise
+    return [
+        (name, lines[:kept[i]]) for i, (name, lines) in enumerate(sections)
+        if kept[i] > 1 or (kept[i] == 1 and name == "header")
+    ]
+
+
+def compact_pages(pages, budget: int = RESUME_TOKEN_BUDGET) -> str:
+    """Page texts from the PDF -> compact resume text within `budget` tokens"""
+    raw = "\n".join(page or "" for page in pages)
+    text = collapse_whitespace("\n".join(strip_repeated_lines(pages)))
+
+    sections = [(name, lines) for name, lines in segment(text) if name not in DROP_SECTIONS]
+
+    # +1 per line for the newline
+    costs = [[estimate_tokens(line) + 1 for line in lines] for _, lines in sections]
+    tokens = sum(map(sum, costs))
+    if tokens > budget:
+        sections = fit_budget(sections, costs, budget)
+        tokens = sum(estimate_tokens(line) + 1 for _, lines in sections for line in lines)
+        stats["trimmed"] += 1
+
+    stats["compacted"] += 1
+    stats["tokens_in"] += estimate_tokens(raw)
+    stats["tokens_out"] += tokens
+    return "\n".join(line for _, lines in sections for line in lines)
+
@@ -0,0 +1,179 @@
+"""
+Content-addressed storage for uploaded resume PDFs.
+
+Files are stored as UPLOAD_DIR/<sha[:2]>/<sha256>.pdf. An upload is copied
+to a temp file and hashed in the same pass (in a worker thread), then
+renamed into place; if that content is already stored the temp file is
+dropped and only the stored file's mtime is refreshed. The sha256 doubles as the
+`upload_id` clients pass to /start-interview; resumes.upload_sha256 links a
+resume to its file and gives the reference count.
+
+sweep() enforces retention:
+- unreferenced files older than UPLOAD_ORPHAN_TTL are removed,
+- referenced files unused for UPLOAD_MAX_AGE are removed (the parsed
+  profile lives in the DB, the PDF is no longer needed),
+- then the oldest files (unreferenced first) go until the store is under
+  UPLOAD_MAX_BYTES.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import time
+import uuid
+
+from db import get_upload_refcounts
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "../uploads")
+UPLOAD_MAX_AGE = float(os.getenv("UPLOAD_MAX_AGE", str(30 * 24 * 3600)))
+UPLOAD_ORPHAN_TTL = float(os.getenv("UPLOAD_ORPHAN_TTL", str(24 * 3600)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(1024 * 1024 * 1024)))
+UPLOAD_GC_INTERVAL = float(os.getenv("UPLOAD_GC_INTERVAL", "600"))
+
+CHUNK_SIZE = 256 * 1024
+# Interrupted writes leave .tmp files; anything this old is abandoned
+TMP_TTL = 3600
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+# uuid-named PDFs written before the store existed, directly in UPLOAD_DIR
+_LEGACY = re.compile(r"^[0-9a-f-]{36}\.pdf$")
+
+# files/bytes are as of the last sweep
+stats = {
+    "writes": 0, "dedup_hits": 0, "gc_runs": 0, "gc_removed": 0, "gc_bytes_freed": 0,
+    "files": 0, "bytes": 0,
+}
+
+
+class UploadTooLarge(ValueError):
+    """Upload exceeds the size limit"""
+
+
+def is_upload_id(value: str) -> bool:
+    return bool(value) and bool(_DIGEST.match(value))
+
+
+def path_for(digest: str) -> str:
+    return os.path.join(UPLOAD_DIR, digest[:2], f"{digest}.pdf")
+
+
+def copy_hashed(src, dst_path: str, limit: int) -> str:
+    """
+    Copy a binary file object to dst_path in one pass, hashing as it goes.
+    Returns the sha256. Raises UploadTooLarge past `limit` bytes, removing
+    dst_path. Blocking: run it in a thread.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dst_path, "wb") as f:
+            while chunk := src.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge(f"Upload exceeds {limit} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        raise
+    return digest.hexdigest()
+
+
+def _store(src, limit: int):
+    # Stream into a temp file while hashing, then rename it into place (or drop
+    # it if the content is already stored): readers never see a partial file
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    tmp_path = os.path.join(UPLOAD_DIR, f".{uuid.uuid4().hex}.tmp")
+    digest = copy_hashed(src, tmp_path, limit)
+    path = path_for(digest)
+    try:
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            # Refresh mtime: retention counts from the last upload
+            os.utime(path)
+            stats["dedup_hits"] += 1
+            return digest, path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    stats["writes"] += 1
+    return digest, path
+
+
+async def put(file, limit: int):
+    """
+    Store an UploadFile by content. Returns (sha256, path).
+    Raises UploadTooLarge past `limit` bytes; nothing is kept in that case.
+    """
+    await file.seek(0)
+    return await asyncio.to_thread(_store, file.file, limit)
+
+
+def _scan():
+    """(path, digest or None, mtime, size) for stored, legacy and temp files"""
+    if not os.path.isdir(UPLOAD_DIR):
+        return []
+    found = []
+    for entry in os.scandir(UPLOAD_DIR):
+        if entry.is_file() and (_LEGACY.match(entry.name) or entry.name.endswith(".tmp")):
+            stat = entry.stat()
+            found.append((entry.path, None, stat.st_mtime, stat.st_size))
+        # Shard dirs only: bulk jobs and anything else in UPLOAD_DIR are not ours
+        elif entry.is_dir() and re.match(r"^[0-9a-f]{2}$", entry.name):
+            for item in os.scandir(entry.path):
+                stat = item.stat()
+                digest = item.name[:-4] if item.name.endswith(".pdf") else None
+                found.append((item.path, digest, stat.st_mtime, stat.st_size))
+    return found
+
+
+def _remove(path, size):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    stats["gc_removed"] += 1
+    stats["gc_bytes_freed"] += size
+
+
+def sweep(now=None):
+    """One retention/GC pass (blocking: run it in a thread). Returns files removed."""
+    now = time.time() if now is None else now
+    refs = get_upload_refcounts()
+    removed_before = stats["gc_removed"]
+
+    kept = []
+    for path, digest, mtime, size in _scan():
+        age = now - mtime
+        if path.endswith(".tmp"):
+            if age > TMP_TTL:
+                _remove(path, size)
+            continue
+        referenced = digest is not None and refs.get(digest, 0) > 0
+        if age > (UPLOAD_MAX_AGE if referenced else UPLOAD_ORPHAN_TTL):
+            _remove(path, size)
+        else:
+            kept.append((referenced, mtime, path, size))
+
+    # Size cap: oldest unreferenced files first, then oldest referenced
+    total = sum(size for *_, size in kept)
+    count = len(kept)
+    for referenced, mtime, path, size in sorted(kept):
+        if total <= UPLOAD_MAX_BYTES:
+            break
+        _remove(path, size)
+        total -= size
+        count -= 1
+
+    stats["gc_runs"] += 1
+    stats["files"] = count
+    stats["bytes"] = total
+    removed = stats["gc_removed"] - removed_before
+    if removed:
+        print(f"[Uploads] GC removed {removed} file(s), {total} bytes remain")
+    return removed
+